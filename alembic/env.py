@@ -3,9 +3,12 @@ from sqlalchemy import engine_from_config
 from sqlalchemy import pool
 from alembic import context
 from src.database import Base
-from src.auth.jwt import models
 from src.auth.users import models
 from src.posts import models
+from src.timeline import models
+from src.aws import models
+from src.auth.email import models
+from src import models
 from src.config import settings
 
 # this is the Alembic Config object, which provides
@@ -14,6 +17,7 @@ config = context.config
 
 section = config.config_ini_section  
 config.set_section_option(section, 'DB_URL', settings.asyncpg_url)
+config.set_section_option(section, 'REDIS_URL', f'redis://{settings.REDIS_HOST}')  # For data migrations into redis
 
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
@@ -0,0 +1,127 @@
+'''
+API benchmarks. App is driven in-process through `httpx.ASGITransport` (`--transport asgi`, measures app
+without network and server) or through uvicorn over real HTTP on localhost (`--transport http`).
+Redis is replaced by fakeredis and S3 by moto server (or `--s3-endpoint` of running MinIO),
+database is local Postgres (test database from settings by default, it is recreated).
+
+Usage:
+    python -m benchmarks --transport asgi --requests 200 --concurrency 10
+    python -m benchmarks --save-baseline  # Store results as baseline
+Run fails with exit code 1 if p95 latency or throughput of any scenario is worse than
+baseline by more than `--tolerance`.
+'''
+import argparse
+import asyncio
+import json
+import sys
+import threading
+from contextlib import asynccontextmanager
+from pathlib import Path
+import httpx
+from benchmarks.environment import (
+    s3_stand_in, use_fake_redis, use_database, reset_database, create_bucket, get_free_port
+)
+from benchmarks.runner import run_scenario, print_report, load_baseline, save_baseline, compare_with_baseline
+from benchmarks.scenarios import seed, get_scenarios
+
+DEFAULT_BASELINE = Path(__file__).parent / 'baseline.json'
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='API benchmarks')
+    parser.add_argument('--transport', choices=['asgi', 'http'], default='asgi')
+    parser.add_argument('--requests', type=int, default=200, help='Requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--users', type=int, default=10, help='Seeded users')
+    parser.add_argument('--posts', type=int, default=300, help='Seeded posts')
+    parser.add_argument('--only', help='Run only scenarios which names contain this substring')
+    parser.add_argument('--database-url', help='Database for benchmark (test database by default)')
+    parser.add_argument('--s3-endpoint', help='Running S3 compatible storage (moto server by default)')
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed degradation against baseline')
+    parser.add_argument('--output', type=Path, help='Write results into JSON file')
+    return parser.parse_args()
+
+
+@asynccontextmanager
+async def asgi_client(app):
+    # ASGITransport does not run lifespan, so it is run here
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://benchmark') as client:
+            yield client
+
+
+@asynccontextmanager
+async def http_client(app):
+    '''Runs uvicorn in separate thread (with its own event loop), so client does not compete with app'''
+    import uvicorn
+    
+    port = get_free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host='127.0.0.1', port=port, log_level='warning', access_log=False))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError('Server failed to start')
+        await asyncio.sleep(0.05)
+    
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    try:
+        async with httpx.AsyncClient(base_url=f'http://127.0.0.1:{port}', limits=limits, timeout=60) as client:
+            yield client
+    finally:
+        server.should_exit = True
+        thread.join()
+
+
+async def main(args: argparse.Namespace) -> int:
+    from src.main import app
+    from src.config import settings
+    
+    use_fake_redis()
+    engine = use_database(args.database_url or settings.test_asyncpg_url)
+    await reset_database(engine)
+    await create_bucket()
+    
+    client_factory = asgi_client if args.transport == 'asgi' else http_client
+    results = []
+    async with client_factory(app) as client, httpx.AsyncClient(timeout=60) as storage:
+        print(f'Seeding {args.users} users and {args.posts} posts...')
+        data = await seed(client, args.users, args.posts)
+        
+        for scenario in get_scenarios(client, storage, data):
+            if args.only and args.only not in scenario.name:
+                continue
+            requests = min(args.requests, scenario.max_requests or args.requests)
+            results.append(await run_scenario(scenario.name, scenario.send, requests, args.concurrency))
+    # Over HTTP connections belong to loop of server thread, which is closed already
+    await engine.dispose(close=args.transport == 'asgi')
+    
+    print(f'\nTransport: {args.transport}, concurrency: {args.concurrency}\n')
+    print_report(results)
+    if args.output:
+        args.output.write_text(json.dumps({result.name: result.as_dict() for result in results}, indent=4) + '\n')
+    
+    if args.save_baseline:
+        save_baseline(args.baseline, args.transport, results)
+        print(f'\nBaseline saved into {args.baseline}')
+        return 0
+    
+    baseline = load_baseline(args.baseline, args.transport)
+    if not baseline:
+        print('\nNo baseline to compare with (use --save-baseline)')
+        return 0
+    regressions = compare_with_baseline(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f'REGRESSION {regression}')
+    if not regressions:
+        print(f'\nNo regressions against baseline (tolerance {args.tolerance:.0%})')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    arguments = parse_args()
+    # S3 endpoint must be set before app settings are loaded
+    with s3_stand_in(arguments.s3_endpoint):
+        sys.exit(asyncio.run(main(arguments)))
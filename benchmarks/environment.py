@@ -0,0 +1,96 @@
+'''
+Local stand-ins of external services for benchmarks:
+local Postgres database (test database by default, it is recreated on every run),
+fakeredis in place of redis and moto S3 server in place of S3 (or running MinIO, if its endpoint is given).
+S3 endpoint must be set before `src` is imported, because settings are read on import.
+'''
+import os
+import socket
+from contextlib import contextmanager
+
+
+def get_free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def s3_stand_in(endpoint_url: str | None = None):
+    '''Starts moto S3 server, if endpoint of running S3 compatible storage is not given'''
+    if endpoint_url:
+        os.environ['S3_ENDPOINT_URL'] = endpoint_url
+        yield endpoint_url
+        return
+    
+    from moto.server import ThreadedMotoServer
+    port = get_free_port()
+    server = ThreadedMotoServer(ip_address='127.0.0.1', port=port, verbose=False)
+    server.start()
+    os.environ['S3_ENDPOINT_URL'] = f'http://127.0.0.1:{port}'
+    try:
+        yield os.environ['S3_ENDPOINT_URL']
+    finally:
+        server.stop()
+
+
+def use_fake_redis() -> None:
+    '''Replaces app redis client with fakeredis one (with the same pool class, so pool stats still work)'''
+    import fakeredis
+    from fakeredis.aioredis import FakeRedis
+    from src.redis_client import dependencies
+    from src.redis_client.client import RedisClient, TimedConnectionPool
+    from src.config import settings
+    
+    client = RedisClient(settings.REDIS_HOST)
+    client.connection = FakeRedis(
+        server=fakeredis.FakeServer(),
+        connection_pool_class=TimedConnectionPool,
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+        timeout=settings.REDIS_POOL_TIMEOUT
+    )
+    client.pool = client.connection.connection_pool
+    dependencies.redis_client = client
+
+
+def use_database(database_url: str):
+    '''Makes app sessions use database with `database_url`, returns its engine (app imports all models)'''
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+    from src.dependencies import get_db
+    from src.main import app
+    from src.config import settings
+    
+    engine = create_async_engine(
+        database_url,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW
+    )
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    
+    async def get_db_benchmark():
+        async with session_factory() as session:
+            yield session
+    
+    app.dependency_overrides[get_db] = get_db_benchmark
+    return engine
+
+
+async def reset_database(engine) -> None:
+    from src.database import Base
+    
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.drop_all)
+        await connection.run_sync(Base.metadata.create_all)
+    # Connections must not be bound to this event loop (server can be run in other thread)
+    await engine.dispose()
+
+
+async def create_bucket() -> None:
+    from src.aws.client import S3Client
+    
+    s3_client = S3Client()
+    async with s3_client.get_client() as client:
+        try:
+            await client.create_bucket(Bucket=s3_client.bucket_name)
+        except client.exceptions.BucketAlreadyOwnedByYou:
+            pass
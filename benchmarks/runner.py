@@ -0,0 +1,129 @@
+import asyncio
+import json
+import math
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+import httpx
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    seconds: float = 0
+    errors: int = 0
+    latencies: list[float] = field(default_factory=list)
+    
+    @property
+    def requests(self) -> int:
+        return len(self.latencies)
+    
+    @property
+    def throughput(self) -> float:
+        return self.requests / self.seconds if self.seconds else 0
+    
+    def percentile(self, percent: float) -> float:
+        '''Latency percentile (nearest rank) in milliseconds'''
+        if not self.latencies:
+            return 0
+        ordered = sorted(self.latencies)
+        rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+        return ordered[rank - 1] * 1000
+    
+    def as_dict(self) -> dict:
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'throughput': round(self.throughput, 2),
+            'p50_ms': round(self.percentile(50), 2),
+            'p95_ms': round(self.percentile(95), 2),
+            'p99_ms': round(self.percentile(99), 2)
+        }
+
+
+async def run_scenario(
+    name: str,
+    send: Callable[[int], Awaitable[httpx.Response]],
+    requests: int,
+    concurrency: int
+) -> ScenarioResult:
+    '''
+    Sends `requests` requests by `concurrency` concurrent workers (closed loop: each worker sends
+    next request when previous one is answered)
+    Args:
+        name: Scenario name
+        send: Sends request with given sequence number
+        requests: Requests count
+        concurrency: Workers count
+    Returns:
+        ScenarioResult
+    '''
+    result = ScenarioResult(name)
+    numbers = iter(range(requests))  # Shared by workers
+    
+    async def worker():
+        for number in numbers:
+            started = time.perf_counter()
+            try:
+                response = await send(number)
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            result.latencies.append(time.perf_counter() - started)
+            result.errors += failed
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def print_report(results: list[ScenarioResult]) -> None:
+    header = f'{"scenario":<28}{"requests":>10}{"errors":>8}{"req/s":>10}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}'
+    print(header)
+    print('-' * len(header))
+    for result in results:
+        stats = result.as_dict()
+        print(
+            f'{result.name:<28}{stats["requests"]:>10}{stats["errors"]:>8}{stats["throughput"]:>10.1f}'
+            f'{stats["p50_ms"]:>10.1f}{stats["p95_ms"]:>10.1f}{stats["p99_ms"]:>10.1f}'
+        )
+
+
+def load_baseline(path: Path, transport: str) -> dict:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text()).get(transport, {})
+
+
+def save_baseline(path: Path, transport: str, results: list[ScenarioResult]) -> None:
+    '''Saves results as baseline of transport (baselines of other transports are kept)'''
+    baselines = json.loads(path.read_text()) if path.exists() else {}
+    baselines[transport] = {result.name: result.as_dict() for result in results}
+    path.write_text(json.dumps(baselines, indent=4) + '\n')
+
+
+def compare_with_baseline(results: list[ScenarioResult], baseline: dict, tolerance: float) -> list[str]:
+    '''
+    Compares results with baseline
+    Args:
+        results: Current results
+        baseline: Baseline stats by scenario name
+        tolerance: Allowed relative degradation of p95 latency and throughput (e.g. 0.2 is 20%)
+    Returns:
+        list[str] (Regressions descriptions)
+    '''
+    regressions = []
+    for result in results:
+        expected = baseline.get(result.name)
+        if not expected:
+            continue
+        current = result.as_dict()
+        if current['p95_ms'] > expected['p95_ms'] * (1 + tolerance):
+            regressions.append(f'{result.name}: p95 {current["p95_ms"]} ms (baseline {expected["p95_ms"]} ms)')
+        if current['throughput'] < expected['throughput'] * (1 - tolerance):
+            regressions.append(f'{result.name}: {current["throughput"]} req/s (baseline {expected["throughput"]} req/s)')
+        if current['errors'] > expected['errors']:
+            regressions.append(f'{result.name}: {current["errors"]} errors (baseline {expected["errors"]})')
+    return regressions
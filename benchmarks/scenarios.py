@@ -0,0 +1,173 @@
+import base64
+import struct
+import zlib
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from uuid import uuid4
+import httpx
+
+PASSWORD = 'benchmarkpassword123'
+FEED_PAGE_SIZE = 20
+
+# 1x1 PNG image
+IMAGE = base64.b64decode(
+    'iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=='
+)
+
+
+def unique_image(text: str) -> bytes:
+    '''`IMAGE` with text chunk before IEND, so every upload has new content (same content is deduplicated)'''
+    chunk = b'tEXt' + b'Comment\0' + text.encode()
+    return IMAGE[:-12] + struct.pack('>I', len(chunk) - 4) + chunk + struct.pack('>I', zlib.crc32(chunk)) + IMAGE[-12:]
+
+
+@dataclass
+class BenchmarkData:
+    '''Users and posts created through API before measurements'''
+    emails: list[str] = field(default_factory=list)
+    tokens: list[str] = field(default_factory=list)
+    post_ids: list[str] = field(default_factory=list)
+    feed_cursor: str | None = None
+    
+    def auth(self, number: int) -> dict:
+        return {'Authorization': f'Bearer {self.tokens[number % len(self.tokens)]}'}
+
+
+@dataclass
+class Scenario:
+    name: str
+    send: Callable[[int], Awaitable[httpx.Response]]
+    max_requests: int | None = None  # E.g. cold cache scenario can not repeat requests
+
+
+async def register(client: httpx.AsyncClient, email: str) -> httpx.Response:
+    return await client.post('/api/auth/register', json={
+        'email': email,
+        'username': email.split('@')[0],
+        'password': PASSWORD,
+        'confirm_password': PASSWORD
+    })
+
+
+async def upload(client: httpx.AsyncClient, headers: dict, image: bytes = IMAGE) -> httpx.Response:
+    return await client.post(
+        '/api/posts/upload',
+        data={'title': 'Benchmark post', 'description': 'Benchmark post description'},
+        files={'file': ('image.png', image, 'image/png')},
+        headers=headers
+    )
+
+
+async def upload_direct(
+    client: httpx.AsyncClient, 
+    storage: httpx.AsyncClient, 
+    headers: dict, 
+    image: bytes = IMAGE
+) -> httpx.Response:
+    '''Presigned upload: file is sent straight to storage, API only signs and finalizes it'''
+    response = await client.post(
+        '/api/posts/upload-url', 
+        json={'content_type': 'image/png', 'size': len(image)}, 
+        headers=headers
+    )
+    if response.is_error:
+        return response
+    upload_url = response.json()
+    response = await storage.post(
+        upload_url['url'], 
+        data=upload_url['fields'], 
+        files={'file': ('image.png', image, 'image/png')}
+    )
+    if response.is_error:
+        return response
+    return await client.post(
+        '/api/posts/finalize',
+        json={
+            'object_name': upload_url['object_name'], 
+            'title': 'Benchmark post', 
+            'description': 'Benchmark post description'
+        },
+        headers=headers
+    )
+
+
+async def seed(client: httpx.AsyncClient, users: int, posts: int) -> BenchmarkData:
+    '''Registers and verifies users, logs them in and uploads posts round-robin'''
+    from src.auth.users import User
+    from src.auth.jwt.utils import mail_token
+    
+    data = BenchmarkData()
+    for number in range(users):
+        email = f'bench-user-{number}@example.com'
+        response = await register(client, email)
+        response.raise_for_status()
+        # Verification token is sent by email, so it is built like service does
+        token = mail_token(User.model_validate(response.json()))
+        (await client.patch(f'/api/auth/verify/{token}')).raise_for_status()
+        
+        response = await client.post('/api/auth/login', json={'email': email, 'password': PASSWORD})
+        response.raise_for_status()
+        data.emails.append(email)
+        data.tokens.append(response.json()['access_token'])
+    
+    for number in range(posts):
+        response = await upload(client, data.auth(number), unique_image(f'seed-{number}'))
+        response.raise_for_status()
+        data.post_ids.append(response.json()['id'])
+    
+    response = await client.get('/api/posts/feed', params={'limit': FEED_PAGE_SIZE}, headers=data.auth(0))
+    response.raise_for_status()
+    data.feed_cursor = response.json()['pagination']['next_cursor']
+    return data
+
+
+def get_scenarios(client: httpx.AsyncClient, storage: httpx.AsyncClient, data: BenchmarkData) -> list[Scenario]:
+    '''
+    Scenarios in run order (cold cache one must run before warm one),
+    `storage` client sends presigned uploads to S3 endpoint
+    '''
+    run_id = uuid4().hex[:8]
+    deep_offset = max(len(data.post_ids) - FEED_PAGE_SIZE, 0)
+    
+    def feed(**params):
+        async def send(number: int) -> httpx.Response:
+            return await client.get(
+                '/api/posts/feed',
+                params={'limit': FEED_PAGE_SIZE, **params},
+                headers=data.auth(number)
+            )
+        return send
+    
+    async def get_post_cold(number: int) -> httpx.Response:
+        return await client.get(f'/api/posts/{data.post_ids[number]}')
+    
+    async def get_post_warm(number: int) -> httpx.Response:
+        return await client.get(f'/api/posts/{data.post_ids[0]}')
+    
+    async def login(number: int) -> httpx.Response:
+        email = data.emails[number % len(data.emails)]
+        return await client.post('/api/auth/login', json={'email': email, 'password': PASSWORD})
+    
+    async def register_user(number: int) -> httpx.Response:
+        return await register(client, f'bench-{run_id}-{number}@example.com')
+    
+    # Every request uploads new content, so uploads are not measured as deduplication hits
+    async def upload_post(number: int) -> httpx.Response:
+        return await upload(client, data.auth(number), unique_image(f'{run_id}-{number}'))
+    
+    async def upload_post_direct(number: int) -> httpx.Response:
+        return await upload_direct(client, storage, data.auth(number), unique_image(f'{run_id}-direct-{number}'))
+    
+    offsets = sorted({0, deep_offset // 2, deep_offset})  # Few seeded posts give the same offsets
+    scenarios = [Scenario(f'feed offset={offset}', feed(offset=offset)) for offset in offsets]
+    if data.feed_cursor:
+        scenarios.append(Scenario('feed cursor (page 2)', feed(cursor=data.feed_cursor)))
+    scenarios += [
+        Scenario('post cold cache', get_post_cold, max_requests=len(data.post_ids)),
+        Scenario('post warm cache', get_post_warm),
+        Scenario('login', login),
+        Scenario('register', register_user),
+        Scenario('upload image', upload_post),
+        Scenario('upload image (presigned)', upload_post_direct)
+    ]
+    return scenarios
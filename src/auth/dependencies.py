@@ -3,29 +3,52 @@ from fastapi import Depends
 from fastapi.security import OAuth2PasswordBearer
 from src.auth.service import AuthService
 from src.auth.users import User, UserModel
-from src.auth.jwt.utils import decode_access_token
-from src.auth.jwt import SUB
+from src.auth.users.summary_loader import UserSummaryLoader
+from src.auth.jwt.utils import decode_token, verify_not_revoked
+from src.auth.jwt.revocation import TokenRevocationStore
+from src.auth.jwt import SUB, JTI
+from src.auth.principal_cache import PrincipalCache
+from src.auth.email.outbox import MailOutbox
 from src.dependencies import SessionDep
+from src.redis_client.dependencies import RedisClientDep
 from src.auth.exceptions import UnauthorizedUserException
 
 
-def get_auth_service(session: SessionDep):
-    return AuthService(session)
+def get_auth_service(session: SessionDep, redis_client: RedisClientDep):
+    return AuthService(session, PrincipalCache(redis_client), TokenRevocationStore(redis_client), MailOutbox(session))
 
 
 AuthServiceDep = Annotated[AuthService, Depends(get_auth_service)]
 
+
+def get_user_summary_loader(session: SessionDep, redis_client: RedisClientDep):
+    # Dependencies are resolved once per request, so loader is shared by everything in request
+    return UserSummaryLoader(session, redis_client)
+
+
+UserSummaryLoaderDep = Annotated[UserSummaryLoader, Depends(get_user_summary_loader)]
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl='/api/auth/login')
 TokenDep = Annotated[str, Depends(oauth2_scheme)]
 
 
-async def get_current_user(token: TokenDep, session: SessionDep) -> User:
-    payload = await decode_access_token(session, token)
+async def get_current_user(token: TokenDep, session: SessionDep, redis_client: RedisClientDep) -> User:
+    payload = decode_token(token)
+    
+    # Warm path: principal was cached for this token, so it is not revoked
+    principal_cache = PrincipalCache(redis_client)
+    user_schema = await principal_cache.get(payload[SUB], payload[JTI])
+    if user_schema:
+        return user_schema
+    
+    await verify_not_revoked(TokenRevocationStore(redis_client), payload)
     user = await session.get(UserModel, payload[SUB])
+    await session.commit()  # Read transaction is ended, so connection is not held while request uploads files
     if not user:
         raise UnauthorizedUserException()
     
     user_schema = User.model_validate(user)
+    await principal_cache.set(user_schema, payload[JTI])
     return user_schema
 
 
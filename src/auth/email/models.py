@@ -0,0 +1,19 @@
+from datetime import datetime
+from sqlalchemy import Index, text as sa_text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+from src.database import Base
+
+
+class MailOutboxModel(Base):
+    '''Mail waiting for mail worker, row is inserted in the same transaction as change which sends mail'''
+    __tablename__ = 'mail_outbox'
+    __table_args__ = (
+        Index('ix_mail_outbox_pending', 'next_attempt_at', postgresql_where=sa_text('dead_at IS NULL')),  # Due mail
+    )
+    
+    payload: Mapped[dict] = mapped_column(JSONB)  # `MailTaskSchema`
+    attempts: Mapped[int] = mapped_column(server_default=sa_text('0'))
+    next_attempt_at: Mapped[datetime] = mapped_column(server_default=sa_text('TIMEZONE(\'UTC\', NOW())'))
+    last_error: Mapped[str | None]
+    dead_at: Mapped[datetime | None]  # Dead letter: mail is kept for inspection, but never sent again
@@ -0,0 +1,53 @@
+from datetime import timedelta
+from uuid import UUID
+from sqlalchemy import select, delete, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.auth.email.schemas import MailTaskSchema
+from src.auth.email.models import MailOutboxModel
+
+# Database clock is used, so workers on hosts with skewed clocks agree on due mail
+UTC_NOW = func.timezone('UTC', func.now())
+
+MAX_ERROR_LENGTH = 1000
+
+
+class MailOutbox:
+    '''
+    Transactional outbox of mail: mail is added into caller transaction, so it is sent
+    only if change is committed and is not lost if API process dies before sending it
+    '''
+    def __init__(self, session: AsyncSession):
+        self.session = session
+    
+    def add(self, task: MailTaskSchema) -> None:
+        '''Adds mail into current transaction (caller commits it)'''
+        self.session.add(MailOutboxModel(payload=task.model_dump(mode='json')))
+    
+    async def claim(self, limit: int) -> list[MailOutboxModel]:
+        '''
+        Locks due mail till the end of transaction. Rows locked by other workers are skipped,
+        so workers share outbox like consumer group, and mail of crashed worker is unlocked on its rollback.
+        '''
+        query = (
+            select(MailOutboxModel)
+            .where(MailOutboxModel.dead_at.is_(None), MailOutboxModel.next_attempt_at <= UTC_NOW)
+            .order_by(MailOutboxModel.next_attempt_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        return list((await self.session.scalars(query)).all())
+    
+    async def complete(self, ids: list[UUID]) -> None:
+        if ids:
+            await self.session.execute(delete(MailOutboxModel).where(MailOutboxModel.id.in_(ids)))
+    
+    def retry(self, mail: MailOutboxModel, error: str, delay: float) -> None:
+        mail.attempts += 1
+        mail.last_error = error[:MAX_ERROR_LENGTH]
+        mail.next_attempt_at = UTC_NOW + timedelta(seconds=delay)
+    
+    def bury(self, mail: MailOutboxModel, error: str) -> None:
+        '''Moves mail into dead letters'''
+        mail.attempts += 1
+        mail.last_error = error[:MAX_ERROR_LENGTH]
+        mail.dead_at = UTC_NOW
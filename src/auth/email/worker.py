@@ -0,0 +1,210 @@
+'''
+Mail worker: sends mail from outbox through SMTP connections kept open between batches.
+Run with `python -m src.auth.email.worker`, any number of workers can run at once.
+'''
+import asyncio
+import logging
+import signal
+import smtplib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+from email.message import EmailMessage
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from src.auth.email.schemas import MailTaskSchema, EmailSchema
+from src.auth.email.outbox import MailOutbox
+from src.database import SessionFactory, engine
+from src.logging_config import setup_logging, shutdown_logging
+from src.config import settings
+
+SUBJECTS = {
+    'verify': 'Email verification',
+    'password-reset': 'Password reset'
+}
+
+
+def build_message(task: MailTaskSchema) -> EmailMessage:
+    email = EmailSchema(recipients=[task.user.email], subject=SUBJECTS.get(task.body.type, 'Notification'), body=task.body)
+    message = EmailMessage()
+    message['From'] = settings.MAIL_FROM
+    message['To'] = ', '.join(email.recipients)
+    message['Subject'] = email.subject
+    message.set_content(f'Hello, {task.user.username}!\n\nYour {email.body.type} token: {email.body.token}\n')
+    return message
+
+
+def is_permanent(error: Exception) -> bool:
+    '''5xx replies (e.g. unknown recipient) do not succeed on retry'''
+    if isinstance(error, (smtplib.SMTPConnectError, smtplib.SMTPHeloError, smtplib.SMTPAuthenticationError)):
+        return False  # Server or credentials fail, not the message
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    return isinstance(error, smtplib.SMTPResponseException) and error.smtp_code >= 500
+
+
+def retry_delay(attempt: int) -> float:
+    '''Exponential backoff: `MAIL_RETRY_DELAY` after first failure, doubled after every next one'''
+    return min(settings.MAIL_RETRY_DELAY * 2 ** (attempt - 1), settings.MAIL_MAX_RETRY_DELAY)
+
+
+class SMTPPool:
+    '''
+    `smtplib` is blocking, so mail is sent from threads, and every thread keeps its own connection
+    open between batches (connecting and authenticating costs more than sending a message)
+    '''
+    def __init__(self, size: int):
+        self.size = size
+        self.executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix='smtp')
+        self._local = threading.local()
+        self._connections: list[smtplib.SMTP] = []
+        self._lock = threading.Lock()
+    
+    async def send(self, messages: list[EmailMessage]) -> list[Exception | None]:
+        '''Sends messages split between connections, returns error of every message (None if it is sent)'''
+        chunk_size = -(-len(messages) // self.size)
+        chunks = [messages[i:i + chunk_size] for i in range(0, len(messages), chunk_size)]
+        loop = asyncio.get_running_loop()
+        results = await asyncio.gather(*(loop.run_in_executor(self.executor, self._send_chunk, chunk) for chunk in chunks))
+        return [error for chunk_errors in results for error in chunk_errors]
+    
+    def close(self) -> None:
+        self.executor.shutdown()
+        for connection in self._connections:
+            with suppress(smtplib.SMTPException, OSError):
+                connection.quit()
+        self._connections.clear()
+    
+    def _send_chunk(self, messages: list[EmailMessage]) -> list[Exception | None]:
+        self._check_connection()
+        errors = []
+        for message in messages:
+            try:
+                self._get_connection().send_message(message)
+                errors.append(None)
+            except smtplib.SMTPServerDisconnected as ex:
+                self._drop_connection()
+                errors.append(ex)
+            except smtplib.SMTPException as ex:  # Reply to this message (e.g. refused recipient), connection is reset and kept
+                errors.append(ex)
+            except OSError as ex:  # `SMTPException` is `OSError` too, so socket errors are caught last
+                self._drop_connection()
+                errors.append(ex)
+        return errors
+    
+    def _get_connection(self) -> smtplib.SMTP:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT, timeout=settings.SMTP_TIMEOUT)
+            try:
+                if settings.SMTP_STARTTLS:
+                    connection.starttls()
+                if settings.SMTP_USERNAME:
+                    connection.login(settings.SMTP_USERNAME, settings.SMTP_PASSWORD)
+            except (smtplib.SMTPException, OSError):
+                connection.close()
+                raise
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+    
+    def _check_connection(self) -> None:
+        '''Server closes idle connections, so kept connection is checked before batch'''
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            return
+        try:
+            if connection.noop()[0] == 250:
+                return
+        except (smtplib.SMTPException, OSError):
+            pass
+        self._drop_connection()
+    
+    def _drop_connection(self) -> None:
+        connection = self._local.__dict__.pop('connection', None)
+        if connection is None:
+            return
+        with self._lock:
+            self._connections.remove(connection)
+        with suppress(smtplib.SMTPException, OSError):
+            connection.close()
+
+
+class MailWorker:
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession], smtp_pool: SMTPPool):
+        self.session_factory = session_factory
+        self.smtp_pool = smtp_pool
+        self.logger = logging.getLogger('mail_logger')
+    
+    async def process_batch(self) -> int:
+        '''
+        Sends up to `MAIL_BATCH_SIZE` due mails. Sent mail is deleted, failed one is retried with backoff
+        and moved into dead letters after `MAIL_MAX_ATTEMPTS` attempts or permanent error.
+        Returns:
+            int (Claimed mails count)
+        '''
+        async with self.session_factory() as session:
+            outbox = MailOutbox(session)
+            mails = await outbox.claim(settings.MAIL_BATCH_SIZE)
+            if not mails:
+                return 0
+            
+            sendable, messages = [], []
+            for mail in mails:
+                try:
+                    messages.append(build_message(MailTaskSchema.model_validate(mail.payload)))
+                    sendable.append(mail)
+                except ValidationError as ex:
+                    outbox.bury(mail, repr(ex))
+                    self.logger.error('Mail %s has invalid payload and is moved into dead letters', mail.id)
+            
+            errors = await self.smtp_pool.send(messages) if messages else []
+            sent = []
+            for mail, error in zip(sendable, errors):
+                if error is None:
+                    sent.append(mail.id)
+                elif is_permanent(error) or mail.attempts + 1 >= settings.MAIL_MAX_ATTEMPTS:
+                    outbox.bury(mail, repr(error))
+                    self.logger.error('Mail %s is moved into dead letters: %r', mail.id, error)
+                else:
+                    outbox.retry(mail, repr(error), retry_delay(mail.attempts + 1))
+                    self.logger.warning('Mail %s is not sent (attempt %s): %r', mail.id, mail.attempts, error)
+            
+            await outbox.complete(sent)
+            await session.commit()
+            self.logger.info('Sent %s of %s mails', len(sent), len(mails))
+            return len(mails)
+    
+    async def run(self, stop: asyncio.Event) -> None:
+        '''Processes batches until `stop` is set, outbox is polled only when it is drained'''
+        while not stop.is_set():
+            try:
+                claimed = await self.process_batch()
+            except Exception as ex:  # E.g. database is not available, batch is retried after its locks are released
+                self.logger.error('Mail batch failed: %r', ex)
+                claimed = 0
+            
+            if claimed < settings.MAIL_BATCH_SIZE:
+                with suppress(TimeoutError):
+                    await asyncio.wait_for(stop.wait(), settings.MAIL_POLL_INTERVAL)
+
+
+async def main():
+    setup_logging()
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+    
+    smtp_pool = SMTPPool(settings.SMTP_POOL_SIZE)
+    try:
+        await MailWorker(SessionFactory, smtp_pool).run(stop)
+    finally:
+        smtp_pool.close()
+        await engine.dispose()
+        shutdown_logging()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -1,3 +1,2 @@
-from src.auth.jwt.models import BlackListTokenModel
-from src.auth.jwt.schemas import JwtTokenSchema, TokenPair, TokenPairResponse, TokenRequest, BlackListToken
+from src.auth.jwt.schemas import JwtTokenSchema, TokenPair, TokenPairResponse, TokenRequest
 from src.auth.jwt.constants import *
@@ -0,0 +1,81 @@
+import math
+import time
+import hashlib
+from src.redis_client.client import RedisClient
+from src.config import settings
+
+# Sorted set of all revoked token ids scored by token expiration (used for bloom filter rebuilds)
+REVOKED_INDEX_KEY = 'revoked_tokens'
+
+
+def revoked_key(jti: str) -> str:
+    return f'revoked:{jti}'
+
+
+class BloomFilter:
+    '''Probabilistic set: `in` can give false positives, but never false negatives'''
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+    
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8]), int.from_bytes(digest[8:])
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+    
+    def add(self, item: str) -> None:
+        for pos in self._positions(item):
+            self.bits[pos // 8] |= 1 << (pos % 8)
+    
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos // 8] & (1 << (pos % 8)) for pos in self._positions(item))
+
+
+class TokenRevocationStore:
+    '''
+    Revoked token ids stored in redis with TTL equal to token remaining lifetime,
+    so store is cleaned up by redis itself.
+    Optional in-process bloom filter (`JWT_REVOCATION_BLOOM_ENABLED`) answers "not revoked"
+    without redis round-trip. It is rebuilt from redis every `JWT_REVOCATION_BLOOM_REFRESH_SECONDS`,
+    so revocations made by other workers can be missed for up to this interval.
+    '''
+    bloom: BloomFilter | None = None
+    bloom_refreshed_at: float = 0
+    
+    def __init__(self, redis_client: RedisClient):
+        self.redis_client = redis_client
+    
+    async def revoke(self, jti: str, exp: int) -> None:
+        now = int(time.time())
+        ttl = int(exp) - now
+        if ttl <= 0:
+            return  # Token is already expired
+        
+        pipe = self.redis_client.pipeline()
+        pipe.set(revoked_key(jti), 1, ex=ttl)
+        pipe.zadd(REVOKED_INDEX_KEY, {jti: exp})
+        pipe.zremrangebyscore(REVOKED_INDEX_KEY, '-inf', now)
+        await pipe.execute()
+        
+        if TokenRevocationStore.bloom is not None:
+            TokenRevocationStore.bloom.add(jti)
+    
+    async def is_revoked(self, jti: str) -> bool:
+        if settings.JWT_REVOCATION_BLOOM_ENABLED:
+            await self._refresh_bloom()
+            bloom = TokenRevocationStore.bloom
+            if bloom is not None and jti not in bloom:
+                return False
+        return await self.redis_client.exists(revoked_key(jti)) > 0
+    
+    async def _refresh_bloom(self) -> None:
+        now = time.monotonic()
+        if now - TokenRevocationStore.bloom_refreshed_at < settings.JWT_REVOCATION_BLOOM_REFRESH_SECONDS:
+            return
+        TokenRevocationStore.bloom_refreshed_at = now  # Concurrent requests use current filter meanwhile
+        
+        bloom = BloomFilter(settings.JWT_REVOCATION_BLOOM_CAPACITY, settings.JWT_REVOCATION_BLOOM_ERROR_RATE)
+        for jti in await self.redis_client.zrangebyscore(REVOKED_INDEX_KEY, int(time.time()), '+inf'):
+            bloom.add(jti.decode())
+        TokenRevocationStore.bloom = bloom
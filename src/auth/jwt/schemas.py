@@ -1,5 +1,5 @@
 from datetime import datetime
-from pydantic import BaseModel, ConfigDict, UUID4
+from pydantic import BaseModel
 
 
 class JwtTokenSchema(BaseModel):
@@ -20,11 +20,3 @@ class TokenPairResponse(BaseModel):
 
 class TokenRequest(BaseModel):
     token: str
-
-
-class BlackListToken(BaseModel):
-    model_config = ConfigDict(from_attributes=True)  # Same as "orm_mode = True"
-    
-    id: UUID4
-    expire: datetime
-    created_at: datetime
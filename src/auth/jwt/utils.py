@@ -4,9 +4,9 @@ import jwt
 from jwt.exceptions import PyJWTError
 from src.auth.users import User
 from src.auth.jwt import JwtTokenSchema, TokenPair
-from src.dependencies import SessionDep
+from src.auth.jwt.revocation import TokenRevocationStore
 from src.auth.exceptions import AuthFailedException
-from src.auth.jwt import BlackListTokenModel, SUB, EXP, IAT, JTI
+from src.auth.jwt import SUB, EXP, IAT, JTI
 from src.config import settings
 
 
@@ -47,17 +47,23 @@ def create_token_pair(user: User) -> TokenPair:
     )
 
 
-async def decode_access_token(session: SessionDep, token: str):
+def decode_token(token: str) -> dict:
+    '''Checks token signature and expiration without revocation lookup'''
     try:
-        payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGHORITM])
-        
-        black_list_token = await session.get(BlackListTokenModel, payload[JTI])
-        if black_list_token:
-            raise PyJWTError('Token is blacklisted')
-        
-        return payload
+        return jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGHORITM])
     except PyJWTError:
         raise AuthFailedException()
+
+
+async def verify_not_revoked(revocation_store: TokenRevocationStore, payload: dict) -> None:
+    if await revocation_store.is_revoked(payload[JTI]):
+        raise AuthFailedException()
+
+
+async def decode_access_token(revocation_store: TokenRevocationStore, token: str):
+    payload = decode_token(token)
+    await verify_not_revoked(revocation_store, payload)
+    return payload
     
     
 async def refresh_token_state(token: str) -> str:
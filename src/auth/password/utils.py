@@ -1,7 +1,42 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 from passlib.context import CryptContext
+from src.exceptions import ServiceUnavailable
+from src.metrics import password_hash_duration
+from src.profiling import record_span
+from src.config import settings
 
 pwd_context = CryptContext(schemes=['bcrypt'], deprecated='auto')
 
+# bcrypt releases GIL, so hashing in threads does not block event loop and runs in parallel
+hash_executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix='password-hash')
+
+
+class HashPoolStats:
+    '''Saturation counters of password hashing pool (updated from event loop only)'''
+    def __init__(self):
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+        self.run_seconds = 0.0
+    
+    def as_dict(self) -> dict:
+        return {
+            'workers': settings.PASSWORD_HASH_WORKERS,
+            'queue_limit': settings.PASSWORD_HASH_QUEUE_LIMIT,
+            'running': min(self.pending, settings.PASSWORD_HASH_WORKERS),
+            'queued': max(self.pending - settings.PASSWORD_HASH_WORKERS, 0),
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'wait_seconds': self.wait_seconds,
+            'run_seconds': self.run_seconds,
+        }
+
+
+hash_pool_stats = HashPoolStats()
+
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
@@ -9,3 +44,38 @@ def get_password_hash(password: str) -> str:
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
+
+
+def _timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, started, time.perf_counter()
+
+
+async def _run_in_hash_pool(func, *args):
+    if hash_pool_stats.pending >= settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_QUEUE_LIMIT:
+        hash_pool_stats.rejected += 1
+        raise ServiceUnavailable('Too many authentication requests, try again later')
+    
+    hash_pool_stats.pending += 1
+    submitted = time.perf_counter()
+    try:
+        loop = asyncio.get_running_loop()
+        result, started, finished = await loop.run_in_executor(hash_executor, _timed, func, *args)
+    finally:
+        hash_pool_stats.pending -= 1
+    
+    hash_pool_stats.completed += 1
+    hash_pool_stats.wait_seconds += started - submitted
+    hash_pool_stats.run_seconds += finished - started
+    password_hash_duration.observe(finished - started, func.__name__)
+    record_span('bcrypt', func.__name__, started, finished - started)
+    return result
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_in_hash_pool(get_password_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_in_hash_pool(verify_password, plain_password, hashed_password)
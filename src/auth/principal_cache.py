@@ -0,0 +1,55 @@
+from src.auth.users import User
+from src.local_cache import LocalTTLCache
+from src.redis_client.client import RedisClient
+from src.config import settings
+
+
+def principal_key(user_id) -> str:
+    return f'principal:{user_id}'
+
+
+class PrincipalCache:
+    '''
+    Two level cache of authenticated users by `(user id, token jti)`:
+    in-process LRU with short TTL in front of redis hash per user (field per token jti).
+    Entries are only read after token signature and expiration were checked,
+    and must be invalidated when user or token state changes.
+    Invalidation drops local entries only in current worker,
+    so other workers can serve stale principal for up to `PRINCIPAL_CACHE_LOCAL_TTL` seconds.
+    '''
+    local: LocalTTLCache[tuple[str, str], User] = LocalTTLCache(
+        maxsize=settings.PRINCIPAL_CACHE_LOCAL_SIZE, 
+        ttl=settings.PRINCIPAL_CACHE_LOCAL_TTL
+    )
+    
+    def __init__(self, redis_client: RedisClient):
+        self.redis_client = redis_client
+    
+    async def get(self, user_id: str, jti: str) -> User | None:
+        user = self.local.get((user_id, jti))
+        if user:
+            return user
+        
+        cached = await self.redis_client.hget(principal_key(user_id), jti)
+        if cached is None:
+            return None
+        user = User.model_validate_json(cached)
+        self.local.set((user_id, jti), user)
+        return user
+    
+    async def set(self, user: User, jti: str) -> None:
+        key = principal_key(user.id)
+        pipe = self.redis_client.pipeline()
+        pipe.hset(key, jti, user.model_dump_json())
+        pipe.expire(key, settings.PRINCIPAL_CACHE_TTL)
+        await pipe.execute()
+        self.local.set((str(user.id), jti), user)
+    
+    async def invalidate_user(self, user_id) -> None:
+        '''Drops cached principals of all user tokens'''
+        await self.redis_client.delete(principal_key(user_id))
+        self.local.delete_where(lambda key: key[0] == str(user_id))
+    
+    async def invalidate_token(self, user_id, jti: str) -> None:
+        await self.redis_client.hdel(principal_key(user_id), jti)
+        self.local.delete((str(user_id), jti))
@@ -1,22 +1,21 @@
 from uuid import UUID
-from fastapi import APIRouter, BackgroundTasks
-from fastapi_cache.decorator import cache
+from fastapi import APIRouter
 from src.auth.users import User, UserRegister, UserLogin
 from src.auth.dependencies import AuthServiceDep
 from src.auth.jwt import TokenPairResponse, TokenRequest
 from src.auth.password import ForgotPasswordSchema, PasswordResetSchema, PasswordUpdateSchema
-from src.auth.email.tasks import user_mail_event
 from src.schemas import SuccessResponse
 from src.decorators import default_router_exceptions
+from src.cache import cache, tagged_key_builder
+from src.config import settings
 
 router = APIRouter(prefix='/api/auth', tags=['auth'])
 
 
 @router.post('/register', response_model=User)
 @default_router_exceptions
-async def register(data: UserRegister, bg_task: BackgroundTasks, auth_service: AuthServiceDep):
-    user, mail_task_data = await auth_service.register(data) 
-    bg_task.add_task(user_mail_event, mail_task_data)
+async def register(data: UserRegister, auth_service: AuthServiceDep):
+    user = await auth_service.register(data) 
     return user
 
 
@@ -35,7 +34,7 @@ async def logout(data: TokenRequest, auth_service: AuthServiceDep):
 
 
 @router.get('/users/{user_id}', response_model=User)
-@cache(expire=60)
+@cache(expire=settings.CACHE_EXPIRE, key_builder=tagged_key_builder('user:{user_id}'))
 @default_router_exceptions
 async def get_user(user_id: UUID, auth_service: AuthServiceDep):
     user = await auth_service.get(user_id) 
@@ -58,9 +57,8 @@ async def verify(token: str, auth_service: AuthServiceDep):
 
 @router.post('/forgot_password', response_model=SuccessResponse)
 @default_router_exceptions
-async def forgot_password(data: ForgotPasswordSchema, bg_task: BackgroundTasks, auth_service: AuthServiceDep):
-    mail_task_data = await auth_service.forgot_password(data)
-    bg_task.add_task(user_mail_event, mail_task_data)
+async def forgot_password(data: ForgotPasswordSchema, auth_service: AuthServiceDep):
+    await auth_service.forgot_password(data)
     return SuccessResponse(message='Email with reset token successfully sended')
 
 
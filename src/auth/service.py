@@ -1,12 +1,15 @@
-from datetime import datetime, UTC
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.auth.users import User, UserRegister, UserLogin, UserModel
 from src.auth.jwt.utils import mail_token, create_token_pair, decode_access_token, refresh_token_state
-from src.auth.jwt import TokenPairResponse, BlackListTokenModel, SUB, JTI, EXP
-from src.auth.password.utils import get_password_hash, verify_password
+from src.auth.jwt import TokenPairResponse, SUB, JTI, EXP
+from src.auth.jwt.revocation import TokenRevocationStore
+from src.auth.password.utils import get_password_hash_async, verify_password_async
 from src.auth.password import ForgotPasswordSchema, PasswordResetSchema, PasswordUpdateSchema
 from src.auth.email import MailTaskSchema, MailBodySchema
+from src.auth.email.outbox import MailOutbox
+from src.auth.principal_cache import PrincipalCache
+from src.cache import invalidate_tags
 from src.auth.exceptions import (
     EmailAlreadyRegisteredException, IncorrectEmailOrPasswordException, EmailNotVerifiedException,
     UserNotFoundException, OldPasswordIsNotCorrect
@@ -14,31 +17,41 @@ from src.auth.exceptions import (
 
 
 class AuthService:
-    def __init__(self, session: AsyncSession):
+    def __init__(
+        self, 
+        session: AsyncSession, 
+        principal_cache: PrincipalCache, 
+        revocation_store: TokenRevocationStore, 
+        mail_outbox: MailOutbox
+    ):
         self.session = session
+        self.principal_cache = principal_cache
+        self.revocation_store = revocation_store
+        self.mail_outbox = mail_outbox
     
-    async def register(self, data: UserRegister) -> tuple[User, MailTaskSchema]:
+    async def register(self, data: UserRegister) -> User:
         user = await UserModel.find_by_email(self.session, data.email)
         if user:
             raise EmailAlreadyRegisteredException()
         
         user_data = data.model_dump(exclude={'confirm_password'})
-        user_data['hashed_password'] = get_password_hash(user_data['password'].get_secret_value())
+        user_data['hashed_password'] = await get_password_hash_async(user_data['password'].get_secret_value())
         user_data.pop('password', None)
         
         user = UserModel(**user_data)
-        await user.save(self.session)
+        self.session.add(user)
+        await self.session.flush()  # User id is needed for token, user and mail are committed together
         
         user_schema = User.model_validate(user)
         verify_token = mail_token(user_schema)
         
-        mail_task_data = MailTaskSchema(
+        self.mail_outbox.add(MailTaskSchema(
             user=user_schema,
-            body=MailBodySchema(type='verify', token=verify_token),
-            token=verify_token
-        )
+            body=MailBodySchema(type='verify', token=verify_token)
+        ))
+        await self.session.commit()
         
-        return user_schema, mail_task_data
+        return user_schema
     
     async def login(self, data: UserLogin) -> TokenPairResponse:
         user = await UserModel.authenticate(self.session, data.email, data.password.get_secret_value())
@@ -56,9 +69,9 @@ class AuthService:
         )
     
     async def logout(self, token: str) -> None:
-        payload = await decode_access_token(self.session, token)
-        black_listed = BlackListTokenModel(id=payload[JTI], expire=datetime.fromtimestamp(payload[EXP]))
-        await black_listed.save(self.session)
+        payload = await decode_access_token(self.revocation_store, token)
+        await self.revocation_store.revoke(payload[JTI], payload[EXP])
+        await self.principal_cache.invalidate_token(payload[SUB], payload[JTI])
     
     async def get(self, user_id: UUID)  -> User:
         user = await self.session.get(UserModel, user_id)
@@ -75,15 +88,17 @@ class AuthService:
         )
     
     async def verify(self, token: str) -> None:
-        payload = await decode_access_token(self.session, token)
+        payload = await decode_access_token(self.revocation_store, token)
         user = await self.session.get(UserModel, payload[SUB])
         if not user:
             raise UserNotFoundException()
         
         user.is_verified = True
         await user.save(self.session)
+        await self.principal_cache.invalidate_user(user.id)
+        await invalidate_tags(f'user:{user.id}')
     
-    async def forgot_password(self, data: ForgotPasswordSchema) -> MailTaskSchema:
+    async def forgot_password(self, data: ForgotPasswordSchema) -> None:
         user = await UserModel.find_by_email(self.session, data.email)
         if not user:
             raise UserNotFoundException()
@@ -91,30 +106,32 @@ class AuthService:
         user_schema = User.model_validate(user)
         reset_token = mail_token(user)
         
-        mail_task_data = MailTaskSchema(
+        self.mail_outbox.add(MailTaskSchema(
             user=user_schema,
             body=MailBodySchema(type='password-reset', token=reset_token)
-        )
-        return mail_task_data
+        ))
+        await self.session.commit()
     
     async def reset_password(self, token: str, data: PasswordResetSchema) -> None:
-        payload = await decode_access_token(self.session, token)
+        payload = await decode_access_token(self.revocation_store, token)
         user = await self.session.get(UserModel, payload[SUB])
         if not user:
             raise UserNotFoundException()
         
-        user.hashed_password = get_password_hash(data.password.get_secret_value())
+        user.hashed_password = await get_password_hash_async(data.password.get_secret_value())
         await user.save(self.session)
+        await self.principal_cache.invalidate_user(user.id)
     
     async def password_update(self, token: str, data: PasswordUpdateSchema) -> None:
-        payload = await decode_access_token(self.session, token)
+        payload = await decode_access_token(self.revocation_store, token)
         user = await self.session.get(UserModel, payload[SUB])
         if not user:
             raise UserNotFoundException()
         
-        if not verify_password(data.old_password.get_secret_value(), user.hashed_password):
+        if not await verify_password_async(data.old_password.get_secret_value(), user.hashed_password):
             raise OldPasswordIsNotCorrect()
         
-        user.hashed_password = get_password_hash(data.password)
+        user.hashed_password = await get_password_hash_async(data.password.get_secret_value())
         await user.save(self.session)
+        await self.principal_cache.invalidate_user(user.id)
         
\ No newline at end of file
@@ -1,2 +1,2 @@
 from src.auth.users.models import UserModel
-from src.auth.users.schemas import UserRegister, UserLogin, User
+from src.auth.users.schemas import UserRegister, UserLogin, User, UserSummary
@@ -4,7 +4,7 @@ from sqlalchemy import select, text as sa_text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.database import Base
-from src.auth.password.utils import verify_password
+from src.auth.password.utils import verify_password_async
 
 
 class UserModel(Base):
@@ -14,12 +14,13 @@ class UserModel(Base):
     username: Mapped[str] = mapped_column(unique=True, index=True)
     hashed_password: Mapped[str]
     is_verified: Mapped[bool] = mapped_column(server_default=sa_text('FALSE'))
+    followers_count: Mapped[int] = mapped_column(server_default=sa_text('0'))
     updated_at: Mapped[datetime] = mapped_column(
         server_default=sa_text('TIMEZONE(\'UTC\', NOW())'),
         onupdate=sa_text('TIMEZONE(\'UTC\', NOW())')
     )
     
-    posts = relationship('PostModel', back_populates='author', lazy='selectin', passive_deletes=True)
+    posts = relationship('PostModel', back_populates='author', lazy='raise', passive_deletes=True)  # Never loaded implicitly
     
     @classmethod
     async def find_by_email(cls, session: AsyncSession, email: str):
@@ -36,6 +37,6 @@ class UserModel(Base):
     @classmethod
     async def authenticate(cls, session: AsyncSession, email: str, password: str) -> Self:
         user = await cls.find_by_email(session=session, email=email)
-        if not user or not verify_password(password, user.hashed_password):
+        if not user or not await verify_password_async(password, user.hashed_password):
             return False
         return user
@@ -33,3 +33,10 @@ class User(UserBase):
     is_verified: bool
     created_at: datetime
     updated_at: datetime
+
+
+class UserSummary(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    
+    id: UUID4
+    username: str
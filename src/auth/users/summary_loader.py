@@ -0,0 +1,57 @@
+from uuid import UUID
+from typing import Iterable
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.auth.users import UserModel, UserSummary
+from src.redis_client.client import RedisClient
+from src.config import settings
+
+
+def user_summary_key(user_id: UUID) -> str:
+    return f'user_summary:{user_id}'
+
+
+class UserSummaryLoader:
+    '''
+    Request-scoped batch loader of users summaries (DataLoader style).
+    All ids requested at once are resolved with one redis MGET, and ids missing in redis
+    with one `IN` query, results are kept for the rest of request.
+    '''
+    def __init__(self, session: AsyncSession, redis_client: RedisClient):
+        self.session = session
+        self.redis_client = redis_client
+        self.loaded: dict[UUID, UserSummary | None] = {}
+    
+    async def load_many(self, user_ids: Iterable[UUID]) -> dict[UUID, UserSummary]:
+        '''
+        Loads summaries of users
+        Args:
+            user_ids: Users ids (can repeat)
+        Returns:
+            dict[UUID, UserSummary] (Summaries by user id, not existing users are omitted)
+        '''
+        user_ids = list(dict.fromkeys(user_ids))
+        missing = [user_id for user_id in user_ids if user_id not in self.loaded]
+        if missing:
+            await self._load(missing)
+        return {user_id: self.loaded[user_id] for user_id in user_ids if self.loaded[user_id]}
+    
+    async def _load(self, user_ids: list[UUID]) -> None:
+        cached = await self.redis_client.mget([user_summary_key(user_id) for user_id in user_ids])
+        not_cached = []
+        for user_id, value in zip(user_ids, cached):
+            if value is None:
+                not_cached.append(user_id)
+            else:
+                self.loaded[user_id] = UserSummary.model_validate_json(value)
+        if not not_cached:
+            return
+        
+        query = select(UserModel.id, UserModel.username).where(UserModel.id.in_(not_cached))
+        fetched = {row.id: UserSummary.model_validate(row) for row in await self.session.execute(query)}
+        await self.redis_client.setex_many(
+            {user_summary_key(user_id): summary.model_dump_json() for user_id, summary in fetched.items()},
+            settings.USER_SUMMARY_CACHE_TTL
+        )
+        for user_id in not_cached:
+            self.loaded[user_id] = fetched.get(user_id)
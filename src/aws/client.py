@@ -1,8 +1,14 @@
+import asyncio
 import logging
-from contextlib import asynccontextmanager
+import time
+from contextlib import asynccontextmanager, AsyncExitStack
 from aiobotocore.session import get_session
+from aiobotocore.config import AioConfig
+from botocore.exceptions import ClientError
 from fastapi import UploadFile
 from src.aws.utils import generate_object_name
+from src.metrics import s3_upload_duration, s3_upload_bytes
+from src.profiling import trace_span, record_span
 from src.config import settings
 
 
@@ -17,25 +23,236 @@ class S3Client:
         self.config = {
             'aws_access_key_id': access_key,
             'aws_secret_access_key': secret_key,
-            'endpoint_url': endpoint_url
+            'endpoint_url': endpoint_url,
+            'config': AioConfig(
+                max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS,
+                tcp_keepalive=True,
+                connector_args={'keepalive_timeout': settings.S3_KEEPALIVE_TIMEOUT}
+            )
         }
         self.bucket_name = bucket_name
         self.session = get_session()
+        self._exit_stack: AsyncExitStack | None = None
+        self._client = None
+    
+    async def start(self) -> None:
+        '''Creates long-lived client with connection pool, which is shared by all `get_client` calls'''
+        self._exit_stack = AsyncExitStack()
+        self._client = await self._exit_stack.enter_async_context(self.session.create_client('s3', **self.config))
+    
+    async def close(self) -> None:
+        if self._exit_stack:
+            await self._exit_stack.aclose()
+        self._exit_stack = None
+        self._client = None
     
     @asynccontextmanager
     async def get_client(self):
+        # Started client is reused, otherwise (e.g. in scripts) client is created for this call only
+        if self._client:
+            yield self._client
+            return
         async with self.session.create_client('s3', **self.config) as client:
             yield client
     
-    async def upload_file(self, file: UploadFile) -> str:
-        object_name = generate_object_name(file.filename)
+    def object_name(self, url: str) -> str:
+        '''Key of object from url returned by upload methods (`<bucket>/<key>`)'''
+        return url.removeprefix(f'{self.bucket_name}/')
+    
+    async def upload_file(self, file: UploadFile, object_name: str | None = None) -> str:
+        '''
+        Uploads file with single `put_object` if it is smaller than `S3_MULTIPART_THRESHOLD`,
+        otherwise streams it by parts with multipart upload (random key is generated if `object_name` is not passed)
+        '''
+        object_name = object_name or generate_object_name(file.filename)
+        started = time.perf_counter()
+        async with self.get_client() as client:
+            if file.size is not None and file.size < settings.S3_MULTIPART_THRESHOLD:
+                await client.put_object(
+                    Bucket=self.bucket_name,
+                    Key=object_name,
+                    Body=file.file,
+                    ContentType=file.content_type
+                )
+                uploaded = file.size
+            else:
+                uploaded = await self._multipart_upload(client, file, object_name)
+            
+        elapsed = time.perf_counter() - started
+        s3_upload_duration.observe(elapsed)
+        s3_upload_bytes.inc(uploaded)
+        record_span('s3', f'upload {object_name} ({uploaded} bytes)', started, elapsed)
+        logging.getLogger('aws_logger').info(f'Upload file with name: {object_name}')
+        return f'{self.bucket_name}/{object_name}'
+    
+    async def upload_bytes(self, object_name: str, body: bytes, content_type: str) -> str:
+        '''Uploads generated file (e.g. image variant) with single `put_object`'''
+        started = time.perf_counter()
+        async with self.get_client() as client:
+            await client.put_object(Bucket=self.bucket_name, Key=object_name, Body=body, ContentType=content_type)
+        
+        elapsed = time.perf_counter() - started
+        s3_upload_duration.observe(elapsed)
+        s3_upload_bytes.inc(len(body))
+        record_span('s3', f'upload {object_name} ({len(body)} bytes)', started, elapsed)
+        return f'{self.bucket_name}/{object_name}'
+    
+    async def delete_object(self, object_name: str) -> None:
+        async with self.get_client() as client:
+            await client.delete_object(Bucket=self.bucket_name, Key=object_name)
+        logging.getLogger('aws_logger').info(f'Delete file with name: {object_name}')
+    
+    async def copy_object(self, source_object_name: str, object_name: str) -> str:
+        '''Copies object inside bucket (server-side, bytes are not downloaded)'''
+        async with self.get_client() as client:
+            await client.copy_object(
+                Bucket=self.bucket_name, 
+                Key=object_name, 
+                CopySource={'Bucket': self.bucket_name, 'Key': source_object_name}
+            )
+        logging.getLogger('aws_logger').info(f'Copy file {source_object_name} to {object_name}')
+        return f'{self.bucket_name}/{object_name}'
+    
+    async def delete_prefix(self, prefix: str) -> None:
+        '''Deletes all objects which keys start with `prefix` (listed and deleted by pages of 1000 keys)'''
+        async with self.get_client() as client:
+            paginator = client.get_paginator('list_objects_v2')
+            async for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+                keys = [{'Key': item['Key']} for item in page.get('Contents', [])]
+                if keys:
+                    await client.delete_objects(Bucket=self.bucket_name, Delete={'Objects': keys, 'Quiet': True})
+        logging.getLogger('aws_logger').info(f'Delete files with prefix: {prefix}')
+    
+    async def generate_upload_post(self, object_name: str, content_type: str, max_size: int) -> dict:
+        '''
+        Presigns POST policy, which lets client upload file with `object_name` key straight into bucket.
+        Storage rejects file with other content type or larger than `max_size` bytes.
+        Returns:
+            dict (`url` and form `fields`, which must be sent with file)
+        '''
         async with self.get_client() as client:
-            await client.put_object(
+            return await client.generate_presigned_post(
                 Bucket=self.bucket_name,
                 Key=object_name,
-                Body=file.file
+                Fields={'Content-Type': content_type},
+                Conditions=[{'Content-Type': content_type}, ['content-length-range', 1, max_size]],
+                ExpiresIn=settings.S3_PRESIGNED_EXPIRE
             )
+    
+    async def put_expiration_rule(self, rule_id: str, prefix: str, days: int) -> None:
+        '''
+        Adds (or replaces) bucket lifecycle rule, which deletes objects with `prefix` and aborts their
+        incomplete multipart uploads `days` days after creation. Other rules of bucket are kept.
+        '''
+        async with self.get_client() as client:
+            try:
+                response = await client.get_bucket_lifecycle_configuration(Bucket=self.bucket_name)
+                rules = [rule for rule in response['Rules'] if rule.get('ID') != rule_id]
+            except ClientError as ex:
+                if ex.response['Error']['Code'] != 'NoSuchLifecycleConfiguration':
+                    raise
+                rules = []
+            rules.append({
+                'ID': rule_id,
+                'Filter': {'Prefix': prefix},
+                'Status': 'Enabled',
+                'Expiration': {'Days': days},
+                'AbortIncompleteMultipartUpload': {'DaysAfterInitiation': days}
+            })
+            await client.put_bucket_lifecycle_configuration(
+                Bucket=self.bucket_name, 
+                LifecycleConfiguration={'Rules': rules}
+            )
+    
+    async def head_object(self, object_name: str) -> dict | None:
+        '''Returns object metadata (`ContentLength`, `ContentType`, ...) or None if object does not exist'''
+        async with self.get_client() as client:
+            try:
+                return await client.head_object(Bucket=self.bucket_name, Key=object_name)
+            except ClientError as ex:
+                if ex.response['Error']['Code'] in ('404', 'NoSuchKey'):
+                    return None
+                raise
+    
+    async def download_bytes(self, object_name: str) -> bytes:
+        with trace_span('s3', f'download {object_name}'):
+            async with self.get_client() as client:
+                response = await client.get_object(Bucket=self.bucket_name, Key=object_name)
+                async with response['Body'] as stream:
+                    return await stream.read()
+    
+    async def _multipart_upload(self, client, file: UploadFile, object_name: str) -> int:
+        '''
+        Reads file by `S3_MULTIPART_PART_SIZE` parts and uploads up to `S3_MULTIPART_CONCURRENCY` parts at once,
+        so memory usage is bounded by window size. Failed part is retried by botocore alone,
+        any unrecoverable error aborts the upload, so no orphan parts are left in bucket.
+        Returns uploaded bytes count.
+        '''
+        chunk = await file.read(settings.S3_MULTIPART_PART_SIZE)
+        if len(chunk) < settings.S3_MULTIPART_PART_SIZE:  # Whole file fits in one part
+            await client.put_object(Bucket=self.bucket_name, Key=object_name, Body=chunk, ContentType=file.content_type)
+            return len(chunk)
+        
+        upload = await client.create_multipart_upload(
+            Bucket=self.bucket_name, 
+            Key=object_name, 
+            ContentType=file.content_type
+        )
+        upload_id = upload['UploadId']
+        window = asyncio.Semaphore(settings.S3_MULTIPART_CONCURRENCY)
+        tasks: list[asyncio.Task] = []
+        uploaded = 0
+        
+        try:
+            part_number = 0
+            while chunk:
+                # Stop reading if one of already started parts failed
+                for task in tasks:
+                    if task.done() and task.exception():
+                        raise task.exception()
+                
+                part_number += 1
+                await window.acquire()
+                tasks.append(asyncio.create_task(
+                    self._upload_part(client, object_name, upload_id, part_number, chunk, window)
+                ))
+                uploaded += len(chunk)
+                chunk = await file.read(settings.S3_MULTIPART_PART_SIZE)
             
-        logging.getLogger('aws_logger').info(f'Upload file with name: {object_name}')
-        return f'{self.bucket_name}/{object_name}'
-    
\ No newline at end of file
+            parts = await asyncio.gather(*tasks)
+            await client.complete_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=object_name,
+                UploadId=upload_id,
+                MultipartUpload={'Parts': parts}
+            )
+            return uploaded
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await client.abort_multipart_upload(Bucket=self.bucket_name, Key=object_name, UploadId=upload_id)
+            logging.getLogger('aws_logger').error(f'Multipart upload aborted for file with name: {object_name}')
+            raise
+    
+    async def _upload_part(
+        self, 
+        client, 
+        object_name: str, 
+        upload_id: str, 
+        part_number: int, 
+        body: bytes, 
+        window: asyncio.Semaphore
+    ) -> dict:
+        try:
+            with trace_span('s3', f'upload part {part_number} of {object_name}'):
+                response = await client.upload_part(
+                    Bucket=self.bucket_name,
+                    Key=object_name,
+                    UploadId=upload_id,
+                    PartNumber=part_number,
+                    Body=body
+                )
+            return {'PartNumber': part_number, 'ETag': response['ETag']}
+        finally:
+            window.release()
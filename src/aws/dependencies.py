@@ -1,10 +1,20 @@
 from typing import Annotated
-from fastapi import Depends
+from fastapi import Depends, Request
 from src.aws.client import S3Client
+from src.aws.storage import ContentStorage
+from src.dependencies import SessionDep
 
 
-def get_s3_client():
-    return S3Client()
+def get_s3_client(request: Request) -> S3Client:
+    '''Returns app scoped client created in lifespan'''
+    return request.app.state.s3_client
 
 
 S3ClientDep = Annotated[S3Client, Depends(get_s3_client)]
+
+
+def get_content_storage(session: SessionDep, client: S3ClientDep) -> ContentStorage:
+    return ContentStorage(session, client)
+
+
+ContentStorageDep = Annotated[ContentStorage, Depends(get_content_storage)]
@@ -0,0 +1,16 @@
+from datetime import datetime
+from sqlalchemy import BigInteger
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+from src.database import Base
+
+
+class StoredObjectModel(Base):
+    '''Content-addressed object in bucket, shared by all posts with the same image'''
+    __tablename__ = 'stored_object'
+    
+    key: Mapped[str] = mapped_column(unique=True, index=True)
+    size: Mapped[int] = mapped_column(BigInteger)
+    ref_count: Mapped[int]
+    variants: Mapped[dict | None] = mapped_column(JSONB)  # Variants derived from object, shared by its posts
+    pending_since: Mapped[datetime | None]  # Upload started and not referenced yet (None once object is referenced)
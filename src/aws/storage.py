@@ -0,0 +1,279 @@
+import asyncio
+import hashlib
+import logging
+import mimetypes
+import time
+from datetime import timedelta
+from typing import Awaitable, Callable
+from sqlalchemy import select, update, delete, func, or_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from fastapi import UploadFile
+from src.aws.client import S3Client
+from src.aws.models import StoredObjectModel
+from src.aws.utils import derived_prefix
+from src.metrics import s3_deduplicated_uploads
+from src.profiling import record_span
+from src.config import settings
+
+CONTENT_KEY_PREFIX = 'sha256/'
+
+
+def content_key(digest: str, content_type: str) -> str:
+    '''Key of content in bucket (extension is derived from content type, so file name does not change it)'''
+    return f'{CONTENT_KEY_PREFIX}{digest}{mimetypes.guess_extension(content_type) or ""}'
+
+
+def _sha256(file) -> str:
+    file.seek(0)
+    digest = hashlib.file_digest(file, 'sha256').hexdigest()  # Read by chunks
+    file.seek(0)
+    return digest
+
+
+class ContentStorage:
+    '''
+    Stores files under keys made of their SHA-256, so the same content is stored once.
+    Rows of `stored_object` count references to objects, object (with variants derived from its key)
+    is deleted with the last reference. Copies of finalized presigned uploads are counted too (`store_copy`).
+    Changes of counters are committed by caller together with rows which reference objects,
+    released objects are deleted by `purge` after that commit. Rows left without references
+    (failed `purge`, rolled back or failed `store`) are deleted by `sweep`.
+    '''
+    def __init__(self, session: AsyncSession, client: S3Client):
+        self.session = session
+        self.client = client
+        self._released: list[str] = []
+        self._uncounted: list[str] = []  # Released objects without counter (uploads before deduplication)
+    
+    @staticmethod
+    def _unreferenced(with_pending: bool = False):
+        '''Rows which objects may be deleted (pending upload is kept till it is referenced or expires)'''
+        if with_pending:
+            return (StoredObjectModel.ref_count <= 0,)
+        expired = func.timezone('UTC', func.now()) - timedelta(seconds=settings.S3_PENDING_UPLOAD_TIMEOUT)
+        return (
+            StoredObjectModel.ref_count <= 0, 
+            or_(StoredObjectModel.pending_since.is_(None), StoredObjectModel.pending_since < expired)
+        )
+    
+    async def key_of(self, file: UploadFile) -> str:
+        '''Content key of file (file is read to hash it)'''
+        started = time.perf_counter()
+        digest = await asyncio.to_thread(_sha256, file.file)  # hashlib releases GIL on large buffers
+        record_span('hash', f'sha256 ({file.size} bytes)', started, time.perf_counter() - started)
+        return content_key(digest, file.content_type)
+    
+    async def get_variants(self, key: str) -> dict | None:
+        '''Variants of already stored content (None if content or its variants are not stored)'''
+        query = select(StoredObjectModel.variants).where(StoredObjectModel.key == key, StoredObjectModel.ref_count > 0)
+        async with AsyncSession(self.session.bind) as session:  # Caller transaction is not begun before uploads
+            return await session.scalar(query)
+    
+    async def set_variants(self, key: str, variants: dict) -> None:
+        '''Saves variants created from content, so they are reused by next `store` of it (caller must commit)'''
+        await self.session.execute(
+            update(StoredObjectModel)
+            .where(StoredObjectModel.key == key)
+            .values(variants=variants)
+        )
+    
+    async def store(
+        self, 
+        file: UploadFile, 
+        key: str | None = None, 
+        create_variants: Callable[[], Awaitable[dict]] | None = None
+    ) -> tuple[str, dict | None]:
+        '''
+        Adds reference to file content and uploads it if it is not stored yet (caller must commit).
+        New content is reserved by pending row committed at once, so upload runs outside of caller transaction
+        and only the counter update (which locks row till caller commits) is left to it.
+        Pending row, which is never referenced (upload failed or caller rolled back), is deleted by `sweep`.
+        Args:
+            file: Uploaded file
+            key: Content key of file if it is already computed by `key_of`
+            create_variants: Creates variants of content if it has none yet (called along with upload)
+        Returns:
+            tuple[str, dict | None] (File url and variants of content)
+        '''
+        key = key or await self.key_of(file)
+        while True:
+            upload, variants = await self._reserve(key, file.size)
+            uploads = []
+            if upload:
+                await file.seek(0)
+                uploads.append(self.client.upload_file(file, key))
+            create = variants is None and create_variants is not None
+            if create:
+                uploads.append(create_variants())
+            results = await asyncio.gather(*uploads)
+            
+            reference = (
+                update(StoredObjectModel)
+                .where(StoredObjectModel.key == key)
+                .values(ref_count=StoredObjectModel.ref_count + 1, pending_since=None)
+                .returning(StoredObjectModel.variants)
+            )
+            if create:
+                reference = reference.values(variants=results[-1])
+            referenced = (await self.session.execute(reference)).one_or_none()
+            if referenced is not None:
+                variants = referenced.variants
+                break
+            # Row was purged after reservation (its content was released meanwhile), so content is uploaded again
+        
+        if not upload:
+            s3_deduplicated_uploads.inc()
+        return f'{self.client.bucket_name}/{key}', variants
+    
+    async def store_copy(
+        self, 
+        key: str, 
+        size: int, 
+        copy: Callable[[], Awaitable[dict | None]]
+    ) -> tuple[str, dict | None, bool]:
+        '''
+        References object with the only owner (e.g. finalized copy of presigned upload), so it is deleted with
+        its reference (caller must commit). Object is reserved and copied outside of caller transaction like
+        content in `store`, but it is referenced once: concurrent calls for the same key wait for the first
+        reference and do not add their own. On failure caller must roll back and `discard` the object.
+        Args:
+            key: Object key
+            size: Object size
+            copy: Copies object into `key` and creates its variants (returns them if they are created)
+        Returns:
+            tuple[str, dict | None, bool] (Object url, variants, whether reference was added by this call)
+        '''
+        url = f'{self.client.bucket_name}/{key}'
+        while True:
+            reserved, variants = await self._reserve(key, size)
+            if not reserved:
+                return url, variants, False
+            variants = await copy()
+            
+            reference = (
+                update(StoredObjectModel)
+                .where(StoredObjectModel.key == key, StoredObjectModel.ref_count <= 0)
+                .values(ref_count=1, pending_since=None, variants=variants)
+                .returning(StoredObjectModel.id)
+            )
+            if (await self.session.execute(reference)).one_or_none() is not None:
+                return url, variants, True
+            
+            # Row referenced by concurrent call stays locked by failed update, so it is checked in the same transaction
+            query = select(StoredObjectModel.variants).where(StoredObjectModel.key == key)
+            referenced = (await self.session.execute(query)).one_or_none()
+            if referenced is not None:
+                return url, referenced.variants, False
+            # Discarded by failure of concurrent call, so object is reserved and copied again
+    
+    async def _reserve(self, key: str, size: int) -> tuple[bool, dict | None]:
+        '''
+        Inserts pending row for new content in own committed transaction. Row released but not purged yet
+        (its object and variants may be deleted any moment) or pending upload of other request is reserved again.
+        Returns:
+            tuple[bool, dict | None] (Whether content must be uploaded, variants of referenced content)
+        '''
+        pending_since = func.timezone('UTC', func.now())
+        reservation = (
+            insert(StoredObjectModel)
+            .values(key=key, size=size, ref_count=0, pending_since=pending_since)
+            .on_conflict_do_update(
+                index_elements=[StoredObjectModel.key], 
+                set_={'pending_since': pending_since, 'variants': None},
+                where=StoredObjectModel.ref_count <= 0
+            )
+            .returning(StoredObjectModel.id)
+        )
+        async with AsyncSession(self.session.bind) as session:
+            if (await session.execute(reservation)).one_or_none() is not None:
+                await session.commit()
+                return True, None
+            return False, await session.scalar(select(StoredObjectModel.variants).where(StoredObjectModel.key == key))
+    
+    async def release(self, url: str) -> None:
+        '''
+        Removes reference to object (caller must commit and then call `purge`).
+        Objects out of content keys without counter (uploads before deduplication) have the only owner,
+        so they are purged without it.
+        '''
+        key = self.client.object_name(url)
+        dereference = (
+            update(StoredObjectModel)
+            .where(StoredObjectModel.key == key)
+            .values(ref_count=StoredObjectModel.ref_count - 1)
+            .returning(StoredObjectModel.ref_count)
+        )
+        ref_count = (await self.session.execute(dereference)).scalar_one_or_none()
+        if ref_count is None and not key.startswith(CONTENT_KEY_PREFIX):
+            self._uncounted.append(key)
+        elif ref_count is not None and ref_count <= 0:
+            self._released.append(key)
+    
+    async def purge(self) -> None:
+        '''
+        Deletes objects (with their variants) released by committed transaction. Counter is checked again
+        under row lock, because concurrent `store` could reference the content after that commit
+        (`store` waits for the lock and uploads object again if its row is deleted).
+        Object, which is not deleted (e.g. storage is not available), is logged and its row with zero counter
+        is kept for `sweep`.
+        '''
+        uncounted, self._uncounted = self._uncounted, []
+        for key in uncounted:
+            try:
+                await self._delete(key)
+            except Exception as ex:  # Referencing rows are already deleted, so request does not fail
+                logging.getLogger('aws_logger').error(f'Object {key} is not deleted: {ex!r}')
+        
+        keys, self._released = self._released, []
+        for key in keys:
+            await self._purge(key)
+    
+    async def discard(self, key: str) -> None:
+        '''Deletes object reserved by failed `store_copy` (caller must roll back first), unless it is referenced'''
+        await self._purge(key, with_pending=True)
+    
+    async def _purge(self, key: str, with_pending: bool = False) -> None:
+        try:
+            unreferenced = (
+                select(StoredObjectModel.id)
+                .where(StoredObjectModel.key == key, *self._unreferenced(with_pending))
+                .with_for_update()
+            )
+            object_id = (await self.session.execute(unreferenced)).scalar_one_or_none()
+            if object_id is not None:
+                await self._delete(key)
+                await self.session.execute(delete(StoredObjectModel).where(StoredObjectModel.id == object_id))
+            await self.session.commit()
+        except Exception as ex:  # Referencing rows are already deleted, so request does not fail
+            await self.session.rollback()
+            logging.getLogger('aws_logger').error(f'Object {key} is not deleted: {ex!r}')
+    
+    async def sweep(self) -> int:
+        '''
+        Purges objects, which rows are left without references: object was not deleted by `purge`,
+        or pending upload was never referenced (`store` failed or its caller rolled back)
+        Returns:
+            int (Count of checked rows)
+        '''
+        keys = (await self.session.scalars(select(StoredObjectModel.key).where(*self._unreferenced()))).all()
+        await self.session.commit()
+        self._released.extend(keys)
+        await self.purge()
+        return len(keys)
+    
+    async def _delete(self, key: str) -> None:
+        await asyncio.gather(self.client.delete_object(key), self.client.delete_prefix(derived_prefix(key)))
+
+
+async def sweep_storage(session_factory: async_sessionmaker[AsyncSession], client: S3Client, interval: float) -> None:
+    '''Runs `ContentStorage.sweep` every `interval` seconds (first sweep is run at once)'''
+    while True:
+        try:
+            async with session_factory() as session:
+                swept = await ContentStorage(session, client).sweep()
+            if swept:
+                logging.getLogger('aws_logger').info(f'Swept {swept} unreferenced objects')
+        except Exception as ex:  # E.g. database is not available, sweep is retried after interval
+            logging.getLogger('aws_logger').error(f'Storage sweep failed: {ex!r}')
+        await asyncio.sleep(interval)
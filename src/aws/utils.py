@@ -1,7 +1,33 @@
-from uuid import uuid4
+import mimetypes
+import posixpath
+from uuid import UUID, uuid4
 
 
 def generate_object_name(file_path: str) -> str:
     extension = file_path.split('/')[-1].split('.')[-1]
     object_name = f'{uuid4().hex}.{extension}'
     return object_name
+
+
+UPLOAD_PREFIX = 'uploads/'
+FINALIZED_PREFIX = 'posts/'
+
+
+def user_upload_prefix(user_id: UUID) -> str:
+    '''Prefix of keys presigned for user uploads (key proves that user owns the object)'''
+    return f'{UPLOAD_PREFIX}{user_id}/'
+
+
+def generate_user_object_name(user_id: UUID, content_type: str) -> str:
+    extension = mimetypes.guess_extension(content_type) or ''
+    return f'{user_upload_prefix(user_id)}{uuid4().hex}{extension}'
+
+
+def finalized_object_name(upload_object_name: str) -> str:
+    '''Key of finalized upload (out of expiring uploads prefix, the same for retried finalization)'''
+    return f'{FINALIZED_PREFIX}{upload_object_name.removeprefix(UPLOAD_PREFIX)}'
+
+
+def derived_prefix(object_name: str) -> str:
+    '''Prefix of keys derived from object (e.g. image variants `<stem>_640w.webp`), they are deleted with it'''
+    return f'{posixpath.splitext(object_name)[0]}_'
@@ -0,0 +1,235 @@
+import asyncio
+import hashlib
+import time
+from collections.abc import Callable
+from contextvars import ContextVar
+from functools import wraps
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.redis import RedisBackend
+from fastapi_cache.decorator import cache as fastapi_cache
+from fastapi_cache.types import Backend, KeyBuilder
+from src.local_cache import LocalTTLCache
+from src.redis_client.dependencies import get_redis_client
+from src.profiling import record_span
+from src.config import settings
+
+# Key and tags built for current request, they are stored with response on cache miss
+_pending_tags: ContextVar[tuple[str, list[str]] | None] = ContextVar('pending_cache_tags', default=None)
+
+# Single-flights led by current request, they are released when endpoint ends
+_led_flights: ContextVar[list[tuple['TieredBackend', str, asyncio.Future]] | None] = ContextVar(
+    'led_cache_flights', default=None
+)
+
+# Deletes cached responses of all tags (and tag sets itself), returns deleted response keys
+INVALIDATE_SCRIPT = '''
+local deleted = {}
+for _, tag in ipairs(KEYS) do
+    for _, key in ipairs(redis.call('SMEMBERS', tag)) do
+        redis.call('UNLINK', key)
+        table.insert(deleted, key)
+    end
+    redis.call('UNLINK', tag)
+end
+return deleted
+'''
+
+
+def tag_key(tag: str) -> str:
+    return f'{FastAPICache.get_prefix()}:tag:{tag}'
+
+
+def tagged_key_builder(*tags: str, normalizers: dict[str, Callable[[str], str]] | None = None) -> KeyBuilder:
+    '''
+    Returns key builder for `@cache` which builds key from request path and query params only
+    (dependencies like services are new objects on every call, so they can not be part of key).
+    Tags are templates formatted with endpoint params (e.g. `post:{post_id}`),
+    response is registered in them when it is stored.
+    `normalizers` map query param name to function, which makes equivalent values share key.
+    '''
+    normalizers = normalizers or {}
+    
+    def key_builder(func, namespace: str = '', *, request=None, response=None, args, kwargs) -> str:
+        params = sorted(
+            (name, normalizers[name](value) if name in normalizers else value)
+            for name, value in request.query_params.multi_items()
+        )
+        raw = f'{func.__module__}:{func.__name__}:{request.url.path}:{params}'
+        key = f'{namespace}:{hashlib.sha1(raw.encode()).hexdigest()}'
+        _pending_tags.set((key, [tag.format(**kwargs) for tag in tags]))
+        return key
+    return key_builder
+
+
+def cache(*args, **kwargs):
+    '''
+    `fastapi_cache` decorator, which releases single-flights led by request when endpoint ends.
+    Flight is resolved by `set` of computed response, but failed endpoint (e.g. 404) is not cached,
+    so without release requests of the same key would wait `CACHE_FLIGHT_TIMEOUT` for it.
+    '''
+    decorator = fastapi_cache(*args, **kwargs)
+    
+    def wrapper(func):
+        cached = decorator(func)
+        
+        @wraps(cached)
+        async def endpoint(*args, **kwargs):
+            led = []
+            token = _led_flights.set(led)
+            try:
+                return await cached(*args, **kwargs)
+            finally:
+                _led_flights.reset(token)
+                for backend, key, flight in led:
+                    backend.release_flight(key, flight)
+        return endpoint
+    return wrapper
+
+
+class TaggedRedisBackend(RedisBackend):
+    '''Redis backend which adds stored responses into sets of their tags in the same round-trip'''
+    async def set(self, key: str, value: bytes, expire: int | None = None) -> None:
+        pending = _pending_tags.get()
+        tags = pending[1] if pending and pending[0] == key else []
+        
+        async with self.redis_write.pipeline(transaction=True) as pipe:
+            pipe.set(key, value, ex=expire)
+            for tag in tags:
+                pipe.sadd(tag_key(tag), key)
+                if expire:
+                    pipe.expire(tag_key(tag), expire)
+            await pipe.execute()
+
+
+class TieredBackend(Backend):
+    '''
+    In-process L1 cache (LRU with short TTL) in front of shared backend (L2).
+    Single-flight: on miss only the first coroutine gets `None` and recomputes value,
+    concurrent ones for the same key wait until it is `set` or released by `cache` decorator
+    when endpoint fails (or `CACHE_FLIGHT_TIMEOUT` passes, if endpoint is not decorated by it).
+    Stale-while-revalidate: for `CACHE_STALE_TTL` seconds after L1 entry expired,
+    it is returned to all callers, except one which revalidates it.
+    '''
+    def __init__(self, backend: Backend):
+        self.backend = backend
+        # Entry is `(fresh until, expire at, value)` by monotonic clock
+        self.local: LocalTTLCache[str, tuple[float, float, bytes]] = LocalTTLCache(
+            maxsize=settings.CACHE_LOCAL_SIZE, 
+            ttl=settings.CACHE_LOCAL_TTL + settings.CACHE_STALE_TTL
+        )
+        self.flights: dict[str, asyncio.Future] = {}
+        self.stats = {
+            'l1_hits': 0, 'l1_misses': 0, 'l1_stale_hits': 0, 
+            'l2_hits': 0, 'l2_misses': 0, 'coalesced': 0
+        }
+    
+    async def get_with_ttl(self, key: str) -> tuple[int, bytes | None]:
+        started = time.perf_counter()
+        ttl, value = await self._get_with_ttl(key)
+        result = 'miss' if value is None else 'hit'
+        record_span('cache', f'{result} {key}', started, time.perf_counter() - started)
+        return ttl, value
+    
+    async def _get_with_ttl(self, key: str) -> tuple[int, bytes | None]:
+        now = time.monotonic()
+        entry = self.local.get(key)
+        if entry:
+            fresh_until, expire_at, value = entry
+            if now < fresh_until:
+                self.stats['l1_hits'] += 1
+                return int(expire_at - now), value
+            if key in self.flights:  # Other coroutine is revalidating
+                self.stats['l1_stale_hits'] += 1
+                return max(int(expire_at - now), 0), value
+        self.stats['l1_misses'] += 1
+        
+        if key in self.flights:
+            self.stats['coalesced'] += 1
+            value = await self._wait_flight(key)
+            if value is not None:
+                return settings.CACHE_LOCAL_TTL, value
+        
+        # This coroutine leads the flight: reads L2 and, on miss, its caller computes value and `sets` it
+        if key not in self.flights:
+            flight = self.flights[key] = asyncio.get_running_loop().create_future()
+            led = _led_flights.get()
+            if led is not None:
+                led.append((self, key, flight))
+        ttl, value = await self.backend.get_with_ttl(key)
+        if value is not None:
+            self.stats['l2_hits'] += 1
+            self._set_local(key, value, ttl)
+            self._resolve_flight(key, value)
+            return ttl, value
+        self.stats['l2_misses'] += 1
+        return 0, None
+    
+    async def get(self, key: str) -> bytes | None:
+        _, value = await self.get_with_ttl(key)
+        return value
+    
+    async def set(self, key: str, value: bytes, expire: int | None = None) -> None:
+        try:
+            await self.backend.set(key, value, expire)
+            self._set_local(key, value, expire)
+        finally:
+            self._resolve_flight(key, value)
+    
+    def lock(self, key: str, timeout: int):
+        return self.backend.lock(key, timeout)
+    
+    async def clear(self, namespace: str | None = None, key: str | None = None) -> int:
+        if key:
+            self.local.delete(key)
+        else:
+            self.local.clear()
+        return await self.backend.clear(namespace, key)
+    
+    def evict_local(self, keys: list[str]) -> None:
+        for key in keys:
+            self.local.delete(key)
+    
+    def release_flight(self, key: str, flight: asyncio.Future) -> None:
+        '''Ends flight if its leader did not `set` value, waiters get `None` and compute value themselves'''
+        if self.flights.get(key) is flight:
+            del self.flights[key]
+        if not flight.done():
+            flight.set_result(None)
+    
+    def _set_local(self, key: str, value: bytes, ttl: int | None) -> None:
+        now = time.monotonic()
+        # Redis returns negative ttl for keys without expiration
+        expire_at = now + ttl if ttl is not None and ttl >= 0 else float('inf')
+        fresh_until = min(now + settings.CACHE_LOCAL_TTL, expire_at)
+        self.local.set(key, (fresh_until, expire_at, value))
+    
+    def _resolve_flight(self, key: str, value: bytes) -> None:
+        flight = self.flights.pop(key, None)
+        if flight and not flight.done():
+            flight.set_result(value)
+    
+    async def _wait_flight(self, key: str) -> bytes | None:
+        flight = self.flights[key]
+        try:
+            return await asyncio.wait_for(asyncio.shield(flight), settings.CACHE_FLIGHT_TIMEOUT)
+        except asyncio.TimeoutError:
+            # Computing coroutine failed or is too slow, next caller will recompute
+            if self.flights.get(key) is flight:
+                del self.flights[key]
+            return None
+
+
+async def invalidate_tags(*tags: str) -> list[str]:
+    '''Deletes all cached responses tagged with any of tags, returns deleted keys'''
+    try:
+        keys = [tag_key(tag) for tag in tags]
+        backend = FastAPICache.get_backend()
+    except RuntimeError:  # Cache is not initialized (e.g. redis was not available on startup)
+        return []
+    script = get_redis_client().register_script(INVALIDATE_SCRIPT)
+    deleted = [key.decode() for key in await script(keys=keys)]
+    
+    # Entries cached in other workers expire in `CACHE_LOCAL_TTL` seconds
+    if isinstance(backend, TieredBackend):
+        backend.evict_local(deleted)
+    return deleted
@@ -1,4 +1,5 @@
 import os
+from typing import Literal
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -22,6 +23,8 @@ class Settings(BaseSettings):
     LOG_LEVEL: str
     LOG_INTO_CONSOLE: bool
     LOG_INTO_FILES: bool
+    LOG_JSON: bool = False  # One JSON object per record instead of text lines
+    LOG_QUEUE_SIZE: int = 10_000  # Records over this limit are dropped
     
     # Database
     DB_USER: str
@@ -32,6 +35,8 @@ class Settings(BaseSettings):
     DB_POOL_SIZE: int
     DB_MAX_OVERFLOW: int
     DB_ECHO: bool
+    DB_SLOW_QUERY_SECONDS: float = 0.2  # Queries running longer are always logged
+    DB_QUERY_LOG_SAMPLE_RATE: float = 0  # Share of other queries which are logged
     
     # Test database
     DB_USER_TEST: str
@@ -45,15 +50,96 @@ class Settings(BaseSettings):
     JWT_ALGHORITM: str
     JWT_ACCESS_TOKEN_EXPIRE_MINUTES: int
     JWT_REFRESH_TOKEN_EXPIRE_MINUTES: int
+    JWT_REVOCATION_BLOOM_ENABLED: bool = False
+    JWT_REVOCATION_BLOOM_CAPACITY: int = 100_000
+    JWT_REVOCATION_BLOOM_ERROR_RATE: float = 0.01
+    JWT_REVOCATION_BLOOM_REFRESH_SECONDS: float = 5
+    
+    # Password hashing
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_QUEUE_LIMIT: int = 64
     
     # Redis
     REDIS_HOST: str
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_SOCKET_TIMEOUT: float = 5
+    REDIS_SOCKET_CONNECT_TIMEOUT: float = 5
+    REDIS_POOL_TIMEOUT: float = 5
+    
+    # Responses cache
+    CACHE_EXPIRE: int = 6 * 60 * 60
+    CACHE_LOCAL_SIZE: int = 1000
+    CACHE_LOCAL_TTL: int = 5
+    CACHE_STALE_TTL: int = 0  # Stale-while-revalidate window, disabled by default
+    CACHE_FLIGHT_TIMEOUT: float = 5
+    
+    # Authenticated principal cache
+    PRINCIPAL_CACHE_TTL: int = 300
+    PRINCIPAL_CACHE_LOCAL_TTL: float = 5
+    PRINCIPAL_CACHE_LOCAL_SIZE: int = 10_000
+    
+    # Users summaries embedded into other responses (e.g. post author)
+    USER_SUMMARY_CACHE_TTL: int = 10 * 60
+    
+    # Pagination
+    PAGINATION_COUNT_STRATEGY: Literal['exact', 'estimate', 'counter', 'cached'] = 'exact'
+    PAGINATION_COUNT_CACHE_TTL: int = 30
+    
+    # Home timeline
+    TIMELINE_MAX_LENGTH: int = 800
+    TIMELINE_FANOUT_LIMIT: int = 10_000  # Authors with more followers are merged at read time
+    TIMELINE_TTL: int = 7 * 24 * 60 * 60
+    
+    # Posts search
+    SEARCH_CACHE_TTL: int = 60  # Results are not invalidated on posts changes, so TTL is short
+    SEARCH_QUERY_MAX_LENGTH: int = 200
     
     # S3
     S3_ACCESS_KEY_ID: str
     S3_SECRET_ACCESS_KEY: str
     S3_ENDPOINT_URL: str
     S3_BUCKET_NAME: str
+    S3_MULTIPART_THRESHOLD: int = 8 * 1024 * 1024
+    S3_MULTIPART_PART_SIZE: int = 8 * 1024 * 1024  # S3 requires at least 5 MB for all parts except last
+    S3_MULTIPART_CONCURRENCY: int = 4
+    S3_MAX_POOL_CONNECTIONS: int = 50
+    S3_KEEPALIVE_TIMEOUT: float = 60
+    S3_PRESIGNED_EXPIRE: int = 15 * 60
+    S3_PRESIGNED_MAX_SIZE: int = 20 * 1024 * 1024
+    S3_UPLOAD_EXPIRE_DAYS: int = 1  # Presigned uploads, which are not finalized, are expired by bucket lifecycle rule
+    S3_PENDING_UPLOAD_TIMEOUT: int = 60 * 60  # Content upload, which is not referenced this long, is swept
+    S3_SWEEP_INTERVAL: int = 60 * 60  # Unreferenced objects are swept at startup and then with this interval
+    
+    # Post image variants (resized copies for feed tiles and screens of different density)
+    IMAGE_PROCESSING: Literal['inline', 'deferred', 'disabled'] = 'deferred'
+    IMAGE_PROCESSING_WORKERS: int = 2
+    IMAGE_VARIANT_WIDTHS: list[int] = [320, 640, 1280]
+    IMAGE_VARIANT_FORMATS: list[Literal['webp', 'jpeg']] = ['webp', 'jpeg']
+    IMAGE_VARIANT_QUALITY: int = 80
+    IMAGE_MAX_PIXELS: int = 50_000_000
+    
+    # Mail (sent by `python -m src.auth.email.worker` from outbox table)
+    SMTP_HOST: str = 'localhost'
+    SMTP_PORT: int = 25
+    SMTP_USERNAME: str | None = None
+    SMTP_PASSWORD: str | None = None
+    SMTP_STARTTLS: bool = False
+    SMTP_TIMEOUT: float = 10
+    SMTP_POOL_SIZE: int = 2  # Connections kept open by worker
+    MAIL_FROM: str = 'noreply@localhost'
+    MAIL_BATCH_SIZE: int = 50
+    MAIL_POLL_INTERVAL: float = 1
+    MAIL_MAX_ATTEMPTS: int = 5  # Mail is moved into dead letters after this count of failures
+    MAIL_RETRY_DELAY: float = 30
+    MAIL_MAX_RETRY_DELAY: float = 60 * 60
+    
+    # Metrics
+    METRICS_LOOP_LAG_INTERVAL: float = 0.5
+    
+    # Requests tracing
+    PROFILING_SECRET: str | None = None  # Key of signed `X-Debug-Trace` header, disabled if not set
+    PROFILING_SAMPLE_RATE: float = 0
+    PROFILING_TRACE_TTL: int = 60 * 60
     
     @property
     def asyncpg_url(self):
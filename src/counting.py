@@ -0,0 +1,88 @@
+from abc import ABC, abstractmethod
+from sqlalchemy import select, func, text as sa_text
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.database import Base
+from src.models import RowCounterModel
+from src.redis_client.client import RedisClient
+from src.config import settings
+
+
+class CountStrategy(ABC):
+    '''Strategy of getting total rows count for paginated listings'''
+    
+    @abstractmethod
+    async def count(self, session: AsyncSession, model: type[Base]) -> int:
+        ...
+
+
+class ExactCount(CountStrategy):
+    '''Exact `SELECT count(*)`, cost grows with table size'''
+    
+    async def count(self, session: AsyncSession, model: type[Base]) -> int:
+        query = select(func.count()).select_from(model)
+        result = await session.execute(query)
+        return result.scalar_one()
+
+
+class EstimateCount(CountStrategy):
+    '''Planner estimate from `pg_class.reltuples` (refreshed by VACUUM/ANALYZE), O(1)'''
+    
+    def __init__(self, fallback: CountStrategy | None = None):
+        self.fallback = fallback or ExactCount()
+    
+    async def count(self, session: AsyncSession, model: type[Base]) -> int:
+        query = sa_text('SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table_name)')
+        result = await session.execute(query, {'table_name': model.__tablename__})
+        estimate = result.scalar()
+        # reltuples is -1 if table was never analyzed
+        if estimate is None or estimate < 0:
+            return await self.fallback.count(session, model)
+        return estimate
+
+
+class CounterTableCount(CountStrategy):
+    '''Reads `row_counter` row maintained by insert/delete triggers, O(1)'''
+    
+    def __init__(self, fallback: CountStrategy | None = None):
+        self.fallback = fallback or ExactCount()
+    
+    async def count(self, session: AsyncSession, model: type[Base]) -> int:
+        query = select(RowCounterModel.count).where(RowCounterModel.table_name == model.__tablename__)
+        result = await session.execute(query)
+        count = result.scalar()
+        # Table has no counter trigger (e.g. schema created without migrations)
+        if count is None:
+            return await self.fallback.count(session, model)
+        return count
+
+
+class CachedCount(CountStrategy):
+    '''Caches result of other strategy in redis for `ttl` seconds'''
+    
+    def __init__(self, redis_client: RedisClient, inner: CountStrategy | None = None, ttl: int | None = None):
+        self.redis_client = redis_client
+        self.inner = inner or ExactCount()
+        self.ttl = ttl or settings.PAGINATION_COUNT_CACHE_TTL
+    
+    async def count(self, session: AsyncSession, model: type[Base]) -> int:
+        key = f'count:{model.__tablename__}'
+        cached = await self.redis_client.get(key)
+        if cached is not None:
+            return int(cached)
+        
+        count = await self.inner.count(session, model)
+        await self.redis_client.setex(key, self.ttl, count)
+        return count
+
+
+def get_count_strategy(redis_client: RedisClient) -> CountStrategy:
+    '''Returns count strategy selected by `PAGINATION_COUNT_STRATEGY` setting'''
+    match settings.PAGINATION_COUNT_STRATEGY:
+        case 'estimate':
+            return EstimateCount()
+        case 'counter':
+            return CounterTableCount()
+        case 'cached':
+            return CachedCount(redis_client)
+        case _:
+            return ExactCount()
@@ -1,17 +1,39 @@
 import logging
+import random
+import time
 from uuid import UUID
 from datetime import datetime
+from dataclasses import dataclass
+from contextvars import ContextVar
 from sqlalchemy import event, Engine, text as sa_text
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession, AsyncAttrs
 from sqlalchemy.exc import SQLAlchemyError
 from fastapi import HTTPException, status
+from src.profiling import record_span
 from src.config import settings
 
 # --- Engine
 
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    '''Default pool of async engine which measures time of waiting for connection'''
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.acquired_count = 0
+        self.wait_seconds = 0.0
+    
+    def _do_get(self):
+        started = time.perf_counter()
+        connection = super()._do_get()
+        self.wait_seconds += time.perf_counter() - started
+        self.acquired_count += 1
+        return connection
+
+
 engine = create_async_engine(
     url=settings.asyncpg_url,
+    poolclass=TimedQueuePool,
     pool_size=settings.DB_POOL_SIZE,
     max_overflow=settings.DB_MAX_OVERFLOW,
     echo=settings.DB_ECHO
@@ -39,10 +61,38 @@ class Base(AsyncAttrs, DeclarativeBase):
             ) from ex
 
 
-# --- Logging ---
+# --- Queries instrumentation ---
+
+@dataclass
+class QueryStats:
+    '''Aggregates of queries executed in current request'''
+    count: int = 0
+    seconds: float = 0
+
+
+# Set by `QueryStatsMiddleware`, async engine runs listeners in the context of calling task
+query_stats: ContextVar[QueryStats | None] = ContextVar('query_stats', default=None)
+
 
 @event.listens_for(Engine, 'before_cursor_execute')
 def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
-    logging.getLogger('database_logger').info(f'SQL Query: {statement}')
-    if parameters:
-        logging.getLogger('database_logger').debug(f'Parameters: {parameters}')
+    context.query_started_at = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context.query_started_at
+    stats = query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+    record_span('sql', statement, context.query_started_at, elapsed)
+    
+    # Only slow and sampled queries are logged, messages are formatted by logger only if they are emitted
+    logger = logging.getLogger('database_logger')
+    if elapsed >= settings.DB_SLOW_QUERY_SECONDS:
+        logger.warning('Slow SQL query (%.1f ms): %s', elapsed * 1000, statement)
+        if parameters:
+            logger.debug('Parameters: %s', parameters)
+    elif settings.DB_QUERY_LOG_SAMPLE_RATE and random.random() < settings.DB_QUERY_LOG_SAMPLE_RATE:
+        logger.info('SQL query (%.1f ms): %s', elapsed * 1000, statement)
@@ -2,13 +2,15 @@ import logging
 from functools import wraps
 from fastapi import HTTPException
 from src.exceptions import InternalServerError
+from src.profiling import trace_span
 
 
 def default_router_exceptions(func):
     @wraps(func)
     async def wrapper(*args, **kwargs):
         try:
-            return await func(*args, **kwargs)
+            with trace_span('handler', func.__name__):
+                return await func(*args, **kwargs)
         except HTTPException as ex:
             raise ex
         except Exception as ex:
@@ -4,6 +4,8 @@ from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.database import SessionFactory
 from src.schemas import PaginationParams
+from src.counting import CountStrategy, get_count_strategy
+from src.redis_client.dependencies import RedisClientDep
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
@@ -14,3 +16,10 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
 SessionDep = Annotated[AsyncSession, Depends(get_db)]
 
 PaginationDep = Annotated[PaginationParams, Depends(PaginationParams)]
+
+
+def get_pagination_count_strategy(redis_client: RedisClientDep) -> CountStrategy:
+    return get_count_strategy(redis_client)
+
+
+CountStrategyDep = Annotated[CountStrategy, Depends(get_pagination_count_strategy)]
@@ -9,9 +9,26 @@ class InternalServerError(HTTPException):
         )
 
 
+class ServiceUnavailable(HTTPException):
+    def __init__(self, detail: str | None = None, retry_after: int = 1):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=detail or 'Service unavailable',
+            headers={'Retry-After': str(retry_after)}
+        )
+
+
 class BadRequest(HTTPException):
     def __init__(self, detail: str | None = None):
         super().__init__(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=detail or 'Bad request',
         )
+
+
+class NotFound(HTTPException):
+    def __init__(self, detail: str | None = None):
+        super().__init__(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=detail or 'Not found',
+        )
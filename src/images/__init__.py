@@ -0,0 +1 @@
+from src.images.schemas import ImageVariant, ImageVariants
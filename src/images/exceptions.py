@@ -0,0 +1,9 @@
+from fastapi import HTTPException, status
+
+
+class InvalidImageException(HTTPException):
+    def __init__(self, detail: str | None = None):
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=detail or 'Image can not be decoded'
+        )
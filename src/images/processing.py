@@ -0,0 +1,90 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from src.images.render import RenderedImage, render_image
+from src.images.schemas import ImageVariant, ImageVariants
+from src.images.exceptions import InvalidImageException
+from src.aws.client import S3Client
+from src.aws.utils import derived_prefix
+from src.metrics import image_processing_duration
+from src.profiling import record_span
+from src.config import settings
+
+
+def _create_executor() -> ProcessPoolExecutor:
+    # Decoding and resizing hold GIL, so they run in processes. Workers are spawned (not forked from
+    # process with running threads) on first use and are kept for next images.
+    return ProcessPoolExecutor(
+        max_workers=settings.IMAGE_PROCESSING_WORKERS, 
+        mp_context=multiprocessing.get_context('spawn')
+    )
+
+
+image_executor = _create_executor()
+
+
+async def render_image_async(data: bytes) -> RenderedImage:
+    '''Renders variants of image in process pool, raises `InvalidImageException` if image can not be decoded'''
+    global image_executor
+    executor = image_executor
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    try:
+        rendered = await loop.run_in_executor(
+            executor, 
+            render_image, 
+            data, 
+            settings.IMAGE_VARIANT_WIDTHS, 
+            settings.IMAGE_VARIANT_FORMATS, 
+            settings.IMAGE_VARIANT_QUALITY, 
+            settings.IMAGE_MAX_PIXELS
+        )
+    except BrokenProcessPool:
+        # Worker was killed (e.g. by OOM killer), broken pool rejects all next tasks, so it is replaced
+        # (once, other tasks of the same pool fail at the same time)
+        if image_executor is executor:
+            executor.shutdown(wait=False)
+            image_executor = _create_executor()
+        raise
+    except ValueError as ex:
+        raise InvalidImageException(str(ex)) from ex
+    except OSError as ex:
+        raise InvalidImageException() from ex
+    
+    elapsed = time.perf_counter() - started
+    image_processing_duration.observe(elapsed)
+    record_span('image', f'render {len(rendered.variants)} variants', started, elapsed)
+    return rendered
+
+
+async def upload_variants(client: S3Client, rendered: RenderedImage, object_name: str) -> ImageVariants:
+    '''
+    Uploads all variants at once, their keys are derived from key of original image
+    (e.g. `<stem>_640w.webp` for `<stem>.png`), so they are found and deleted with it
+    '''
+    prefix = derived_prefix(object_name)
+    urls = await asyncio.gather(*(
+        client.upload_bytes(f'{prefix}{variant.width}w.{variant.format}', variant.data, variant.content_type)
+        for variant in rendered.variants
+    ))
+    return ImageVariants(
+        width=rendered.width,
+        height=rendered.height,
+        blurhash=rendered.blurhash,
+        files=[
+            ImageVariant(url=url, format=variant.format, width=variant.width, height=variant.height)
+            for url, variant in zip(urls, rendered.variants)
+        ]
+    )
+
+
+async def create_variants(client: S3Client, object_name: str) -> ImageVariants:
+    '''Downloads stored original image and creates its variants'''
+    rendered = await render_image_async(await client.download_bytes(object_name))
+    return await upload_variants(client, rendered, object_name)
+
+
+def shutdown_image_processing() -> None:
+    image_executor.shutdown(cancel_futures=True)
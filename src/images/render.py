@@ -0,0 +1,82 @@
+'''
+Image decoding and resizing, run in worker processes of `image_executor`
+(module imports only Pillow, so workers start fast and do not load app).
+'''
+import io
+from dataclasses import dataclass
+from PIL import Image, ImageOps
+from src.images import blurhash
+
+ORIENTATION_TAG = 0x0112
+TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)  # Width and height are swapped after `exif_transpose`
+BLURHASH_SIZE = 32
+
+SAVE_OPTIONS = {
+    'webp': {'format': 'WEBP', 'method': 4},
+    'jpeg': {'format': 'JPEG', 'optimize': True, 'progressive': True}
+}
+CONTENT_TYPES = {'webp': 'image/webp', 'jpeg': 'image/jpeg'}
+
+
+@dataclass
+class RenderedVariant:
+    format: str
+    width: int
+    height: int
+    data: bytes
+    
+    @property
+    def content_type(self) -> str:
+        return CONTENT_TYPES[self.format]
+
+
+@dataclass
+class RenderedImage:
+    width: int
+    height: int
+    blurhash: str
+    variants: list[RenderedVariant]
+
+
+def render_image(data: bytes, widths: list[int], formats: list[str], quality: int, max_pixels: int) -> RenderedImage:
+    '''
+    Decodes image once and encodes its resized copies (images are never upscaled).
+    Raises `ValueError` if image is too large and `OSError` if it can not be decoded.
+    Args:
+        data: Original image file
+        widths: Variants widths
+        formats: Variants formats (`webp`, `jpeg`)
+        quality: Encoding quality (1-100)
+        max_pixels: Larger images are rejected before decoding (decompression bombs)
+    Returns:
+        RenderedImage
+    '''
+    with Image.open(io.BytesIO(data)) as source:
+        width, height = source.size
+        if width * height > max_pixels:
+            raise ValueError(f'Image is larger than {max_pixels} pixels')
+        if source.getexif().get(ORIENTATION_TAG) in TRANSPOSED_ORIENTATIONS:
+            width, height = height, width
+        
+        # JPEG is decoded right at reduced scale (by DCT scaling), if the largest variant is much smaller
+        largest = min(max(widths), max(width, height))
+        source.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(source)
+    
+    has_alpha = image.mode in ('RGBA', 'LA') or 'transparency' in image.info
+    image = image.convert('RGBA' if has_alpha else 'RGB')
+    
+    variants = []
+    for variant_width in sorted({min(variant_width, width) for variant_width in widths}):
+        variant_height = max(round(height * variant_width / width), 1)
+        resized = image.resize((variant_width, variant_height), Image.Resampling.LANCZOS, reducing_gap=3.0)
+        for variant_format in formats:
+            # JPEG has no alpha channel
+            encoded = resized.convert('RGB') if variant_format == 'jpeg' and has_alpha else resized
+            buffer = io.BytesIO()
+            encoded.save(buffer, quality=quality, **SAVE_OPTIONS[variant_format])
+            variants.append(RenderedVariant(variant_format, variant_width, variant_height, buffer.getvalue()))
+    
+    thumbnail = image.convert('RGB')
+    thumbnail.thumbnail((BLURHASH_SIZE, BLURHASH_SIZE))
+    return RenderedImage(width, height, blurhash.encode(thumbnail), variants)
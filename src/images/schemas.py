@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+
+
+class ImageVariant(BaseModel):
+    url: str
+    format: str
+    width: int
+    height: int
+
+
+class ImageVariants(BaseModel):
+    '''Resized copies of post image, `width`, `height` and `blurhash` describe original for placeholders'''
+    width: int
+    height: int
+    blurhash: str
+    files: list[ImageVariant]
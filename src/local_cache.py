@@ -0,0 +1,45 @@
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+
+
+class LocalTTLCache[K: Hashable, V]:
+    '''
+    In-process LRU cache with per entry TTL.
+    Not shared between workers, so it should be used with short TTL in front of shared storage.
+    '''
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+    
+    def get(self, key: K) -> V | None:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expire_at, value = item
+        if expire_at <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+    
+    def set(self, key: K, value: V, ttl: float | None = None) -> None:
+        self._data[key] = (time.monotonic() + (ttl or self.ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+    
+    def delete(self, key: K) -> None:
+        self._data.pop(key, None)
+    
+    def delete_where(self, predicate: Callable[[K], bool]) -> None:
+        '''Deletes all entries which keys match predicate (O(n), for rare invalidations)'''
+        for key in [k for k in self._data if predicate(k)]:
+            del self._data[key]
+    
+    def clear(self) -> None:
+        self._data.clear()
+    
+    def __len__(self) -> int:
+        return len(self._data)
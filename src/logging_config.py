@@ -1,6 +1,10 @@
+import copy
+import json
 import logging
+import queue
 import sys
-from logging.handlers import RotatingFileHandler
+from datetime import datetime, UTC
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 from pathlib import Path
 from src.config import settings
 
@@ -16,11 +20,93 @@ LOGS_DIR.mkdir(exist_ok=True)
 MB = 1024 * 1024
 
 
+class JSONFormatter(logging.Formatter):
+    '''Formats record as one line JSON object (for log collectors)'''
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            'time': datetime.fromtimestamp(record.created, UTC).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data['exception'] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class DroppingQueueHandler(QueueHandler):
+    '''
+    Puts records into bounded queue without blocking (records are written by listener thread).
+    When queue is full, new records are dropped and counted.
+    Records are marked with `route`, so listener passes them only to handlers of their logger.
+    '''
+    dropped: int = 0
+    
+    def __init__(self, log_queue: queue.Queue, route: str):
+        super().__init__(log_queue)
+        self.route = route
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        '''
+        Unlike `QueueHandler.prepare`, traceback is not merged into message, it is kept as `exc_text`,
+        so formatters of listener handlers render it (e.g. into `exception` field of JSON)
+        '''
+        record = copy.copy(record)
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            # Traceback references frames, so only its text is put into queue
+            record.exc_text = record.exc_text or logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        record.route = self.route
+        return record
+    
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DroppingQueueHandler.dropped += 1
+
+
+class RoutingHandler(logging.Handler):
+    '''Runs on listener thread and passes records to handlers registered for their route'''
+    def __init__(self):
+        super().__init__()
+        self.routes: dict[str, list[logging.Handler]] = {}
+    
+    def add_route(self, route: str, handlers: list[logging.Handler]) -> None:
+        self.routes.setdefault(route, []).extend(handlers)
+    
+    def emit(self, record: logging.LogRecord) -> None:
+        for handler in self.routes.get(getattr(record, 'route', None), ()):
+            if record.levelno >= handler.level:
+                handler.handle(record)
+    
+    def clear(self) -> None:
+        '''Closes and removes all registered handlers'''
+        for handlers in self.routes.values():
+            for handler in handlers:
+                handler.close()
+        self.routes.clear()
+
+
+log_queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+router_handler = RoutingHandler()
+listener: QueueListener | None = None
+
+
+def get_formatter() -> logging.Formatter:
+    if settings.LOG_JSON:
+        return JSONFormatter()
+    return logging.Formatter(LOG_FORMAT, datefmt=DATE_FORMAT)
+
+
 def get_console_handler() -> logging.StreamHandler:
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(settings.LOG_LEVEL)
-    console_formatter = logging.Formatter(LOG_FORMAT, datefmt=DATE_FORMAT)
-    console_handler.setFormatter(console_formatter)
+    console_handler.setFormatter(get_formatter())
     return console_handler
 
 
@@ -37,11 +123,18 @@ def get_file_handler(prefix: str, max_bytes=10 * MB, backup_count=1) -> Rotating
         encoding='utf-8'
     )
     file_handler.setLevel(settings.LOG_LEVEL)
-    file_formatter = logging.Formatter(LOG_FORMAT, datefmt=DATE_FORMAT)
-    file_handler.setFormatter(file_formatter)
+    file_handler.setFormatter(get_formatter())
     return file_handler
 
 
+def add_queue_handler(logger: logging.Logger, handlers: list[logging.Handler]) -> None:
+    '''Attaches `handlers` to `logger` through logging queue, so they do not block event loop'''
+    if not handlers:
+        return
+    router_handler.add_route(logger.name, handlers)
+    logger.addHandler(DroppingQueueHandler(log_queue, logger.name))
+
+
 def create_logger(logger_name: str, max_bytes: int | None = None, backup_count: int | None = None) -> None:
     '''
     Args:
@@ -53,26 +146,52 @@ def create_logger(logger_name: str, max_bytes: int | None = None, backup_count:
     logger = logging.getLogger(logger_name)
     logger.setLevel(settings.LOG_LEVEL)
     logger.handlers.clear()
+    handlers = []
     
     # Handler for console
     if settings.LOG_INTO_CONSOLE:
         console_handler = get_console_handler()
-        logger.addHandler(console_handler)
+        handlers.append(console_handler)
         
     # Handler for files (with rotation)
     if settings.LOG_INTO_FILES:
         file_handler = get_file_handler(logger_name.split('_')[0], max_bytes or 10 * MB, backup_count or 1)
-        logger.addHandler(file_handler)
+        handlers.append(file_handler)
+    
+    add_queue_handler(logger, handlers)
 
 
 def setup_logging():
+    global listener
+    shutdown_logging()
+    
     # Custom loggers
     create_logger('database_logger')
     create_logger('app_logger')
     create_logger('error_logger')
     create_logger('aws_logger')
+    create_logger('mail_logger')
 
     # Uvicorn loggers
     file_handler = get_file_handler('uvicorn')
-    logging.getLogger('uvicorn').addHandler(file_handler)
-    logging.getLogger('uvicorn.access').addHandler(file_handler)
+    add_queue_handler(logging.getLogger('uvicorn'), [file_handler])
+    add_queue_handler(logging.getLogger('uvicorn.access'), [file_handler])
+    
+    # All handlers are run on listener thread
+    listener = QueueListener(log_queue, router_handler)
+    listener.start()
+
+
+def shutdown_logging():
+    '''Writes queued records and closes handlers'''
+    global listener
+    if listener:
+        listener.stop()
+        listener = None
+    # Queue has no listener anymore, so records of these loggers go to `logging.lastResort`
+    for name in router_handler.routes:
+        logger = logging.getLogger(name)
+        for handler in logger.handlers[:]:
+            if isinstance(handler, DroppingQueueHandler):
+                logger.removeHandler(handler)
+    router_handler.clear()
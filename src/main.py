@@ -1,16 +1,28 @@
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi_cache import FastAPICache
-from fastapi_cache.backends.redis import RedisBackend
 from src.schemas import SuccessResponse
 from src.auth.router import router as auth_router
 from src.posts.router import router as posts_router
-from src.redis_client.dependencies import get_redis_client
+from src.timeline.router import router as timeline_router
+from src.redis_client.dependencies import get_redis_client, close_redis_client
+from src.aws.client import S3Client
+from src.aws.storage import sweep_storage
+from src.aws.utils import UPLOAD_PREFIX
+from src.images.processing import shutdown_image_processing
+from src.cache import TaggedRedisBackend, TieredBackend, tagged_key_builder
+from src.auth.password.utils import hash_pool_stats
 from src.config import settings
-from src.logging_config import setup_logging
+from src.logging_config import setup_logging, shutdown_logging, log_queue, DroppingQueueHandler
+from src.middlewares import QueryStatsMiddleware, MetricsMiddleware, ProfilingMiddleware
+from src.profiling import is_trace_request_signed, trace_key, TRACE_HEADER
+from src.exceptions import NotFound
+from src.metrics import registry, monitor_event_loop_lag, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from src.database import engine, SessionFactory
 
 # --- App lifespan ---
 
@@ -22,12 +34,36 @@ async def lifespan(app: FastAPI):
     if not await redis_client.is_connected():
         logging.getLogger('error_logger').error('Error with redis connection')
     else:
-        FastAPICache.init(RedisBackend(redis_client.connection), prefix='fastapi_cache')
+        app.state.cache_backend = TieredBackend(TaggedRedisBackend(redis_client.connection))
+        FastAPICache.init(
+            app.state.cache_backend, 
+            prefix='fastapi_cache', 
+            expire=settings.CACHE_EXPIRE,
+            key_builder=tagged_key_builder()
+        )
+    
+    app.state.s3_client = S3Client()
+    await app.state.s3_client.start()
+    try:
+        await app.state.s3_client.put_expiration_rule(
+            'expire-unfinalized-uploads', 
+            UPLOAD_PREFIX, 
+            settings.S3_UPLOAD_EXPIRE_DAYS
+        )
+    except Exception as ex:  # E.g. storage does not support lifecycle rules, uploads are kept then
+        logging.getLogger('aws_logger').error(f'Expiration of unfinalized uploads is not set: {ex!r}')
+    storage_sweeper = asyncio.create_task(sweep_storage(SessionFactory, app.state.s3_client, settings.S3_SWEEP_INTERVAL))
+    loop_lag_monitor = asyncio.create_task(monitor_event_loop_lag(settings.METRICS_LOOP_LAG_INTERVAL))
     
     yield
 
     # After shutdown
-    ...
+    loop_lag_monitor.cancel()
+    storage_sweeper.cancel()
+    shutdown_image_processing()
+    await app.state.s3_client.close()
+    await close_redis_client()
+    shutdown_logging()
 
 
 # --- App initialization ---
@@ -38,6 +74,7 @@ app = FastAPI(lifespan=lifespan, title='Posts', docs_url='/api/docs', redoc_url=
 
 app.include_router(auth_router)
 app.include_router(posts_router)
+app.include_router(timeline_router)
 
 # --- Middlewares ---
 
@@ -49,6 +86,9 @@ app.add_middleware(
     expose_headers=['*'],
     allow_credentials=True
 )
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 # --- Base routes ---
 
@@ -58,6 +98,90 @@ async def root():
     return SuccessResponse(message='Server is active!')
 
 
+@app.get('/api/stats', include_in_schema=False)
+async def stats(request: Request):
+    # Pools and queues state is internal, so it is readable only with signed header like traces
+    if not is_trace_request_signed(request.headers.get(TRACE_HEADER)):
+        raise NotFound()
+    return {
+        'password_hash_pool': hash_pool_stats.as_dict(),
+        'redis_pool': get_redis_client().pool_stats(),
+        'logging': {'queued': log_queue.qsize(), 'dropped': DroppingQueueHandler.dropped},
+        'response_cache': app.state.cache_backend.stats if hasattr(app.state, 'cache_backend') else None
+    }
+
+
+@app.get('/api/debug/traces/{trace_id}', include_in_schema=False)
+async def get_request_trace(trace_id: str, request: Request):
+    # Traces are readable only with signed header, other clients can not tell that endpoint exists
+    if not is_trace_request_signed(request.headers.get(TRACE_HEADER)):
+        raise NotFound()
+    trace = await get_redis_client().get(trace_key(trace_id))
+    if not trace:
+        raise NotFound('Trace not found')
+    return Response(trace, media_type='application/json')
+
+
+# --- Metrics ---
+
+@registry.collector('db_pool_connections', 'Database pool connections', labels=('state',))
+def collect_db_pool():
+    pool = engine.pool
+    return [
+        (('size',), pool.size()),
+        (('checked_out',), pool.checkedout()),
+        (('overflow',), max(pool.overflow(), 0))
+    ]
+
+
+@registry.collector('db_pool_acquired_total', 'Database connections acquired from pool', 'counter')
+def collect_db_pool_acquired():
+    return [((), engine.pool.acquired_count)]
+
+
+@registry.collector('db_pool_wait_seconds_total', 'Time spent waiting for database connection', 'counter')
+def collect_db_pool_wait():
+    return [((), engine.pool.wait_seconds)]
+
+
+@registry.collector('redis_pool_connections', 'Redis pool connections', labels=('state',))
+def collect_redis_pool():
+    pool_stats = get_redis_client().pool_stats()
+    return [((state,), pool_stats[state]) for state in ('max_connections', 'in_use', 'idle')]
+
+
+@registry.collector('redis_pool_wait_seconds_total', 'Time spent waiting for redis connection', 'counter')
+def collect_redis_pool_wait():
+    return [((), get_redis_client().pool_stats()['wait_seconds'])]
+
+
+@registry.collector('response_cache_events_total', 'Responses cache lookups by tier and result', 'counter', ('event',))
+def collect_response_cache():
+    backend = getattr(app.state, 'cache_backend', None)
+    return [((event,), count) for event, count in backend.stats.items()] if backend else []
+
+
+@registry.collector('password_hash_pool_tasks', 'Password hashing pool tasks', labels=('state',))
+def collect_password_hash_pool():
+    pool_stats = hash_pool_stats.as_dict()
+    return [((state,), pool_stats[state]) for state in ('running', 'queued')]
+
+
+@registry.collector('password_hash_rejected_total', 'Password hashing tasks rejected by full queue', 'counter')
+def collect_password_hash_rejected():
+    return [((), hash_pool_stats.rejected)]
+
+
+@registry.collector('log_records_dropped_total', 'Log records dropped by full logging queue', 'counter')
+def collect_log_dropped():
+    return [((), DroppingQueueHandler.dropped)]
+
+
+@app.get('/metrics', include_in_schema=False)
+async def metrics():
+    return Response(registry.render(), media_type=METRICS_CONTENT_TYPE)
+
+
 # --- Start script ---
 
 if __name__ == '__main__':
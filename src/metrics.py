@@ -0,0 +1,180 @@
+'''
+Minimal metrics registry rendered in Prometheus text format (served by `/metrics`).
+Metrics are updated from event loop only, so update is a few list/dict operations without locks.
+Values owned by other components (pools, caches) are read by collectors only when metrics are scraped.
+'''
+import asyncio
+import bisect
+import logging
+import math
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterable
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+Sample = tuple[tuple[str, ...], float]
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple) -> str:
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    return repr(value)
+
+
+class Metric(ABC):
+    '''Metric family rendered as HELP and TYPE lines followed by its samples'''
+    type: str = 'untyped'
+    
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+    
+    @abstractmethod
+    def samples(self) -> Iterable[str]:
+        ...
+    
+    def render(self) -> list[str]:
+        return [
+            f'# HELP {self.name} {_escape(self.documentation)}',
+            f'# TYPE {self.name} {self.type}',
+            *self.samples()
+        ]
+
+
+class Counter(Metric):
+    type = 'counter'
+    
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        super().__init__(name, documentation, labels)
+        self.values: dict[tuple, float] = {}
+    
+    def inc(self, amount: float = 1, *label_values) -> None:
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+    
+    def samples(self) -> Iterable[str]:
+        for label_values, value in self.values.items():
+            yield f'{self.name}{_format_labels(self.label_names, label_values)} {_format_value(value)}'
+
+
+class Histogram(Metric):
+    '''Histogram with fixed buckets, counts are stored per bucket and accumulated on render'''
+    type = 'histogram'
+    
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Label values: [bucket counts (last is +Inf), sum, count]
+        self.values: dict[tuple, list] = {}
+    
+    def observe(self, value: float, *label_values) -> None:
+        data = self.values.get(label_values)
+        if data is None:
+            data = self.values[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        data[0][bisect.bisect_left(self.buckets, value)] += 1
+        data[1] += value
+        data[2] += 1
+    
+    def samples(self) -> Iterable[str]:
+        names = (*self.label_names, 'le')
+        for label_values, (counts, total, count) in self.values.items():
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, math.inf), counts):
+                cumulative += bucket_count
+                yield f'{self.name}_bucket{_format_labels(names, (*label_values, _format_value(float(bound))))} {cumulative}'
+            labels = _format_labels(self.label_names, label_values)
+            yield f'{self.name}_sum{labels} {_format_value(total)}'
+            yield f'{self.name}_count{labels} {count}'
+
+
+class Collector(Metric):
+    '''Metric which values are read by function on every scrape'''
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        metric_type: str,
+        labels: Iterable[str],
+        collect: Callable[[], Iterable[Sample]]
+    ):
+        super().__init__(name, documentation, labels)
+        self.type = metric_type
+        self.collect = collect
+    
+    def samples(self) -> Iterable[str]:
+        for label_values, value in self.collect():
+            yield f'{self.name}{_format_labels(self.label_names, label_values)} {_format_value(float(value))}'
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: list[Metric] = []
+    
+    def register[M: Metric](self, metric: M) -> M:
+        self.metrics.append(metric)
+        return metric
+    
+    def collector(self, name: str, documentation: str, metric_type: str = 'gauge', labels: Iterable[str] = ()):
+        '''Decorator which registers function returning `(label values, value)` samples as metric'''
+        def decorator(collect: Callable[[], Iterable[Sample]]):
+            self.register(Collector(name, documentation, metric_type, labels, collect))
+            return collect
+        return decorator
+    
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception as ex:  # Broken collector must not hide other metrics
+                logging.getLogger('error_logger').error('Metric %s was not collected: %s', metric.name, ex)
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+# --- Application metrics ---
+
+http_request_duration = registry.register(Histogram(
+    'http_request_duration_seconds', 'HTTP requests latency by route template', ('method', 'route', 'status')
+))
+s3_upload_duration = registry.register(Histogram(
+    's3_upload_duration_seconds', 'Files uploads to S3 duration', buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+))
+s3_upload_bytes = registry.register(Counter('s3_upload_bytes_total', 'Bytes uploaded to S3'))
+s3_deduplicated_uploads = registry.register(Counter(
+    's3_deduplicated_uploads_total', 'Uploads skipped because the same content is stored already'
+))
+image_processing_duration = registry.register(Histogram(
+    'image_processing_duration_seconds', 'Decoding and encoding of image variants (with pool queueing)',
+    buckets=(0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+))
+password_hash_duration = registry.register(Histogram(
+    'password_hash_duration_seconds', 'bcrypt hashing and verification time (without pool queueing)', ('operation',),
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+))
+event_loop_lag = registry.register(Histogram(
+    'event_loop_lag_seconds', 'Delay of event loop wake-ups over scheduled time',
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+))
+
+
+async def monitor_event_loop_lag(interval: float) -> None:
+    '''Sleeps for `interval` in loop and records how late event loop wakes it up'''
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        event_loop_lag.observe(max(time.perf_counter() - started - interval, 0))
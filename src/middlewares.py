@@ -0,0 +1,132 @@
+import cProfile
+import json
+import logging
+import random
+import time
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from src.database import QueryStats, query_stats
+from src.metrics import http_request_duration
+from src.profiling import (
+    RequestTrace, current_trace, is_trace_request_signed, trace_key, TRACE_HEADER, PROFILE_HEADER
+)
+from src.redis_client.dependencies import get_redis_client
+from src.config import settings
+
+
+class QueryStatsMiddleware:
+    '''
+    Collects count and total time of SQL queries executed by request
+    and reports them in `Server-Timing` response header (e.g. `db;dur=12.3;desc="4 queries"`)
+    '''
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        
+        stats = QueryStats()
+        token = query_stats.set(stats)
+        
+        async def send_with_stats(message: Message) -> None:
+            if message['type'] == 'http.response.start':
+                headers = MutableHeaders(scope=message)
+                headers.append('Server-Timing', f'db;dur={stats.seconds * 1000:.1f};desc="{stats.count} queries"')
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            query_stats.reset(token)
+
+
+class MetricsMiddleware:
+    '''Records latency of requests by method, route template (not raw path) and response status'''
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        
+        started = time.perf_counter()
+        status = 500
+        
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # Router puts matched route into scope
+            route = scope.get('route')
+            http_request_duration.observe(
+                time.perf_counter() - started, 
+                scope['method'], 
+                route.path if route else 'unmatched', 
+                status
+            )
+
+
+class ProfilingMiddleware:
+    '''
+    Traces requests with signed `X-Debug-Trace` header and `PROFILING_SAMPLE_RATE` share of other requests.
+    Full timeline is stored in redis for `PROFILING_TRACE_TTL` seconds (see `/api/debug/traces/{id}`).
+    Only signed requests get totals of spans by category in `Server-Timing` header and trace id
+    in `X-Debug-Trace-Id` header, so sampled clients do not see internals (their traces are found by redis keys).
+    Signed requests with `X-Debug-Profile` header are also profiled by cProfile.
+    '''
+    # cProfile profiles whole thread, so only one request is profiled at once
+    profiling = False
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        
+        headers = Headers(scope=scope)
+        signed = is_trace_request_signed(headers.get(TRACE_HEADER))
+        sampled = settings.PROFILING_SAMPLE_RATE and random.random() < settings.PROFILING_SAMPLE_RATE
+        if not signed and not sampled:
+            return await self.app(scope, receive, send)
+        
+        trace = RequestTrace(scope['method'], scope['path'])
+        if signed and headers.get(PROFILE_HEADER) and not ProfilingMiddleware.profiling:
+            ProfilingMiddleware.profiling = True
+            trace.profile = cProfile.Profile()
+            trace.profile.enable()
+        token = current_trace.set(trace)
+        status = 500
+        
+        async def send_with_trace(message: Message) -> None:
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                if signed:
+                    response_headers = MutableHeaders(scope=message)
+                    response_headers.append('X-Debug-Trace-Id', trace.id)
+                    for category, (count, duration) in trace.totals().items():
+                        response_headers.append('Server-Timing', f'{category};dur={duration * 1000:.1f};desc="{count}"')
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_trace)
+        finally:
+            current_trace.reset(token)
+            if trace.profile:
+                trace.profile.disable()
+                ProfilingMiddleware.profiling = False
+            await self._store(trace, time.perf_counter() - trace.started, status)
+    
+    async def _store(self, trace: RequestTrace, duration: float, status: int) -> None:
+        try:
+            data = json.dumps(trace.as_dict(duration, status))
+            await get_redis_client().setex(trace_key(trace.id), settings.PROFILING_TRACE_TTL, data)
+        except Exception as ex:
+            logging.getLogger('error_logger').error('Request trace %s was not stored: %s', trace.id, ex)
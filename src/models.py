@@ -0,0 +1,11 @@
+from sqlalchemy import BigInteger, text as sa_text
+from sqlalchemy.orm import Mapped, mapped_column
+from src.database import Base
+
+
+class RowCounterModel(Base):
+    '''Rows count of tables, maintained by database triggers (see `counter` count strategy)'''
+    __tablename__ = 'row_counter'
+    
+    table_name: Mapped[str] = mapped_column(unique=True, index=True)
+    count: Mapped[int] = mapped_column(BigInteger, server_default=sa_text('0'))
@@ -0,0 +1,120 @@
+import base64
+import json
+from datetime import datetime
+from uuid import UUID
+from sqlalchemy import ColumnElement, Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.database import Base
+from src.schemas import PaginationParams
+from src.exceptions import BadRequest
+
+
+def _encode_values(values: list) -> str:
+    raw = json.dumps(values).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def _decode_values(cursor: str) -> list:
+    raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+    return json.loads(raw)
+
+
+def encode_cursor(created_at: datetime, id: UUID) -> str:
+    '''Encodes `(created_at, id)` keyset position into opaque url-safe string'''
+    return _encode_values([created_at.isoformat(), str(id)])
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    '''Decodes cursor created by `encode_cursor`, raises `BadRequest` if cursor is malformed'''
+    try:
+        created_at, id = _decode_values(cursor)
+        return datetime.fromisoformat(created_at), UUID(id)
+    except (ValueError, TypeError) as ex:
+        raise BadRequest('Invalid pagination cursor') from ex
+
+
+def encode_rank_cursor(rank: float, id: UUID) -> str:
+    '''Encodes `(rank, id)` keyset position of ranked results (float is dumped without precision loss)'''
+    return _encode_values([rank, str(id)])
+
+
+def decode_rank_cursor(cursor: str) -> tuple[float, UUID]:
+    '''Decodes cursor created by `encode_rank_cursor`, raises `BadRequest` if cursor is malformed'''
+    try:
+        rank, id = _decode_values(cursor)
+        return float(rank), UUID(id)
+    except (ValueError, TypeError) as ex:
+        raise BadRequest('Invalid pagination cursor') from ex
+
+
+async def paginate[M: Base](
+    session: AsyncSession, 
+    query: Select[tuple[M]], 
+    model: type[M], 
+    pagination: PaginationParams
+) -> tuple[list[M], str | None]:
+    '''
+    Executes query with stable `(created_at DESC, id DESC)` ordering.
+    If cursor is passed, rows after it are selected by keyset (offset is ignored),
+    otherwise classic offset pagination is used.
+    Args:
+        session: Database session
+        query: Select query for model
+        model: Selected model (used for ordering columns)
+        pagination: Pagination params
+    Returns:
+        tuple[list[M], str | None] (Page rows and cursor for next page if it exists)
+    '''
+    query = query.order_by(model.created_at.desc(), model.id.desc())
+    if pagination.cursor:
+        created_at, id = decode_cursor(pagination.cursor)
+        query = query.where(tuple_(model.created_at, model.id) < tuple_(created_at, id))
+    else:
+        query = query.offset(pagination.offset)
+    
+    # One extra row tells if there is a next page without count query
+    result = await session.execute(query.limit(pagination.limit + 1))
+    rows = list(result.scalars().all())
+    
+    next_cursor = None
+    if len(rows) > pagination.limit:
+        rows = rows[:pagination.limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return rows, next_cursor
+
+
+async def paginate_ranked[M: Base](
+    session: AsyncSession, 
+    query: Select[tuple[M]], 
+    model: type[M], 
+    rank: ColumnElement[float], 
+    pagination: PaginationParams
+) -> tuple[list[M], str | None]:
+    '''
+    Executes query with `(rank DESC, id DESC)` ordering (e.g. search results by relevance),
+    pagination works like in `paginate`, but cursor holds rank of last row
+    Args:
+        session: Database session
+        query: Select query for model
+        model: Selected model (used for ordering by id)
+        rank: Rank expression of row
+        pagination: Pagination params
+    Returns:
+        tuple[list[M], str | None] (Page rows and cursor for next page if it exists)
+    '''
+    query = query.add_columns(rank).order_by(rank.desc(), model.id.desc())
+    if pagination.cursor:
+        cursor_rank, id = decode_rank_cursor(pagination.cursor)
+        query = query.where(tuple_(rank, model.id) < tuple_(cursor_rank, id))
+    else:
+        query = query.offset(pagination.offset)
+    
+    result = await session.execute(query.limit(pagination.limit + 1))
+    rows = list(result.all())
+    
+    next_cursor = None
+    if len(rows) > pagination.limit:
+        rows = rows[:pagination.limit]
+        last, last_rank = rows[-1]
+        next_cursor = encode_rank_cursor(last_rank, last.id)
+    return [row for row, _ in rows], next_cursor
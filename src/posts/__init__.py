@@ -1,2 +1,4 @@
 from src.posts.models import PostModel
-from src.posts.schemas import PostCreate, PostUpdate, Post
+from src.posts.schemas import (
+    PostCreate, PostUpdate, Post, PostUploadUrlRequest, PostUploadUrl, PostFinalize, PostImageTaskSchema
+)
@@ -1,11 +1,20 @@
 from typing import Annotated
 from fastapi import Depends
-from src.dependencies import SessionDep
+from src.dependencies import SessionDep, CountStrategyDep
 from src.posts.service import PostsService
+from src.timeline.dependencies import TimelineServiceDep
+from src.auth.dependencies import UserSummaryLoaderDep
+from src.aws.dependencies import ContentStorageDep
 
 
-def get_posts_service(session: SessionDep):
-    return PostsService(session)
+def get_posts_service(
+    session: SessionDep, 
+    count_strategy: CountStrategyDep, 
+    timeline_service: TimelineServiceDep, 
+    user_summary_loader: UserSummaryLoaderDep, 
+    content_storage: ContentStorageDep
+):
+    return PostsService(session, count_strategy, timeline_service, user_summary_loader, content_storage)
 
 
 PostsServiceDep = Annotated[PostsService, Depends(get_posts_service)]
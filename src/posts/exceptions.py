@@ -15,3 +15,19 @@ class UserNotPostAuthorException(HTTPException):
             status_code=status.HTTP_403_FORBIDDEN,
             detail='User is not author of this post'
         )
+
+
+class FileTooLargeException(HTTPException):
+    def __init__(self, max_size: int):
+        super().__init__(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f'File is larger than {max_size} bytes'
+        )
+
+
+class UploadNotFoundException(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='Uploaded file not found'
+        )
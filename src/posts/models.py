@@ -1,27 +1,38 @@
 from datetime import datetime
 from uuid import UUID
-from sqlalchemy import select, ForeignKey, func, text as sa_text
+from sqlalchemy import Computed, ForeignKey, Index, text as sa_text
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from src.database import Base
-from src.dependencies import SessionDep
+
+# Text search configuration of `search_vector` (queries must use the same one)
+SEARCH_CONFIG = 'english'
+
+# Title matches are ranked higher than description ones
+SEARCH_VECTOR_EXPRESSION = (
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'B')"
+)
 
 
 class PostModel(Base):
     __tablename__ = 'post'
+    __table_args__ = (
+        Index('ix_post_created_at_id', 'created_at', 'id'),  # Keyset pagination
+        Index('ix_post_author_id_created_at_id', 'author_id', 'created_at', 'id'),  # Posts by author
+        Index('ix_post_search_vector', 'search_vector', postgresql_using='gin'),  # Full-text search
+    )
     
     title: Mapped[str]
     description: Mapped[str]
     image_url: Mapped[str]
+    variants: Mapped[dict | None] = mapped_column(JSONB)  # `ImageVariants`, empty until image is processed
     author_id: Mapped[UUID] = mapped_column(ForeignKey('user.id', ondelete='CASCADE'))
     updated_at: Mapped[datetime] = mapped_column(
         server_default=sa_text('TIMEZONE(\'UTC\', NOW())'),
         onupdate=sa_text('TIMEZONE(\'UTC\', NOW())')
     )
+    # Maintained by database, deferred so it is not selected with posts
+    search_vector: Mapped[str] = mapped_column(TSVECTOR, Computed(SEARCH_VECTOR_EXPRESSION, persisted=True), deferred=True)
     
-    author = relationship('UserModel', back_populates='posts', lazy='selectin', passive_deletes=True)
-    
-    @classmethod
-    async def count(cls, session: SessionDep):
-        query = select(func.count()).select_from(cls)
-        result = await session.execute(query)
-        return result.scalars().first()
+    author = relationship('UserModel', back_populates='posts', lazy='noload', passive_deletes=True)  # Never loaded with post, authors are batched by `UserSummaryLoader`
@@ -1,46 +1,97 @@
 from uuid import UUID
 from typing import Annotated
-from fastapi import APIRouter, Form, UploadFile
-from fastapi_cache.decorator import cache
-from src.posts import Post, PostCreate, PostUpdate
+from fastapi import APIRouter, BackgroundTasks, Form, Query, UploadFile
+from src.posts import Post, PostCreate, PostUpdate, PostUploadUrlRequest, PostUploadUrl, PostFinalize
 from src.posts.dependencies import PostsServiceDep
+from src.posts.utils import normalize_search_query
+from src.posts.tasks import create_post_variants
 from src.auth.dependencies import CurrentUserDep
 from src.aws.dependencies import S3ClientDep
 from src.dependencies import PaginationDep
 from src.schemas import SuccessResponse, DataListResponse, PaginationInfo
+from src.serialization import json_response, RawJSONCoder
 from src.decorators import default_router_exceptions
+from src.cache import cache, tagged_key_builder
+from src.config import settings
 
 router = APIRouter(prefix='/api/posts', tags=['posts'])
 
 
 @router.get('/feed', response_model=DataListResponse[Post])
 @default_router_exceptions
-async def get_posts_feed(user: CurrentUserDep, pagination: PaginationDep, posts_service: PostsServiceDep):
-    posts, count = await posts_service.get_feed(user, pagination)
-    return DataListResponse(
-        data=posts, 
-        pagination=PaginationInfo(
+async def get_posts_feed(
+    user: CurrentUserDep, 
+    pagination: PaginationDep, 
+    posts_service: PostsServiceDep, 
+    with_author: bool = False
+):
+    posts, count, next_cursor = await posts_service.get_feed(user, pagination, with_author)
+    return json_response(DataListResponse[Post], {
+        'data': posts, 
+        'pagination': PaginationInfo(
             offset=pagination.offset, 
             limit = pagination.limit, 
-            count=count
+            cursor=pagination.cursor,
+            count=count,
+            next_cursor=next_cursor
         )
-    )
+    })
+
+
+@router.get('/search', response_model=DataListResponse[Post])
+@default_router_exceptions
+@cache(
+    expire=settings.SEARCH_CACHE_TTL, 
+    key_builder=tagged_key_builder(normalizers={'q': normalize_search_query}),
+    coder=RawJSONCoder
+)
+async def search_posts(
+    q: Annotated[str, Query(min_length=1, max_length=settings.SEARCH_QUERY_MAX_LENGTH)], 
+    pagination: PaginationDep, 
+    posts_service: PostsServiceDep, 
+    with_author: bool = False
+):
+    posts, count, next_cursor = await posts_service.search(q, pagination, with_author)
+    return json_response(DataListResponse[Post], {
+        'data': posts, 
+        'pagination': PaginationInfo(
+            offset=pagination.offset, 
+            limit = pagination.limit, 
+            cursor=pagination.cursor,
+            count=count,
+            next_cursor=next_cursor
+        )
+    })
 
 
 @router.get('/{post_id}', response_model=Post)
 @default_router_exceptions
-@cache(expire=60)
-async def get_post(post_id: UUID, posts_service: PostsServiceDep):
-    post = await posts_service.get(post_id)
+@cache(expire=settings.CACHE_EXPIRE, key_builder=tagged_key_builder('post:{post_id}'))
+async def get_post(post_id: UUID, posts_service: PostsServiceDep, with_author: bool = False):
+    post = await posts_service.get(post_id, with_author)
     return post
 
 
-@router.get('/user/{user_id}', response_model=list[Post])
+@router.get('/user/{user_id}', response_model=DataListResponse[Post])
 @default_router_exceptions
-@cache(expire=60)
-async def get_posts_by_user(user_id: UUID, posts_service: PostsServiceDep):
-    posts = await posts_service.get_by_user(user_id)
-    return posts
+@cache(expire=settings.CACHE_EXPIRE, key_builder=tagged_key_builder('author:{user_id}'), coder=RawJSONCoder)
+async def get_posts_by_user(
+    user_id: UUID, 
+    pagination: PaginationDep, 
+    posts_service: PostsServiceDep, 
+    with_author: bool = False
+):
+    posts, count, next_cursor = await posts_service.get_by_user(user_id, pagination, with_author)
+    return json_response(DataListResponse[Post], {
+        'data': posts, 
+        'pagination': PaginationInfo(
+            offset=pagination.offset, 
+            limit = pagination.limit, 
+            cursor=pagination.cursor,
+            count=count,
+            next_cursor=next_cursor
+        )
+    })
 
 
 @router.post('/upload', response_model=Post)
@@ -51,10 +102,40 @@ async def upload_post(
     file: UploadFile,
     user: CurrentUserDep, 
     posts_service: PostsServiceDep,
-    client: S3ClientDep
+    client: S3ClientDep,
+    bg_task: BackgroundTasks
 ):
     data = PostCreate(title=title, description=description)
-    post = await posts_service.upload(user, data, file, client)
+    post, image_task = await posts_service.upload(user, data, file, client)
+    if image_task:
+        bg_task.add_task(create_post_variants, image_task, client)
+    return post
+
+
+@router.post('/upload-url', response_model=PostUploadUrl)
+@default_router_exceptions
+async def create_upload_url(
+    data: PostUploadUrlRequest, 
+    user: CurrentUserDep, 
+    posts_service: PostsServiceDep, 
+    client: S3ClientDep
+):
+    upload_url = await posts_service.create_upload_url(user, data, client)
+    return upload_url
+
+
+@router.post('/finalize', response_model=Post)
+@default_router_exceptions
+async def finalize_upload(
+    data: PostFinalize, 
+    user: CurrentUserDep, 
+    posts_service: PostsServiceDep, 
+    client: S3ClientDep, 
+    bg_task: BackgroundTasks
+):
+    post, image_task = await posts_service.finalize_upload(user, data, client)
+    if image_task:
+        bg_task.add_task(create_post_variants, image_task, client)
     return post
 
 
@@ -1,6 +1,8 @@
 from uuid import UUID
 from datetime import datetime
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
+from src.auth.users.schemas import UserSummary
+from src.images import ImageVariants
 
 
 class PostBase(BaseModel):
@@ -20,7 +22,33 @@ class Post(PostBase):
     model_config = ConfigDict(from_attributes=True)  # Same as "orm_mode = True"
     
     id: UUID
-    image_url: str
+    image_url: str  # Original image
+    variants: ImageVariants | None = None  # Resized copies (None while image is processed)
     author_id: UUID
     created_at: datetime
     updated_at: datetime
+    author: UserSummary | None = None  # Embedded only on request (`with_author`)
+
+
+class PostUploadUrlRequest(BaseModel):
+    content_type: str
+    size: int = Field(gt=0)
+
+
+class PostUploadUrl(BaseModel):
+    '''Presigned POST policy, file is sent to `url` as multipart form with `fields` and `file` field last'''
+    url: str
+    fields: dict[str, str]
+    object_name: str
+    expires_in: int
+
+
+class PostFinalize(PostCreate):
+    object_name: str
+
+
+class PostImageTaskSchema(BaseModel):
+    '''Image of created post, which variants are created after response is sent'''
+    post_id: UUID
+    author_id: UUID
+    object_name: str  # Key of original image, it is downloaded by task (not kept in memory till response is sent)
@@ -1,63 +1,266 @@
 from uuid import UUID
-from sqlalchemy import select, update
+from sqlalchemy import select, update, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import UploadFile
-from src.posts import Post, PostCreate, PostUpdate, PostModel
+from src.posts import (
+    Post, PostCreate, PostUpdate, PostModel, PostUploadUrlRequest, PostUploadUrl, PostFinalize, PostImageTaskSchema
+)
+from src.posts.models import SEARCH_CONFIG
 from src.schemas import PaginationParams
-from src.auth.users import User, UserModel
+from src.pagination import paginate, paginate_ranked
+from src.counting import CountStrategy
+from src.timeline.service import TimelineService
+from src.auth.users.summary_loader import UserSummaryLoader
+from src.serialization import get_type_adapter
+from src.cache import invalidate_tags
+from src.auth.users import User
 from src.aws.client import S3Client
-from src.posts.exceptions import InvalidFileTypeException, UserNotPostAuthorException
+from src.aws.storage import ContentStorage
+from src.aws.utils import generate_user_object_name, user_upload_prefix, finalized_object_name
+from src.images import ImageVariants
+from src.images.processing import render_image_async, upload_variants, create_variants
+from src.config import settings
+from src.posts.exceptions import (
+    InvalidFileTypeException, UserNotPostAuthorException, FileTooLargeException, UploadNotFoundException
+)
 
 
 class PostsService:
-    def __init__(self, session: AsyncSession):
+    def __init__(
+        self, 
+        session: AsyncSession, 
+        count_strategy: CountStrategy, 
+        timeline_service: TimelineService, 
+        user_summary_loader: UserSummaryLoader, 
+        content_storage: ContentStorage
+    ):
         self.session = session
+        self.count_strategy = count_strategy
+        self.timeline_service = timeline_service
+        self.user_summary_loader = user_summary_loader
+        self.content_storage = content_storage
     
-    async def get(self, post_id: UUID) -> Post:
+    async def get(self, post_id: UUID, with_author: bool = False) -> Post:
         post = await self.session.get(PostModel, post_id)
         post_schema = Post.model_validate(post)
+        if with_author:
+            await self._embed_authors([post_schema])
         return post_schema
     
-    async def get_feed(self, user: User, pagination: PaginationParams) -> tuple[list[Post], int]:
+    async def get_feed(
+        self, 
+        user: User, 
+        pagination: PaginationParams, 
+        with_author: bool = False
+    ) -> tuple[list[Post], int | None, str | None]:
         '''
-        Gets post feed with pagination
+        Gets home timeline of user (newest posts of followed authors) with offset or cursor pagination.
+        If user does not follow anyone, gets feed of all posts.
         Args:
             user: Current authenticated user
             pagintaion: Pagintaion params
+            with_author: Embed summaries of posts authors
         Returns:
-            tuple[list[Post], int] (Posts list and total count of posts in db)
+            tuple[list[Post], int | None, str | None] (Posts list, total count of posts 
+                (None if `include_count` is disabled) and next page cursor)
         '''
-        # TODO: Select posts with user preferences
-        # Now just selecting all posts in order with pagination
-        total_count = await PostModel.count(self.session)
+        if await self.timeline_service.is_following_anyone(user.id):
+            rows, total_count, next_cursor = await self.timeline_service.get(user.id, pagination)
+        else:
+            total_count = None
+            if pagination.include_count:
+                total_count = await self.count_strategy.count(self.session, PostModel)
+            rows, next_cursor = await paginate(self.session, select(PostModel), PostModel, pagination)
         
-        query = select(PostModel).limit(pagination.limit).offset(pagination.offset)
-        data = await self.session.execute(query)
-        posts = [Post.model_validate(p) for p in data.scalars().all()]
-        return posts, total_count
+        posts = await self._to_schemas(rows, with_author)
+        return posts, total_count, next_cursor
     
-    async def get_by_user(self, user_id: UUID) -> list[Post]:
+    async def get_by_user(
+        self, 
+        user_id: UUID, 
+        pagination: PaginationParams, 
+        with_author: bool = False
+    ) -> tuple[list[Post], int | None, str | None]:
         '''
-        Gets first 10 posts with user_id authorship
+        Gets posts with user_id authorship (newest first) with offset or cursor pagination
         Args:
             user_id: Posts author id
+            pagination: Pagination params
+            with_author: Embed summary of posts author
         Returns:
-            list[Post] (List with posts)
+            tuple[list[Post], int | None, str | None] (Posts list, total count of author posts 
+                (None if `include_count` is disabled) and next page cursor)
         '''
-        user = await self.session.get(UserModel, user_id)
-        posts = [Post.model_validate(post) for post in user.posts[:10]]
-        return posts
+        total_count = None
+        if pagination.include_count:
+            count_query = select(func.count()).select_from(PostModel).where(PostModel.author_id == user_id)
+            total_count = (await self.session.execute(count_query)).scalar_one()
+        
+        query = select(PostModel).where(PostModel.author_id == user_id)
+        rows, next_cursor = await paginate(self.session, query, PostModel, pagination)
+        posts = await self._to_schemas(rows, with_author)
+        return posts, total_count, next_cursor
+    
+    async def search(
+        self, 
+        query: str, 
+        pagination: PaginationParams, 
+        with_author: bool = False
+    ) -> tuple[list[Post], int | None, str | None]:
+        '''
+        Full-text search over posts titles and descriptions, most relevant first.
+        Matching posts are found by GIN index, so only matches are ranked.
+        Args:
+            query: Search query in web search syntax (e.g. `"exact phrase" cats or dogs -birds`)
+            pagination: Pagination params
+            with_author: Embed summaries of posts authors
+        Returns:
+            tuple[list[Post], int | None, str | None] (Posts list, total count of matching posts 
+                (None if `include_count` is disabled) and next page cursor)
+        '''
+        ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, query)
+        matches = PostModel.search_vector.bool_op('@@')(ts_query)
+        
+        total_count = None
+        if pagination.include_count:
+            count_query = select(func.count()).select_from(PostModel).where(matches)
+            total_count = (await self.session.execute(count_query)).scalar_one()
         
+        rank = func.ts_rank(PostModel.search_vector, ts_query)
+        query = select(PostModel).where(matches)
+        rows, next_cursor = await paginate_ranked(self.session, query, PostModel, rank, pagination)
+        posts = await self._to_schemas(rows, with_author)
+        return posts, total_count, next_cursor
     
-    async def upload(self, user: User, data: PostCreate, file: UploadFile, client: S3Client) -> Post:
+    async def upload(
+        self, 
+        user: User, 
+        data: PostCreate, 
+        file: UploadFile, 
+        client: S3Client
+    ) -> tuple[Post, PostImageTaskSchema | None]:
+        '''
+        Uploads original image and creates post. Image variants are created depending on `IMAGE_PROCESSING`:
+        before post is created (`inline`), by returned task after response is sent (`deferred`) or never.
+        Variants created for the same content before are reused.
+        Args:
+            user: Post author
+            data: Post fields
+            file: Image
+            client: S3 client
+        Returns:
+            tuple[Post, PostImageTaskSchema | None] (Created post and image task data for deferred processing)
+        '''
         if not file.content_type.startswith('image/'):
             raise InvalidFileTypeException()
-        image_url = await client.upload_file(file)
         
-        post = PostModel(title=data.title, description=data.description, image_url=image_url, author_id=user.id)
-        await post.save(self.session)
-        post_schema = Post.model_validate(post)
-        return post_schema
+        # Image with already stored content is not uploaded and rendered again (reference is committed with post)
+        key = await self.content_storage.key_of(file)
+        upload_rendered = None
+        if settings.IMAGE_PROCESSING == 'inline' and await self.content_storage.get_variants(key) is None:
+            # Image is decoded as a whole before anything is stored, so undecodable file is rejected
+            rendered = await render_image_async(await file.read())
+            await file.seek(0)
+            
+            async def upload_rendered() -> dict:
+                return (await upload_variants(client, rendered, key)).model_dump()
+        
+        # Deferred task downloads stored image, so file is streamed to storage without reading it into memory
+        image_url, stored_variants = await self.content_storage.store(file, key, upload_rendered)
+        
+        variants = ImageVariants.model_validate(stored_variants) if stored_variants else None
+        post = await self._create(user, data, image_url, variants)
+        image_task = None
+        if settings.IMAGE_PROCESSING == 'deferred' and variants is None:
+            image_task = PostImageTaskSchema(
+                post_id=post.id, 
+                author_id=post.author_id, 
+                object_name=key
+            )
+        return post, image_task
+    
+    async def create_upload_url(self, user: User, data: PostUploadUrlRequest, client: S3Client) -> PostUploadUrl:
+        '''
+        First step of direct upload: presigns POST of image straight into storage
+        (content type and size are enforced by storage, file does not pass through API)
+        '''
+        if not data.content_type.startswith('image/'):
+            raise InvalidFileTypeException()
+        if data.size > settings.S3_PRESIGNED_MAX_SIZE:
+            raise FileTooLargeException(settings.S3_PRESIGNED_MAX_SIZE)
+        
+        object_name = generate_user_object_name(user.id, data.content_type)
+        presigned = await client.generate_upload_post(object_name, data.content_type, data.size)
+        return PostUploadUrl(
+            url=presigned['url'], 
+            fields=presigned['fields'], 
+            object_name=object_name, 
+            expires_in=settings.S3_PRESIGNED_EXPIRE
+        )
+    
+    async def finalize_upload(
+        self, 
+        user: User, 
+        data: PostFinalize, 
+        client: S3Client
+    ) -> tuple[Post, PostImageTaskSchema | None]:
+        '''
+        Second step of direct upload: checks uploaded object with HEAD request, moves it out of
+        expiring uploads (server-side copy) and creates post.
+        Image variants are created like in `upload` (image is downloaded from storage for it).
+        Concurrent finalizations of the same upload create one post, which is returned to all of them.
+        Args:
+            user: Post author
+            data: Post fields and key of uploaded object
+            client: S3 client
+        Returns:
+            tuple[Post, PostImageTaskSchema | None] (Created post and image task data for deferred processing)
+        '''
+        # Keys of other users are reported as missing, so their uploads can not be probed
+        if not data.object_name.startswith(user_upload_prefix(user.id)):
+            raise UploadNotFoundException()
+        metadata = await client.head_object(data.object_name)
+        if metadata is None:
+            raise UploadNotFoundException()
+        if not metadata.get('ContentType', '').startswith('image/'):
+            raise InvalidFileTypeException()
+        if metadata['ContentLength'] > settings.S3_PRESIGNED_MAX_SIZE:
+            raise FileTooLargeException(settings.S3_PRESIGNED_MAX_SIZE)
+        
+        object_name = finalized_object_name(data.object_name)
+        
+        async def copy() -> dict | None:
+            await client.copy_object(data.object_name, object_name)
+            if settings.IMAGE_PROCESSING == 'inline':
+                return (await create_variants(client, object_name)).model_dump()
+            return None
+        
+        # Copy is counted like stored content, so it is deleted with the post and is never shared by two posts
+        try:
+            image_url, stored_variants, referenced = await self.content_storage.store_copy(
+                object_name, 
+                metadata['ContentLength'], 
+                copy
+            )
+            if not referenced:  # Finalized by concurrent request
+                query = select(PostModel).where(PostModel.image_url == image_url)
+                post = await self.session.scalar(query)
+                if post is None:  # Deleted already
+                    raise UploadNotFoundException()
+                return Post.model_validate(post), None
+            variants = ImageVariants.model_validate(stored_variants) if stored_variants else None
+            post = await self._create(user, data, image_url, variants)
+        except Exception:
+            # Failed finalization may be retried with the same upload, so only the copy is deleted
+            await self.session.rollback()
+            await self.content_storage.discard(object_name)
+            raise
+        
+        await client.delete_object(data.object_name)
+        image_task = None
+        if settings.IMAGE_PROCESSING == 'deferred':
+            image_task = PostImageTaskSchema(post_id=post.id, author_id=post.author_id, object_name=object_name)
+        return post, image_task
     
     async def edit(self, user: User, post_id: UUID, data: PostUpdate) -> None:
         post = await self.session.get(PostModel, post_id)
@@ -66,11 +269,41 @@ class PostsService:
         query = update(PostModel).where(PostModel.id == post_id).values(**data.model_dump(exclude_unset=True))
         await self.session.execute(query)
         await self.session.commit()
+        await invalidate_tags(f'post:{post_id}', f'author:{post.author_id}')
     
     async def delete(self, user: User, post_id: UUID) -> None:
         post = await self.session.get(PostModel, post_id)
         if user.id != post.author_id:
             raise UserNotPostAuthorException()
         await self.session.delete(post)
+        await self.content_storage.release(post.image_url)
         await self.session.commit()
-    
\ No newline at end of file
+        await self.content_storage.purge()
+        await self.timeline_service.remove(post)
+        await invalidate_tags(f'post:{post_id}', f'author:{post.author_id}')
+    
+    async def _create(self, user: User, data: PostCreate, image_url: str, variants: ImageVariants | None) -> Post:
+        post = PostModel(
+            title=data.title, 
+            description=data.description, 
+            image_url=image_url, 
+            variants=variants.model_dump() if variants else None,
+            author_id=user.id
+        )
+        await post.save(self.session)
+        await self.timeline_service.fan_out(post)
+        await invalidate_tags(f'author:{post.author_id}')
+        return Post.model_validate(post)
+    
+    async def _to_schemas(self, rows: list[PostModel], with_author: bool) -> list[Post]:
+        # Validated instances are not validated again by response serialization
+        posts = get_type_adapter(list[Post]).validate_python(rows, from_attributes=True)
+        if with_author:
+            await self._embed_authors(posts)
+        return posts
+    
+    async def _embed_authors(self, posts: list[Post]) -> None:
+        '''Embeds authors summaries into posts, all authors are loaded in one batch'''
+        authors = await self.user_summary_loader.load_many(post.author_id for post in posts)
+        for post in posts:
+            post.author = authors.get(post.author_id)
@@ -0,0 +1,30 @@
+import logging
+from sqlalchemy import update
+from src.posts import PostModel, PostImageTaskSchema
+from src.images.processing import create_variants
+from src.aws.client import S3Client
+from src.aws.storage import ContentStorage
+from src.database import SessionFactory
+from src.cache import invalidate_tags
+
+
+async def create_post_variants(payload: PostImageTaskSchema, client: S3Client):
+    '''Creates variants of post image after upload response is sent (post keeps original image on failure)'''
+    try:
+        variants = await create_variants(client, payload.object_name)
+    except Exception as ex:
+        logging.getLogger('error_logger').error(f'Variants of post {payload.post_id} image were not created: {ex!r}')
+        return
+    
+    # Request session is closed already, `updated_at` is kept as post itself is not edited
+    query = (
+        update(PostModel)
+        .where(PostModel.id == payload.post_id)
+        .values(variants=variants.model_dump(), updated_at=PostModel.updated_at)
+    )
+    async with SessionFactory() as session:
+        await session.execute(query)
+        # Next uploads of the same content reuse variants instead of rendering them again
+        await ContentStorage(session, client).set_variants(payload.object_name, variants.model_dump())
+        await session.commit()
+    await invalidate_tags(f'post:{payload.post_id}', f'author:{payload.author_id}')
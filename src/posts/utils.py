@@ -0,0 +1,3 @@
+def normalize_search_query(query: str) -> str:
+    '''Lowercases query and collapses whitespace (it does not change matched posts, so it is used for cache key)'''
+    return ' '.join(query.lower().split())
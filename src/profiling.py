@@ -0,0 +1,120 @@
+'''
+Opt-in tracing of single requests. Trace is enabled for request with valid signed
+`X-Debug-Trace` header or by `PROFILING_SAMPLE_RATE`, instrumented code records spans
+(SQL statements, cache lookups, bcrypt, S3, handler and serialization) into it.
+When no trace is active, recording a span is one context variable lookup.
+'''
+import cProfile
+import hashlib
+import hmac
+import io
+import pstats
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from uuid import uuid4
+from src.config import settings
+
+TRACE_HEADER = 'x-debug-trace'
+PROFILE_HEADER = 'x-debug-profile'
+
+# Longer statements are cut in stored traces
+MAX_SPAN_NAME_LENGTH = 500
+
+
+def trace_key(trace_id: str) -> str:
+    return f'debug_trace:{trace_id}'
+
+
+@dataclass
+class Span:
+    category: str
+    name: str
+    start: float  # Seconds since request start
+    duration: float
+
+
+@dataclass
+class RequestTrace:
+    method: str
+    path: str
+    id: str = field(default_factory=lambda: uuid4().hex)
+    started: float = field(default_factory=time.perf_counter)
+    spans: list[Span] = field(default_factory=list)
+    profile: cProfile.Profile | None = None
+    
+    def add_span(self, category: str, name: str, started: float, duration: float) -> None:
+        self.spans.append(Span(category, name[:MAX_SPAN_NAME_LENGTH], started - self.started, duration))
+    
+    def totals(self) -> dict[str, tuple[int, float]]:
+        '''Count and total duration of spans by category'''
+        totals = {}
+        for span in self.spans:
+            count, duration = totals.get(span.category, (0, 0.0))
+            totals[span.category] = (count + 1, duration + span.duration)
+        return totals
+    
+    def as_dict(self, duration: float, status: int) -> dict:
+        data = {
+            'id': self.id,
+            'method': self.method,
+            'path': self.path,
+            'status': status,
+            'duration_ms': duration * 1000,
+            'spans': [
+                {
+                    'category': span.category,
+                    'name': span.name,
+                    'start_ms': span.start * 1000,
+                    'duration_ms': span.duration * 1000
+                }
+                for span in self.spans
+            ]
+        }
+        if self.profile:
+            stream = io.StringIO()
+            pstats.Stats(self.profile, stream=stream).sort_stats('cumulative').print_stats(40)
+            data['profile'] = stream.getvalue()
+        return data
+
+
+current_trace: ContextVar[RequestTrace | None] = ContextVar('current_trace', default=None)
+
+
+def record_span(category: str, name: str, started: float, duration: float) -> None:
+    '''Adds span to trace of current request (if it is traced), `started` is `time.perf_counter()` value'''
+    trace = current_trace.get()
+    if trace is not None:
+        trace.add_span(category, name, started, duration)
+
+
+@contextmanager
+def trace_span(category: str, name: str):
+    '''Records duration of `with` block as span (works with `await` inside block)'''
+    if current_trace.get() is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(category, name, started, time.perf_counter() - started)
+
+
+def sign_trace_request(expires_at: int) -> str:
+    '''
+    Builds value of `X-Debug-Trace` header valid until `expires_at` unix time
+    (e.g. `sign_trace_request(int(time.time()) + 3600)`)
+    '''
+    signature = hmac.new(settings.PROFILING_SECRET.encode(), str(expires_at).encode(), hashlib.sha256).hexdigest()
+    return f'{expires_at}.{signature}'
+
+
+def is_trace_request_signed(value: str | None) -> bool:
+    if not value or not settings.PROFILING_SECRET:
+        return False
+    expires_at, _, signature = value.partition('.')
+    if not expires_at.isdigit() or int(expires_at) < time.time():
+        return False
+    return hmac.compare_digest(sign_trace_request(int(expires_at)), value)
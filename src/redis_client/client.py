@@ -1,21 +1,119 @@
+import time
 from typing import Any
 from redis import asyncio as aioredis
+from redis.asyncio.client import Pipeline
+from redis.commands.core import AsyncScript
+
+
+class TimedConnectionPool(aioredis.BlockingConnectionPool):
+    '''Blocking pool (waits for free connection instead of raising) which measures waiting time'''
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.acquired_count = 0
+        self.wait_seconds = 0.0
+    
+    async def get_connection(self, *args, **kwargs):
+        started = time.perf_counter()
+        connection = await super().get_connection(*args, **kwargs)
+        self.wait_seconds += time.perf_counter() - started
+        self.acquired_count += 1
+        return connection
 
 
 class RedisClient:
-    def __init__(self, host, endcoding='utf-8'):
-        self.connection = aioredis.from_url(f'redis://{host}', encoding=endcoding)
+    def __init__(
+        self, 
+        host, 
+        endcoding='utf-8', 
+        max_connections: int = 50, 
+        socket_timeout: float | None = None, 
+        socket_connect_timeout: float | None = None,
+        pool_timeout: float | None = None
+    ):
+        self.pool = TimedConnectionPool.from_url(
+            f'redis://{host}', 
+            encoding=endcoding,
+            max_connections=max_connections,
+            timeout=pool_timeout,
+            socket_timeout=socket_timeout,
+            socket_connect_timeout=socket_connect_timeout
+        )
+        self.connection = aioredis.Redis(connection_pool=self.pool)
+    
+    async def close(self) -> None:
+        await self.connection.aclose()
+        await self.pool.disconnect()
+    
+    def pool_stats(self) -> dict:
+        return {
+            'max_connections': self.pool.max_connections,
+            'in_use': len(self.pool._in_use_connections),
+            'idle': len(self.pool._available_connections),
+            'acquired': self.pool.acquired_count,
+            'wait_seconds': self.pool.wait_seconds,
+        }
     
     async def get(self, key) -> Any | None:
         return await self.connection.get(key)
     
+    async def mget(self, keys) -> list[Any | None]:
+        '''Gets values of many keys in one round-trip (None for missing keys)'''
+        if not keys:
+            return []
+        return await self.connection.mget(keys)
+    
+    async def setex_many(self, mapping: dict, ttl) -> None:
+        '''Sets many keys with the same TTL in one round-trip'''
+        if not mapping:
+            return
+        pipe = self.connection.pipeline(transaction=False)
+        for key, val in mapping.items():
+            pipe.setex(key, ttl, val)
+        await pipe.execute()
+    
     async def setex(self, key, ttl, val) -> Any | None:
         return await self.connection.setex(key, ttl, val)
     
+    async def exists(self, *keys) -> int:
+        return await self.connection.exists(*keys)
+    
+    async def delete(self, *keys) -> int:
+        return await self.connection.delete(*keys)
+    
+    async def expire(self, key, ttl) -> bool:
+        return await self.connection.expire(key, ttl)
+    
+    async def hget(self, key, field) -> Any | None:
+        return await self.connection.hget(key, field)
+    
+    async def hdel(self, key, *fields) -> int:
+        return await self.connection.hdel(key, *fields)
+    
+    async def zcard(self, key) -> int:
+        return await self.connection.zcard(key)
+    
+    async def zcount(self, key, min, max) -> int:
+        return await self.connection.zcount(key, min, max)
+    
+    async def zrem(self, key, *members) -> int:
+        return await self.connection.zrem(key, *members)
+    
+    async def zrangebyscore(self, key, min, max) -> list[bytes]:
+        return await self.connection.zrangebyscore(key, min, max)
+    
+    async def zrevrangebyscore(self, key, max, min, start: int, num: int) -> list[tuple[bytes, float]]:
+        return await self.connection.zrevrangebyscore(key, max, min, start=start, num=num, withscores=True)
+    
+    def pipeline(self, transaction: bool = True) -> Pipeline:
+        return self.connection.pipeline(transaction=transaction)
+    
+    def register_script(self, script: str) -> AsyncScript:
+        return self.connection.register_script(script)
+    
     async def is_connected(self) -> bool:
         try:
             await self.connection.ping()
             return True
-        except aioredis.TimeoutError:
+        except (aioredis.TimeoutError, aioredis.ConnectionError):
             return False
     
\ No newline at end of file
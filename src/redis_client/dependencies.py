@@ -3,9 +3,28 @@ from fastapi import Depends
 from src.redis_client.client import RedisClient
 from src.config import settings
 
+# App scoped client (one connection pool per process), created on first use (in app lifespan)
+redis_client: RedisClient | None = None
 
-def get_redis_client():
-    return RedisClient(settings.REDIS_HOST)
+
+def get_redis_client() -> RedisClient:
+    global redis_client
+    if redis_client is None:
+        redis_client = RedisClient(
+            settings.REDIS_HOST,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT,
+            pool_timeout=settings.REDIS_POOL_TIMEOUT
+        )
+    return redis_client
+
+
+async def close_redis_client() -> None:
+    global redis_client
+    if redis_client is not None:
+        await redis_client.close()
+        redis_client = None
 
 
 RedisClientDep = Annotated[RedisClient, Depends(get_redis_client)]
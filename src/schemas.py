@@ -8,10 +8,13 @@ class SuccessResponse(BaseModel):
 class PaginationParams(BaseModel):
     limit: int = Field(10, ge=1, le=100)
     offset: int = Field(0, ge=0)
+    cursor: str | None = None
+    include_count: bool = True
 
 
 class PaginationInfo(PaginationParams):
-    count: int = Field(0, ge=0)
+    count: int | None = Field(None, ge=0)
+    next_cursor: str | None = None
 
 
 class DataListResponse[T](BaseModel):
@@ -0,0 +1,45 @@
+from functools import cache
+from typing import Any
+from fastapi.responses import JSONResponse
+from fastapi_cache.coder import JsonCoder
+from pydantic import TypeAdapter
+from src.profiling import trace_span
+
+
+class RawJSONResponse(JSONResponse):
+    '''JSON response of already dumped bytes (it is `JSONResponse`, so `fastapi_cache` stores its body as is)'''
+    def render(self, content: bytes) -> bytes:
+        return content
+
+
+class RawJSONCoder(JsonCoder):
+    '''Coder for cached endpoints returning `json_response`: cached body is sent without decoding and validation'''
+    @classmethod
+    def decode_as_type(cls, value: bytes, *, type_: Any) -> RawJSONResponse:
+        return RawJSONResponse(value)
+
+
+@cache
+def get_type_adapter(tp: Any) -> TypeAdapter:
+    '''Building of TypeAdapter compiles core schema, so it is done once per type'''
+    return TypeAdapter(tp)
+
+
+def json_response(tp: Any, data: Any, status_code: int = 200) -> RawJSONResponse:
+    '''
+    Validates data (ORM objects are read by attributes) with cached TypeAdapter and dumps it
+    straight to JSON bytes by pydantic-core.
+    Returned response bypasses `response_model` validation and `jsonable_encoder` of FastAPI,
+    so `response_model` of endpoint is only used as OpenAPI schema.
+    Cached endpoints pass `coder=RawJSONCoder` to `cache`, so cache hits skip validation too.
+    Args:
+        tp: Response schema type (e.g. `DataListResponse[Post]`)
+        data: Schema instance, ORM object or dict of them
+        status_code: Response status code
+    Returns:
+        RawJSONResponse
+    '''
+    adapter = get_type_adapter(tp)
+    with trace_span('serialize', str(tp)):
+        content = adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+    return RawJSONResponse(content, status_code=status_code)
@@ -0,0 +1 @@
+from src.timeline.models import FollowModel
@@ -0,0 +1,12 @@
+from typing import Annotated
+from fastapi import Depends
+from src.dependencies import SessionDep
+from src.redis_client.dependencies import RedisClientDep
+from src.timeline.service import TimelineService
+
+
+def get_timeline_service(session: SessionDep, redis_client: RedisClientDep):
+    return TimelineService(session, redis_client)
+
+
+TimelineServiceDep = Annotated[TimelineService, Depends(get_timeline_service)]
@@ -0,0 +1,9 @@
+from fastapi import HTTPException, status
+
+
+class CannotFollowYourselfException(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='User can not follow himself'
+        )
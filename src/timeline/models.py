@@ -0,0 +1,14 @@
+from uuid import UUID
+from sqlalchemy import ForeignKey, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+from src.database import Base
+
+
+class FollowModel(Base):
+    __tablename__ = 'follow'
+    __table_args__ = (
+        UniqueConstraint('follower_id', 'followee_id', name='uq_follow_follower_id_followee_id'),
+    )
+    
+    follower_id: Mapped[UUID] = mapped_column(ForeignKey('user.id', ondelete='CASCADE'))
+    followee_id: Mapped[UUID] = mapped_column(ForeignKey('user.id', ondelete='CASCADE'), index=True)
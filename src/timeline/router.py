@@ -0,0 +1,22 @@
+from uuid import UUID
+from fastapi import APIRouter
+from src.timeline.dependencies import TimelineServiceDep
+from src.auth.dependencies import CurrentUserDep
+from src.schemas import SuccessResponse
+from src.decorators import default_router_exceptions
+
+router = APIRouter(prefix='/api/timeline', tags=['timeline'])
+
+
+@router.post('/follow/{user_id}', response_model=SuccessResponse)
+@default_router_exceptions
+async def follow(user_id: UUID, user: CurrentUserDep, timeline_service: TimelineServiceDep):
+    await timeline_service.follow(user.id, user_id)
+    return SuccessResponse(message='User successfully followed')
+
+
+@router.delete('/follow/{user_id}', response_model=SuccessResponse)
+@default_router_exceptions
+async def unfollow(user_id: UUID, user: CurrentUserDep, timeline_service: TimelineServiceDep):
+    await timeline_service.unfollow(user.id, user_id)
+    return SuccessResponse(message='User successfully unfollowed')
@@ -0,0 +1,215 @@
+from datetime import datetime, UTC
+from uuid import UUID
+from sqlalchemy import select, update, delete, exists, or_, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.posts import PostModel
+from src.auth.users import UserModel
+from src.timeline import FollowModel
+from src.redis_client.client import RedisClient
+from src.schemas import PaginationParams
+from src.pagination import encode_cursor, decode_cursor
+from src.auth.exceptions import UserNotFoundException
+from src.timeline.exceptions import CannotFollowYourselfException
+from src.config import settings
+
+# Empty sorted sets do not exist in redis, so every built timeline keeps
+# this member with zero score to tell "empty" and "not built" apart
+SENTINEL = ''
+
+# Push post into timeline only if it is already built (otherwise it will be built from db on read)
+# and trim it to max length (rank 0 is always the sentinel)
+PUSH_SCRIPT = '''
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    redis.call('ZADD', KEYS[1], ARGV[1], ARGV[2])
+    redis.call('ZREMRANGEBYRANK', KEYS[1], 1, -(tonumber(ARGV[3]) + 1))
+    return 1
+end
+return 0
+'''
+
+
+def timeline_key(user_id: UUID) -> str:
+    return f'timeline:{user_id}'
+
+
+def timeline_score(created_at: datetime) -> float:
+    return created_at.replace(tzinfo=UTC).timestamp()
+
+
+class TimelineService:
+    '''
+    Home timelines of posts from followed authors.
+    Posts are fanned out on write into per-user redis sorted sets (post id scored by creation time),
+    except posts of authors with more than `TIMELINE_FANOUT_LIMIT` followers,
+    which are fetched from db on read and merged with the precomputed part.
+    '''
+    def __init__(self, session: AsyncSession, redis_client: RedisClient):
+        self.session = session
+        self.redis_client = redis_client
+        self.push_script = redis_client.register_script(PUSH_SCRIPT)
+    
+    async def follow(self, user_id: UUID, followee_id: UUID) -> None:
+        if user_id == followee_id:
+            raise CannotFollowYourselfException()
+        user_exists = await self.session.scalar(select(exists().where(UserModel.id == followee_id)))
+        if not user_exists:
+            raise UserNotFoundException()
+        
+        query = (
+            insert(FollowModel)
+            .values(follower_id=user_id, followee_id=followee_id)
+            .on_conflict_do_nothing(constraint='uq_follow_follower_id_followee_id')
+        )
+        result = await self.session.execute(query)
+        if result.rowcount:
+            await self._change_followers_count(followee_id, 1)
+        await self.session.commit()
+        
+        # Timeline will be rebuilt with posts of new followee on next read
+        await self.redis_client.delete(timeline_key(user_id))
+    
+    async def unfollow(self, user_id: UUID, followee_id: UUID) -> None:
+        query = delete(FollowModel).where(FollowModel.follower_id == user_id, FollowModel.followee_id == followee_id)
+        result = await self.session.execute(query)
+        if result.rowcount:
+            await self._change_followers_count(followee_id, -1)
+        await self.session.commit()
+        
+        await self.redis_client.delete(timeline_key(user_id))
+    
+    async def is_following_anyone(self, user_id: UUID) -> bool:
+        return await self.session.scalar(select(exists().where(FollowModel.follower_id == user_id)))
+    
+    async def fan_out(self, post: PostModel) -> None:
+        '''Pushes new post into timelines of author and his followers (if author is not too popular)'''
+        pipe = self.redis_client.pipeline(transaction=False)
+        args = [timeline_score(post.created_at), str(post.id), settings.TIMELINE_MAX_LENGTH]
+        
+        for user_id in await self._fan_out_targets(post.author_id):
+            await self.push_script(keys=[timeline_key(user_id)], args=args, client=pipe)
+        await pipe.execute()
+    
+    async def remove(self, post: PostModel) -> None:
+        '''Removes post from timelines it was fanned out to'''
+        pipe = self.redis_client.pipeline(transaction=False)
+        for user_id in await self._fan_out_targets(post.author_id):
+            pipe.zrem(timeline_key(user_id), str(post.id))
+        await pipe.execute()
+    
+    async def get(self, user_id: UUID, pagination: PaginationParams) -> tuple[list[PostModel], int | None, str | None]:
+        '''
+        Gets home timeline page: ids of precomputed timeline are merged with ids of posts of popular followees,
+        then posts of page window only are selected in one batch by primary key.
+        Ids of deleted posts are removed from timeline and window is merged again, so page is never short.
+        Args:
+            user_id: Timeline owner id
+            pagination: Pagination params
+        Returns:
+            tuple[list[PostModel], int | None, str | None] (Posts list, approximate count of
+                timeline posts (None if `include_count` is disabled) and next page cursor)
+        '''
+        key = timeline_key(user_id)
+        if not await self.redis_client.exists(key):
+            await self._build(user_id)
+        
+        # With cursor page is selected after it, otherwise first `offset` ids of merged sources are skipped
+        skip = 0 if pagination.cursor else pagination.offset
+        cursor = decode_cursor(pagination.cursor) if pagination.cursor else None
+        while True:
+            # One extra post tells if there is a next page
+            window = (await self._merged_ids(key, user_id, cursor, skip + pagination.limit + 1))[skip:]
+            posts = {}
+            if window:
+                result = await self.session.execute(select(PostModel).where(PostModel.id.in_(window)))
+                posts = {post.id: post for post in result.scalars().all()}
+            
+            deleted = [str(post_id) for post_id in window if post_id not in posts]
+            if not deleted:
+                break
+            await self.redis_client.zrem(key, *deleted)
+        await self.redis_client.expire(key, settings.TIMELINE_TTL)
+        
+        page = [posts[post_id] for post_id in window[:pagination.limit]]
+        next_cursor = None
+        if len(window) > pagination.limit:
+            next_cursor = encode_cursor(page[-1].created_at, page[-1].id)
+        
+        total_count = None
+        if pagination.include_count:
+            total_count = max(await self.redis_client.zcard(key) - 1, 0)
+        return page, total_count, next_cursor
+    
+    async def _merged_ids(self, key: str, user_id: UUID, cursor: tuple[datetime, UUID] | None, num: int) -> list[UUID]:
+        '''First `num` post ids of timeline after cursor: ZREVRANGEBYSCORE merged with ids of pulled posts'''
+        max_score = '+inf'
+        fetched = num
+        pulled_query = self._pulled_posts_query(user_id).limit(num)
+        if cursor:
+            created_at, cursor_id = cursor
+            # Bound is inclusive, so posts created at the same time as cursor post are not skipped,
+            # those of them up to cursor are filtered by id (and are fetched in addition to `num`)
+            max_score = timeline_score(created_at)
+            fetched += await self.redis_client.zcount(key, max_score, max_score)
+            pulled_query = pulled_query.where(tuple_(PostModel.created_at, PostModel.id) < tuple_(created_at, cursor_id))
+        
+        entries = await self.redis_client.zrevrangebyscore(key, max_score, '(0', start=0, num=fetched)
+        pushed = [(score, UUID(member.decode())) for member, score in entries]
+        if cursor:
+            pushed = [entry for entry in pushed if entry < (max_score, cursor_id)]
+        result = await self.session.execute(pulled_query)
+        pulled = [(timeline_score(created_at), post_id) for post_id, created_at in result.all()]
+        
+        # Posts of author who passed fan-out limit can be in both sources
+        merged = dict.fromkeys(post_id for _, post_id in sorted([*pushed, *pulled], reverse=True))
+        return list(merged)[:num]
+    
+    async def _build(self, user_id: UUID) -> None:
+        '''Builds timeline from db (fan-out-on-read for cold or evicted timelines)'''
+        followees = self._followees_query(user_id, UserModel.followers_count <= settings.TIMELINE_FANOUT_LIMIT)
+        query = (
+            select(PostModel.id, PostModel.created_at)
+            .where(or_(PostModel.author_id == user_id, PostModel.author_id.in_(followees)))
+            .order_by(PostModel.created_at.desc(), PostModel.id.desc())
+            .limit(settings.TIMELINE_MAX_LENGTH)
+        )
+        result = await self.session.execute(query)
+        
+        mapping = {SENTINEL: 0}
+        mapping.update({str(post_id): timeline_score(created_at) for post_id, created_at in result.all()})
+        
+        key = timeline_key(user_id)
+        pipe = self.redis_client.pipeline()
+        pipe.delete(key)
+        pipe.zadd(key, mapping)
+        pipe.expire(key, settings.TIMELINE_TTL)
+        await pipe.execute()
+    
+    def _followees_query(self, user_id: UUID, *criteria):
+        return (
+            select(FollowModel.followee_id)
+            .join(UserModel, UserModel.id == FollowModel.followee_id)
+            .where(FollowModel.follower_id == user_id, *criteria)
+        )
+    
+    def _pulled_posts_query(self, user_id: UUID):
+        '''Ids and creation time of posts of followed authors with followers count over fan-out limit'''
+        followees = self._followees_query(user_id, UserModel.followers_count > settings.TIMELINE_FANOUT_LIMIT)
+        return (
+            select(PostModel.id, PostModel.created_at)
+            .where(PostModel.author_id.in_(followees))
+            .order_by(PostModel.created_at.desc(), PostModel.id.desc())
+        )
+    
+    async def _fan_out_targets(self, author_id: UUID) -> list[UUID]:
+        '''Author itself and his followers, if their count is within fan-out limit'''
+        followers_count = await self.session.scalar(select(UserModel.followers_count).where(UserModel.id == author_id))
+        if not followers_count or followers_count > settings.TIMELINE_FANOUT_LIMIT:
+            return [author_id]
+        
+        result = await self.session.execute(select(FollowModel.follower_id).where(FollowModel.followee_id == author_id))
+        return [author_id, *result.scalars().all()]
+    
+    async def _change_followers_count(self, user_id: UUID, delta: int) -> None:
+        query = update(UserModel).where(UserModel.id == user_id).values(followers_count=UserModel.followers_count + delta)
+        await self.session.execute(query)
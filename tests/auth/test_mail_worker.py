@@ -0,0 +1,217 @@
+import asyncio
+import smtplib
+import socket
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from uuid import uuid4
+import pytest
+from aiosmtpd.controller import Controller
+from pytest_asyncio import fixture
+from httpx import AsyncClient
+from sqlalchemy import select, delete, update
+from src.auth.email import MailTaskSchema, MailBodySchema
+from src.auth.email.models import MailOutboxModel
+from src.auth.email.outbox import MailOutbox, UTC_NOW
+from src.auth.email.worker import MailWorker, SMTPPool
+from src.auth.users import User
+from src.config import settings
+from tests.conftest import test_async_client, session_factory_test
+
+
+class CollectingHandler:
+    '''Accepts mail, except for recipients starting with `refused` (5xx reply) or `busy` (4xx reply)'''
+    def __init__(self):
+        self.envelopes = []
+        self.peers = set()  # Client addresses, one per connection
+    
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        self.peers.add(session.peer)
+        if address.startswith('refused'):
+            return '550 No such user'
+        if address.startswith('busy'):
+            return '450 Mailbox busy'
+        envelope.rcpt_tos.append(address)
+        return '250 OK'
+    
+    async def handle_DATA(self, server, session, envelope):
+        self.envelopes.append(envelope)
+        return '250 OK'
+
+
+@pytest.fixture
+def smtp_handler(monkeypatch):
+    handler = CollectingHandler()
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    controller = Controller(handler, hostname='127.0.0.1', port=port)
+    controller.start()
+    monkeypatch.setattr(settings, 'SMTP_HOST', '127.0.0.1')
+    monkeypatch.setattr(settings, 'SMTP_PORT', port)
+    yield handler
+    controller.stop()
+
+
+def message(recipient: str) -> EmailMessage:
+    message = EmailMessage()
+    message['From'] = settings.MAIL_FROM
+    message['To'] = recipient
+    message['Subject'] = 'Test'
+    message.set_content('Test')
+    return message
+
+
+@fixture
+async def outbox():
+    '''Outbox is shared by tests, so it is emptied before and after test'''
+    async def clear():
+        async with session_factory_test() as session:
+            await session.execute(delete(MailOutboxModel))
+            await session.commit()
+    
+    await clear()
+    yield
+    await clear()
+
+
+def mail_task(recipient: str) -> MailTaskSchema:
+    now = datetime.now()
+    return MailTaskSchema(
+        user=User(id=uuid4(), email=recipient, username='MailUser', is_verified=False, created_at=now, updated_at=now),
+        body=MailBodySchema(type='verify', token='token')
+    )
+
+
+async def add_mails(*payloads: dict) -> list[MailOutboxModel]:
+    async with session_factory_test() as session:
+        mails = [MailOutboxModel(payload=payload) for payload in payloads]
+        session.add_all(mails)
+        await session.commit()
+    return mails
+
+
+async def get_mail(mail: MailOutboxModel) -> MailOutboxModel | None:
+    async with session_factory_test() as session:
+        return await session.get(MailOutboxModel, mail.id)
+
+
+async def make_due(mail: MailOutboxModel) -> None:
+    async with session_factory_test() as session:
+        await session.execute(update(MailOutboxModel).where(MailOutboxModel.id == mail.id).values(next_attempt_at=UTC_NOW))
+        await session.commit()
+
+
+async def process_batch() -> int:
+    smtp_pool = SMTPPool(1)
+    try:
+        return await MailWorker(session_factory_test, smtp_pool).process_batch()
+    finally:
+        smtp_pool.close()
+
+
+class TestMailWorker:
+    @pytest.mark.asyncio
+    async def test_sends_registration_mail(self, test_async_client: AsyncClient, smtp_handler: CollectingHandler):
+        response = await test_async_client.post(
+            '/api/auth/register',
+            json={
+                'email': 'mail@email.net',
+                'username': 'MailUser',
+                'password': 'testpassword123',
+                'confirm_password': 'testpassword123'
+            }
+        )
+        assert response.status_code == 200
+        
+        smtp_pool = SMTPPool(1)
+        try:
+            await MailWorker(session_factory_test, smtp_pool).process_batch()
+        finally:
+            smtp_pool.close()
+        
+        assert 'mail@email.net' in [recipient for envelope in smtp_handler.envelopes for recipient in envelope.rcpt_tos]
+        async with session_factory_test() as session:
+            assert not (await session.scalars(select(MailOutboxModel))).all()
+    
+    @pytest.mark.asyncio
+    async def test_refused_recipient_keeps_connection(self, smtp_handler: CollectingHandler):
+        smtp_pool = SMTPPool(1)
+        try:
+            errors = await smtp_pool.send([message('refused@email.net'), message('accepted@email.net')])
+        finally:
+            smtp_pool.close()
+        
+        assert isinstance(errors[0], smtplib.SMTPRecipientsRefused)
+        assert errors[1] is None
+        assert len(smtp_handler.peers) == 1
+        assert [envelope.rcpt_tos for envelope in smtp_handler.envelopes] == [['accepted@email.net']]
+    
+    @pytest.mark.asyncio
+    async def test_temporary_error_is_retried_with_backoff(self, smtp_handler: CollectingHandler, outbox, monkeypatch):
+        monkeypatch.setattr(settings, 'MAIL_MAX_ATTEMPTS', 3)
+        [mail] = await add_mails(mail_task('busy@email.net').model_dump(mode='json'))
+        
+        for attempt, delay in ((1, settings.MAIL_RETRY_DELAY), (2, settings.MAIL_RETRY_DELAY * 2)):
+            started_at = datetime.now()
+            assert await process_batch() == 1
+            
+            retried = await get_mail(mail)
+            assert retried.attempts == attempt
+            assert retried.dead_at is None
+            assert '450' in retried.last_error
+            expected_at = started_at + timedelta(seconds=delay)
+            assert abs(retried.next_attempt_at - expected_at) < timedelta(seconds=5)  # Database clock is UTC
+            assert await process_batch() == 0  # Not due yet
+            await make_due(mail)
+        
+        assert await process_batch() == 1
+        dead = await get_mail(mail)
+        assert dead.attempts == 3
+        assert dead.dead_at is not None  # `MAIL_MAX_ATTEMPTS` reached
+        await make_due(mail)
+        assert await process_batch() == 0  # Dead letters are never claimed
+        assert smtp_handler.envelopes == []
+    
+    @pytest.mark.asyncio
+    async def test_permanent_error_is_dead_lettered(self, smtp_handler: CollectingHandler, outbox):
+        refused, accepted = await add_mails(
+            mail_task('refused@email.net').model_dump(mode='json'), 
+            mail_task('accepted@email.net').model_dump(mode='json')
+        )
+        
+        assert await process_batch() == 2
+        
+        dead = await get_mail(refused)
+        assert dead.attempts == 1
+        assert dead.dead_at is not None
+        assert '550' in dead.last_error
+        assert await get_mail(accepted) is None
+        assert [envelope.rcpt_tos for envelope in smtp_handler.envelopes] == [['accepted@email.net']]
+    
+    @pytest.mark.asyncio
+    async def test_invalid_payload_is_buried(self, smtp_handler: CollectingHandler, outbox):
+        invalid, valid = await add_mails({'user': None}, mail_task('valid@email.net').model_dump(mode='json'))
+        
+        assert await process_batch() == 2
+        
+        dead = await get_mail(invalid)
+        assert dead.dead_at is not None
+        assert 'validation error' in dead.last_error
+        assert await get_mail(valid) is None
+        assert [envelope.rcpt_tos for envelope in smtp_handler.envelopes] == [['valid@email.net']]
+    
+    @pytest.mark.asyncio
+    async def test_workers_do_not_claim_same_mail(self, outbox):
+        mails = await add_mails(*(mail_task(f'user{number}@email.net').model_dump(mode='json') for number in range(5)))
+        
+        async with session_factory_test() as first_session, session_factory_test() as second_session:
+            first_claim = await MailOutbox(first_session).claim(3)
+            second_claim = await MailOutbox(second_session).claim(3)  # First claim is locked till its rollback
+            
+            first_ids, second_ids = {mail.id for mail in first_claim}, {mail.id for mail in second_claim}
+            assert len(first_ids) == 3
+            assert not first_ids & second_ids
+            assert first_ids | second_ids == {mail.id for mail in mails}
+            
+            await first_session.rollback()
+            assert len(await MailOutbox(second_session).claim(5)) == 5  # Released mail is claimed again
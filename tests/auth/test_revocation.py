@@ -0,0 +1,44 @@
+import time
+from uuid import uuid4
+import pytest
+from src.auth.jwt.revocation import BloomFilter, TokenRevocationStore
+from src.redis_client.client import RedisClient
+from src.config import settings
+from tests.conftest import fake_redis_client
+
+
+class TestBloomFilter:
+    def test_has_no_false_negatives(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        items = [uuid4().hex for _ in range(1000)]
+        for item in items:
+            bloom.add(item)
+        assert all(item in bloom for item in items)
+    
+    def test_false_positive_rate_is_near_error_rate(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        for _ in range(1000):
+            bloom.add(uuid4().hex)
+        false_positives = sum(uuid4().hex in bloom for _ in range(10_000))
+        assert false_positives < 300
+
+
+class TestTokenRevocationStore:
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize('bloom_enabled', [False, True])
+    async def test_revoked_token_is_found(self, fake_redis_client: RedisClient, monkeypatch, bloom_enabled: bool):
+        monkeypatch.setattr(settings, 'JWT_REVOCATION_BLOOM_ENABLED', bloom_enabled)
+        monkeypatch.setattr(TokenRevocationStore, 'bloom', None)
+        monkeypatch.setattr(TokenRevocationStore, 'bloom_refreshed_at', 0)
+        store = TokenRevocationStore(fake_redis_client)
+        revoked, active = uuid4().hex, uuid4().hex
+        
+        await store.revoke(revoked, int(time.time()) + 60)
+        assert await store.is_revoked(revoked)
+        assert not await store.is_revoked(active)
+    
+    @pytest.mark.asyncio
+    async def test_expired_token_is_not_stored(self, fake_redis_client: RedisClient):
+        jti = uuid4().hex
+        await TokenRevocationStore(fake_redis_client).revoke(jti, int(time.time()) - 1)
+        assert not await fake_redis_client.exists(f'revoked:{jti}')
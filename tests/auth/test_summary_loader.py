@@ -0,0 +1,152 @@
+from contextlib import contextmanager
+from uuid import uuid4
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event
+from src.auth.dependencies import get_current_user
+from src.auth.users import UserModel, User
+from src.auth.users.summary_loader import UserSummaryLoader, user_summary_key
+from src.aws.client import S3Client
+from src.cache import TieredBackend
+from src.posts import PostModel
+from src.redis_client.client import RedisClient
+from src.main import app
+from src.config import settings
+from tests.conftest import engine_test, session_factory_test, fake_redis_client, test_async_client, s3_endpoint, s3_client, cache_backend
+
+
+async def add_users(count: int) -> list[UserModel]:
+    users = []
+    async with session_factory_test() as session:
+        for _ in range(count):
+            name = f'summary-{uuid4().hex[:12]}'
+            user = UserModel(email=f'{name}@email.net', username=name, hashed_password='hash')
+            await user.save(session)
+            users.append(user)
+    return users
+
+
+@contextmanager
+def user_queries():
+    '''Collects statements which select users'''
+    statements = []
+    
+    def collect(conn, cursor, statement, parameters, context, executemany):
+        if 'FROM "user"' in statement:
+            statements.append(statement)
+    
+    event.listen(engine_test.sync_engine, 'before_cursor_execute', collect)
+    try:
+        yield statements
+    finally:
+        event.remove(engine_test.sync_engine, 'before_cursor_execute', collect)
+
+
+@pytest.fixture
+def mget_calls(fake_redis_client: RedisClient, monkeypatch) -> list:
+    calls = []
+    mget = fake_redis_client.mget
+    
+    async def counted_mget(keys):
+        calls.append(keys)
+        return await mget(keys)
+    
+    monkeypatch.setattr(fake_redis_client, 'mget', counted_mget)
+    return calls
+
+
+class TestUserSummaryLoader:
+    @pytest.mark.asyncio
+    async def test_authors_are_loaded_in_one_batch(self, fake_redis_client: RedisClient, mget_calls: list):
+        users = await add_users(3)
+        ids = [user.id for user in users]
+        
+        async with session_factory_test() as session:
+            with user_queries() as statements:
+                summaries = await UserSummaryLoader(session, fake_redis_client).load_many(ids + ids[:2])
+        
+        assert len(mget_calls) == 1 and len(mget_calls[0]) == 3  # Repeated ids are requested once
+        assert len(statements) == 1 and ' IN ' in statements[0]
+        assert {user_id: summary.username for user_id, summary in summaries.items()} == {
+            user.id: user.username for user in users
+        }
+    
+    @pytest.mark.asyncio
+    async def test_loaded_summaries_are_cached(self, fake_redis_client: RedisClient, mget_calls: list):
+        users = await add_users(2)
+        ids = [user.id for user in users]
+        async with session_factory_test() as session:
+            await UserSummaryLoader(session, fake_redis_client).load_many(ids[:1])
+        
+        for user in users[:1]:
+            ttl = await fake_redis_client.connection.ttl(user_summary_key(user.id))
+            assert 0 < ttl <= settings.USER_SUMMARY_CACHE_TTL
+        
+        async with session_factory_test() as session:
+            with user_queries() as statements:
+                summaries = await UserSummaryLoader(session, fake_redis_client).load_many(ids)
+        
+        assert len(statements) == 1  # Only not cached user
+        assert set(summaries) == set(ids)
+        assert await fake_redis_client.exists(user_summary_key(users[1].id))
+    
+    @pytest.mark.asyncio
+    async def test_missing_users_are_omitted(self, fake_redis_client: RedisClient, mget_calls: list):
+        user, = await add_users(1)
+        missing_id = uuid4()
+        
+        async with session_factory_test() as session:
+            loader = UserSummaryLoader(session, fake_redis_client)
+            summaries = await loader.load_many([user.id, missing_id])
+            with user_queries() as statements:
+                assert await loader.load_many([missing_id, user.id]) == summaries  # Kept for the rest of request
+        
+        assert list(summaries) == [user.id]
+        assert len(mget_calls) == 1
+        assert statements == []
+        assert not await fake_redis_client.exists(user_summary_key(missing_id))
+
+
+class TestWithAuthor:
+    @pytest.fixture
+    def current_user(self, s3_client: S3Client, monkeypatch):
+        monkeypatch.setattr(app.state, 's3_client', s3_client, raising=False)  # Set by lifespan
+        user = {}
+        app.dependency_overrides[get_current_user] = lambda: user['schema']
+        yield user
+        del app.dependency_overrides[get_current_user]
+    
+    @pytest.mark.asyncio
+    async def test_feed_and_search_embed_authors(
+        self, 
+        test_async_client: AsyncClient, 
+        fake_redis_client: RedisClient, 
+        cache_backend: TieredBackend, 
+        current_user: dict
+    ):
+        users = await add_users(2)
+        word = f'summary{uuid4().hex[:12]}'
+        async with session_factory_test() as session:
+            session.add_all([
+                PostModel(title=word, description='Description', image_url='bucket/image.png', author_id=user.id)
+                for user in users + users
+            ])
+            await session.commit()
+        current_user['schema'] = User.model_validate(users[0])
+        
+        responses = [
+            await test_async_client.get('/api/posts/feed', params={'with_author': True, 'limit': 100}),
+            await test_async_client.get('/api/posts/search', params={'q': word, 'with_author': True})
+        ]
+        
+        for response in responses:
+            assert response.status_code == 200, response.text
+            posts = response.json()['data']
+            assert posts
+            for post in posts:
+                assert post['author']['id'] == post['author_id']
+        search_authors = {post['author']['id']: post['author']['username'] for post in responses[1].json()['data']}
+        assert search_authors == {str(user.id): user.username for user in users}
+        
+        response = await test_async_client.get('/api/posts/search', params={'q': word})
+        assert all(post['author'] is None for post in response.json()['data'])
@@ -0,0 +1,97 @@
+import base64
+import io
+import json
+import pytest
+from starlette.datastructures import Headers, UploadFile
+from src.aws.client import S3Client
+from src.config import settings
+from tests.conftest import s3_endpoint, s3_client
+
+PART_SIZE = 5 * 1024 * 1024  # Minimal part size of S3
+
+
+@pytest.fixture(autouse=True)
+def multipart_settings(monkeypatch):
+    monkeypatch.setattr(settings, 'S3_MULTIPART_PART_SIZE', PART_SIZE)
+    monkeypatch.setattr(settings, 'S3_MULTIPART_THRESHOLD', PART_SIZE)
+
+
+def upload_file(body: bytes) -> UploadFile:
+    return UploadFile(
+        io.BytesIO(body), 
+        size=len(body), 
+        filename='file.bin', 
+        headers=Headers({'content-type': 'application/octet-stream'})
+    )
+
+
+class TestMultipartUpload:
+    @pytest.mark.asyncio
+    async def test_large_file_is_uploaded_by_parts(self, s3_client: S3Client):
+        body = bytes(range(256)) * (PART_SIZE * 2 // 256) + b'tail'
+        url = await s3_client.upload_file(upload_file(body), 'large.bin')
+        
+        assert url == 'test-bucket/large.bin'
+        assert await s3_client.download_bytes('large.bin') == body
+    
+    @pytest.mark.asyncio
+    async def test_failed_part_aborts_upload(self, s3_client: S3Client, monkeypatch):
+        upload_part = s3_client._upload_part
+        
+        async def failing_upload_part(client, object_name, upload_id, part_number, body, window):
+            if part_number == 2:
+                window.release()
+                raise ConnectionError('Part upload failed')
+            return await upload_part(client, object_name, upload_id, part_number, body, window)
+        
+        monkeypatch.setattr(s3_client, '_upload_part', failing_upload_part)
+        with pytest.raises(ConnectionError):
+            await s3_client.upload_file(upload_file(b'x' * (PART_SIZE * 3)), 'failed.bin')
+        
+        async with s3_client.get_client() as s3:
+            uploads = await s3.list_multipart_uploads(Bucket=s3_client.bucket_name)
+        assert not uploads.get('Uploads')
+        assert await s3_client.head_object('failed.bin') is None
+
+
+class TestDeletePrefix:
+    @pytest.mark.asyncio
+    async def test_deletes_only_prefixed_objects(self, s3_client: S3Client):
+        for key in ('image.png', 'image_640w.webp', 'image_1280w.avif', 'image2.png'):
+            await s3_client.upload_bytes(key, b'data', 'image/png')
+        
+        await s3_client.delete_prefix('image_')
+        
+        async with s3_client.get_client() as s3:
+            listing = await s3.list_objects_v2(Bucket=s3_client.bucket_name, Prefix='image')
+        assert sorted(item['Key'] for item in listing['Contents']) == ['image.png', 'image2.png']
+
+
+class TestPresignedUpload:
+    @pytest.mark.asyncio
+    async def test_policy_limits_size(self, s3_client: S3Client):
+        presigned = await s3_client.generate_upload_post('uploads/image.png', 'image/png', 1234)
+        
+        policy = json.loads(base64.b64decode(presigned['fields']['policy']))
+        assert ['content-length-range', 1, 1234] in policy['conditions']
+        assert {'Content-Type': 'image/png'} in policy['conditions']
+    
+    @pytest.mark.asyncio
+    async def test_expiration_rule_keeps_other_rules(self, s3_client: S3Client):
+        other_rule = {'ID': 'other', 'Filter': {'Prefix': 'logs/'}, 'Status': 'Enabled', 'Expiration': {'Days': 30}}
+        async with s3_client.get_client() as s3:
+            await s3.put_bucket_lifecycle_configuration(
+                Bucket=s3_client.bucket_name, 
+                LifecycleConfiguration={'Rules': [other_rule]}
+            )
+        
+        await s3_client.put_expiration_rule('uploads', 'uploads/', 1)
+        await s3_client.put_expiration_rule('uploads', 'uploads/', 2)  # Rule is replaced, not duplicated
+        
+        async with s3_client.get_client() as s3:
+            rules = (await s3.get_bucket_lifecycle_configuration(Bucket=s3_client.bucket_name))['Rules']
+        rules = {rule['ID']: rule for rule in rules}
+        assert rules.keys() == {'other', 'uploads'}
+        assert rules['uploads']['Filter'] == {'Prefix': 'uploads/'}
+        assert rules['uploads']['Expiration'] == {'Days': 2}
+        assert rules['uploads']['AbortIncompleteMultipartUpload'] == {'DaysAfterInitiation': 2}
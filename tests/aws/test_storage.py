@@ -0,0 +1,216 @@
+import asyncio
+import io
+from uuid import uuid4
+import pytest
+from sqlalchemy import select
+from starlette.datastructures import Headers, UploadFile
+from src.auth.users import UserModel
+from src.aws.client import S3Client
+from src.aws.models import StoredObjectModel
+from src.aws.storage import ContentStorage
+from src.config import settings
+from tests.conftest import session_factory_test, s3_endpoint, s3_client
+
+
+def image_file(body: bytes) -> UploadFile:
+    return UploadFile(
+        io.BytesIO(body), 
+        size=len(body), 
+        filename='image.png', 
+        headers=Headers({'content-type': 'image/png'})
+    )
+
+
+async def ref_count(key: str) -> int | None:
+    async with session_factory_test() as session:
+        return await session.scalar(select(StoredObjectModel.ref_count).where(StoredObjectModel.key == key))
+
+
+async def store(client: S3Client, body: bytes) -> str:
+    async with session_factory_test() as session:
+        url, _ = await ContentStorage(session, client).store(image_file(body))
+        await session.commit()
+    return url
+
+
+async def release(client: S3Client, url: str) -> None:
+    async with session_factory_test() as session:
+        storage = ContentStorage(session, client)
+        await storage.release(url)
+        await session.commit()
+        await storage.purge()
+
+
+class TestContentStorage:
+    @pytest.mark.asyncio
+    async def test_same_content_is_stored_once(self, s3_client: S3Client, monkeypatch):
+        uploads = []
+        upload_file = s3_client.upload_file
+        
+        async def counted_upload_file(file, object_name=None):
+            uploads.append(object_name)
+            return await upload_file(file, object_name)
+        
+        monkeypatch.setattr(s3_client, 'upload_file', counted_upload_file)
+        body = uuid4().bytes * 100
+        first_url = await store(s3_client, body)
+        second_url = await store(s3_client, body)
+        
+        key = s3_client.object_name(first_url)
+        assert second_url == first_url
+        assert key.startswith('sha256/') and key.endswith('.png')
+        assert uploads == [key]
+        assert await ref_count(key) == 2
+        assert await s3_client.download_bytes(key) == body
+    
+    @pytest.mark.asyncio
+    async def test_store_does_not_commit_caller_work(self, s3_client: S3Client):
+        username = f'storage-{uuid4().hex[:8]}'
+        async with session_factory_test() as session:
+            session.add(UserModel(email=f'{username}@email.net', username=username, hashed_password='hash'))
+            url, _ = await ContentStorage(session, s3_client).store(image_file(uuid4().bytes))
+            await session.rollback()
+        
+        async with session_factory_test() as session:
+            assert await session.scalar(select(UserModel).where(UserModel.username == username)) is None
+        assert await ref_count(s3_client.object_name(url)) == 0  # Pending upload, swept after timeout
+    
+    @pytest.mark.asyncio
+    async def test_upload_runs_outside_caller_transaction(self, s3_client: S3Client, monkeypatch):
+        upload_file = s3_client.upload_file
+        async with session_factory_test() as session:
+            async def checked_upload_file(file, object_name=None):
+                assert not session.in_transaction()
+                assert await ref_count(object_name) == 0  # Reservation is committed before upload
+                return await upload_file(file, object_name)
+            
+            monkeypatch.setattr(s3_client, 'upload_file', checked_upload_file)
+            url, _ = await ContentStorage(session, s3_client).store(image_file(uuid4().bytes))
+            await session.commit()
+        assert await ref_count(s3_client.object_name(url)) == 1
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_store_waits_for_uncommitted_reference(self, s3_client: S3Client):
+        body = uuid4().bytes
+        async with session_factory_test() as session:
+            url, _ = await ContentStorage(session, s3_client).store(image_file(body))
+            concurrent = asyncio.create_task(store(s3_client, body))
+            await asyncio.sleep(0.2)
+            assert not concurrent.done()  # Waits for row lock
+            await session.commit()
+        
+        assert await concurrent == url
+        assert await ref_count(s3_client.object_name(url)) == 2
+    
+    @pytest.mark.asyncio
+    async def test_object_is_deleted_with_last_reference(self, s3_client: S3Client):
+        body = uuid4().bytes
+        url = await store(s3_client, body)
+        await store(s3_client, body)
+        key = s3_client.object_name(url)
+        variant_key = f'{key.removesuffix(".png")}_640w.webp'
+        await s3_client.upload_bytes(variant_key, b'variant', 'image/webp')
+        
+        await release(s3_client, url)
+        assert await ref_count(key) == 1
+        assert await s3_client.head_object(key) is not None
+        
+        await release(s3_client, url)
+        assert await ref_count(key) is None
+        assert await s3_client.head_object(key) is None
+        assert await s3_client.head_object(variant_key) is None
+    
+    @pytest.mark.asyncio
+    async def test_purge_keeps_content_referenced_after_release(self, s3_client: S3Client):
+        body = uuid4().bytes
+        url = await store(s3_client, body)
+        key = s3_client.object_name(url)
+        async with session_factory_test() as session:
+            storage = ContentStorage(session, s3_client)
+            await storage.release(url)
+            await session.commit()
+            assert await store(s3_client, body) == url  # Referenced again before purge
+            await storage.purge()
+        
+        assert await ref_count(key) == 1
+        assert await s3_client.download_bytes(key) == body
+    
+    @pytest.mark.asyncio
+    async def test_owned_object_is_deleted_on_release(self, s3_client: S3Client):
+        url = await s3_client.upload_bytes('posts/user/image.png', b'image', 'image/png')
+        await s3_client.upload_bytes('posts/user/image_320w.jpeg', b'variant', 'image/jpeg')
+        
+        await release(s3_client, url)
+        
+        assert await s3_client.head_object('posts/user/image.png') is None
+        assert await s3_client.head_object('posts/user/image_320w.jpeg') is None
+    
+    @pytest.mark.asyncio
+    async def test_variants_are_reused_by_next_store(self, s3_client: S3Client):
+        body = uuid4().bytes
+        variants = {'width': 1, 'height': 1, 'blurhash': 'L', 'files': []}
+        async with session_factory_test() as session:
+            storage = ContentStorage(session, s3_client)
+            key = await storage.key_of(image_file(body))
+            assert await storage.get_variants(key) is None
+            
+            url, stored_variants = await storage.store(image_file(body), key)
+            assert stored_variants is None
+            await storage.set_variants(key, variants)
+            await session.commit()
+        
+        async with session_factory_test() as session:
+            storage = ContentStorage(session, s3_client)
+            assert await storage.get_variants(key) == variants
+            assert await storage.store(image_file(body)) == (url, variants)
+            await session.commit()
+    
+    @pytest.mark.asyncio
+    async def test_released_content_variants_are_not_reused(self, s3_client: S3Client):
+        body = uuid4().bytes
+        async with session_factory_test() as session:
+            storage = ContentStorage(session, s3_client)
+            url, _ = await storage.store(image_file(body))
+            await storage.set_variants(s3_client.object_name(url), {'files': []})
+            await session.commit()
+            await storage.release(url)
+            await session.commit()
+            
+            # Released but not purged yet, so its variants may be deleted any moment
+            assert await storage.get_variants(s3_client.object_name(url)) is None
+            assert await storage.store(image_file(body)) == (url, None)
+    
+    @pytest.mark.asyncio
+    async def test_sweep_deletes_unreferenced_objects(self, s3_client: S3Client, monkeypatch):
+        # Object, which delete failed on purge
+        failed_url = await store(s3_client, uuid4().bytes)
+        delete_object = s3_client.delete_object
+        
+        async def failing_delete_object(object_name):
+            raise ConnectionError('Storage is not available')
+        
+        monkeypatch.setattr(s3_client, 'delete_object', failing_delete_object)
+        await release(s3_client, failed_url)
+        monkeypatch.setattr(s3_client, 'delete_object', delete_object)
+        failed_key = s3_client.object_name(failed_url)
+        assert await ref_count(failed_key) == 0
+        
+        # Upload, which caller rolled back
+        async with session_factory_test() as session:
+            rolled_back_url, _ = await ContentStorage(session, s3_client).store(image_file(uuid4().bytes))
+            await session.rollback()
+        rolled_back_key = s3_client.object_name(rolled_back_url)
+        kept_key = s3_client.object_name(await store(s3_client, uuid4().bytes))
+        
+        async with session_factory_test() as session:
+            await ContentStorage(session, s3_client).sweep()
+        assert await ref_count(failed_key) is None
+        assert await s3_client.head_object(failed_key) is None
+        assert await ref_count(rolled_back_key) == 0  # Upload may be still in progress
+        
+        monkeypatch.setattr(settings, 'S3_PENDING_UPLOAD_TIMEOUT', 0)
+        async with session_factory_test() as session:
+            await ContentStorage(session, s3_client).sweep()
+        assert await ref_count(rolled_back_key) is None
+        assert await s3_client.head_object(rolled_back_key) is None
+        assert await ref_count(kept_key) == 1
@@ -6,12 +6,21 @@ from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sess
 # from fastapi_cache import FastAPICache
 # from fastapi_cache.backends.redis import RedisBackend
 # from redis import asyncio as aioredis
+import fakeredis
+from fastapi_cache import FastAPICache
+from fakeredis.aioredis import FakeRedis
 from httpx import AsyncClient, ASGITransport
+from moto.server import ThreadedMotoServer
 from src.database import Base
-from src.auth.jwt import models
 from src.auth.users import models
 from src.posts import models
+from src.timeline import models
+from src import models
 from src.dependencies import get_db
+from src.redis_client import dependencies
+from src.redis_client.client import RedisClient
+from src.aws.client import S3Client
+from src.cache import TaggedRedisBackend, TieredBackend, tagged_key_builder
 from src.main import app
 from src.config import settings
 
@@ -50,3 +59,41 @@ async def prepare_database():
 async def test_async_client():
     async with AsyncClient(transport=ASGITransport(app=app), base_url='http://testserver') as client:
         yield client
+
+
+@pytest.fixture
+def fake_redis_client(monkeypatch) -> RedisClient:
+    '''App redis client backed by empty fakeredis server'''
+    redis_client = RedisClient(settings.REDIS_HOST)
+    redis_client.connection = FakeRedis(server=fakeredis.FakeServer())
+    monkeypatch.setattr(dependencies, 'redis_client', redis_client)
+    return redis_client
+
+
+@pytest.fixture
+def cache_backend(fake_redis_client: RedisClient) -> TieredBackend:
+    '''Response cache backed by `fake_redis_client`'''
+    backend = TieredBackend(TaggedRedisBackend(fake_redis_client.connection))
+    FastAPICache.init(backend, prefix='test_cache', key_builder=tagged_key_builder())
+    yield backend
+    FastAPICache.reset()
+
+
+@pytest.fixture(scope='session')
+def s3_endpoint():
+    '''Url of in-process S3 server (moto)'''
+    server = ThreadedMotoServer(ip_address='127.0.0.1', port=0, verbose=False)
+    server.start()
+    host, port = server.get_host_and_port()
+    yield f'http://{host}:{port}'
+    server.stop()
+
+
+@fixture
+async def s3_client(s3_endpoint: str):
+    client = S3Client('key', 'secret', s3_endpoint, 'test-bucket')
+    await client.start()
+    async with client.get_client() as s3:
+        await s3.create_bucket(Bucket=client.bucket_name)
+    yield client
+    await client.close()
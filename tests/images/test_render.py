@@ -0,0 +1,74 @@
+import io
+import pytest
+from PIL import Image
+from src.images import blurhash
+from src.images.render import render_image, ORIENTATION_TAG
+
+
+def encode(image: Image.Image, format: str, **params) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format=format, **params)
+    return buffer.getvalue()
+
+
+def gradient(width: int, height: int) -> Image.Image:
+    image = Image.new('RGB', (width, height))
+    image.putdata([(x * 8, y * 10, 255 - x * 4) for y in range(height) for x in range(width)])
+    return image
+
+
+def render(data: bytes, widths: list[int], formats: list[str] = ['webp'], max_pixels: int = 10_000):
+    return render_image(data, widths, formats, quality=80, max_pixels=max_pixels)
+
+
+class TestRenderImage:
+    def test_rotated_image_is_transposed(self):
+        exif = Image.Exif()
+        exif[ORIENTATION_TAG] = 6  # Rotated 90° clockwise
+        data = encode(gradient(40, 20), 'JPEG', exif=exif.tobytes())
+        
+        rendered = render(data, [10])
+        
+        assert (rendered.width, rendered.height) == (20, 40)
+        variant = rendered.variants[0]
+        assert (variant.width, variant.height) == (10, 20)
+        assert Image.open(io.BytesIO(variant.data)).size == (10, 20)
+    
+    def test_image_is_not_upscaled(self):
+        rendered = render(encode(gradient(40, 20), 'PNG'), [10, 80, 160], ['webp', 'jpeg'])
+        
+        assert [(variant.format, variant.width, variant.height) for variant in rendered.variants] == [
+            ('webp', 10, 5), ('jpeg', 10, 5), ('webp', 40, 20), ('jpeg', 40, 20)  # Larger widths are one original size
+        ]
+    
+    def test_jpeg_variant_drops_alpha(self):
+        image = Image.new('RGBA', (20, 20), (255, 0, 0, 0))
+        
+        rendered = render(encode(image, 'PNG'), [20], ['webp', 'jpeg'])
+        
+        webp, jpeg = (Image.open(io.BytesIO(variant.data)) for variant in rendered.variants)
+        assert webp.mode == 'RGBA'
+        assert jpeg.mode == 'RGB'
+        assert rendered.variants[1].content_type == 'image/jpeg'
+    
+    def test_large_image_is_rejected(self):
+        with pytest.raises(ValueError):
+            render(encode(gradient(101, 100), 'PNG'), [10])
+    
+    def test_undecodable_image_is_rejected(self):
+        with pytest.raises(OSError):
+            render(b'not image', [10])
+
+
+class TestBlurhash:
+    # Reference hashes were produced by reference C encoder (blurhash-python) from the same images
+    @pytest.mark.parametrize('components, expected', [
+        ((4, 3), 'LxH28X2zw$XAmIWYjuf8gJfjfQfj'),
+        ((9, 2), 'HxH28X2zw$XAb0ogWsogWrmIWYjuf8fRf8fRf8fR'),
+        ((1, 1), '00H28X')
+    ])
+    def test_encode_matches_reference(self, components, expected):
+        assert blurhash.encode(gradient(32, 24), *components) == expected
+    
+    def test_solid_image(self):
+        assert blurhash.encode(Image.new('RGB', (8, 8), (200, 30, 60))) == 'LNM^#R|yfQ|y|ysVfQsVfQfQfQfQ'
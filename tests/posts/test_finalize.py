@@ -0,0 +1,112 @@
+import asyncio
+import io
+from uuid import uuid4
+import pytest
+from PIL import Image
+from sqlalchemy import select, func
+from src.auth.users import UserModel, User
+from src.auth.users.summary_loader import UserSummaryLoader
+from src.aws.client import S3Client
+from src.aws.models import StoredObjectModel
+from src.aws.storage import ContentStorage
+from src.aws.utils import generate_user_object_name, finalized_object_name
+from src.counting import ExactCount
+from src.posts import PostModel, PostFinalize
+from src.posts.service import PostsService
+from src.redis_client.client import RedisClient
+from src.timeline.service import TimelineService
+from tests.conftest import session_factory_test, fake_redis_client, s3_endpoint, s3_client
+
+
+def posts_service(session, redis_client: RedisClient, client: S3Client) -> PostsService:
+    return PostsService(
+        session, 
+        ExactCount(), 
+        TimelineService(session, redis_client), 
+        UserSummaryLoader(session, redis_client), 
+        ContentStorage(session, client)
+    )
+
+
+async def upload(client: S3Client) -> tuple[User, PostFinalize]:
+    async with session_factory_test() as session:
+        name = f'finalize-{uuid4().hex[:12]}'
+        user = UserModel(email=f'{name}@email.net', username=name, hashed_password='hash')
+        await user.save(session)
+    
+    buffer = io.BytesIO()
+    Image.new('RGB', (4, 4)).save(buffer, format='PNG')
+    object_name = generate_user_object_name(user.id, 'image/png')
+    await client.upload_bytes(object_name, buffer.getvalue(), 'image/png')
+    return User.model_validate(user), PostFinalize(title='Post', description='Description', object_name=object_name)
+
+
+async def finalize(redis_client: RedisClient, client: S3Client, user: User, data: PostFinalize):
+    async with session_factory_test() as session:
+        post, _ = await posts_service(session, redis_client, client).finalize_upload(user, data, client)
+    return post
+
+
+async def stored_object(key: str) -> StoredObjectModel | None:
+    async with session_factory_test() as session:
+        return await session.scalar(select(StoredObjectModel).where(StoredObjectModel.key == key))
+
+
+class TestFinalizeUpload:
+    @pytest.mark.asyncio
+    async def test_concurrent_finalizations_create_one_post(
+        self, 
+        fake_redis_client: RedisClient, 
+        s3_client: S3Client, 
+        monkeypatch
+    ):
+        user, data = await upload(s3_client)
+        barrier = asyncio.Barrier(2)
+        copy_object = s3_client.copy_object
+        
+        async def concurrent_copy_object(source, destination):
+            await barrier.wait()  # Both requests passed upload checks
+            return await copy_object(source, destination)
+        
+        monkeypatch.setattr(s3_client, 'copy_object', concurrent_copy_object)
+        first, second = await asyncio.gather(*(finalize(fake_redis_client, s3_client, user, data) for _ in range(2)))
+        
+        key = finalized_object_name(data.object_name)
+        assert first.id == second.id
+        async with session_factory_test() as session:
+            assert await session.scalar(select(func.count()).where(PostModel.image_url == first.image_url)) == 1
+        assert (await stored_object(key)).ref_count == 1
+        assert await s3_client.head_object(data.object_name) is None
+        
+        async with session_factory_test() as session:
+            await posts_service(session, fake_redis_client, s3_client).delete(user, first.id)
+        assert await stored_object(key) is None
+        assert await s3_client.head_object(key) is None
+    
+    @pytest.mark.asyncio
+    async def test_failed_finalization_deletes_copy(
+        self, 
+        fake_redis_client: RedisClient, 
+        s3_client: S3Client, 
+        monkeypatch
+    ):
+        user, data = await upload(s3_client)
+        key = finalized_object_name(data.object_name)
+        create = PostsService._create
+        
+        async def failing_create(*args, **kwargs):
+            assert await s3_client.head_object(key) is not None
+            raise ConnectionError('Database is not available')
+        
+        monkeypatch.setattr(PostsService, '_create', failing_create)
+        with pytest.raises(ConnectionError):
+            await finalize(fake_redis_client, s3_client, user, data)
+        
+        assert await s3_client.head_object(key) is None
+        assert await stored_object(key) is None
+        assert await s3_client.head_object(data.object_name) is not None  # Kept for retry
+        
+        monkeypatch.setattr(PostsService, '_create', create)
+        post = await finalize(fake_redis_client, s3_client, user, data)
+        assert s3_client.object_name(post.image_url) == key
+        assert (await stored_object(key)).ref_count == 1
@@ -0,0 +1,128 @@
+from uuid import uuid4
+import pytest
+from httpx import AsyncClient
+from src.auth.users import UserModel
+from src.aws.client import S3Client
+from src.cache import TieredBackend
+from src.posts import PostModel
+from src.posts.service import PostsService
+from src.schemas import PaginationParams
+from src.main import app
+from tests.conftest import (
+    session_factory_test, fake_redis_client, test_async_client, cache_backend, s3_endpoint, s3_client
+)
+from tests.posts.test_finalize import posts_service
+
+
+def unique_word() -> str:
+    return f'search{uuid4().hex[:12]}'
+
+
+async def add_posts(*texts: tuple[str, str]) -> list[PostModel]:
+    async with session_factory_test() as session:
+        name = f'search-{uuid4().hex[:12]}'
+        author = UserModel(email=f'{name}@email.net', username=name, hashed_password='hash')
+        await author.save(session)
+        posts = [
+            PostModel(title=title, description=description, image_url='bucket/image.png', author_id=author.id)
+            for title, description in texts
+        ]
+        session.add_all(posts)
+        await session.commit()
+    return posts
+
+
+async def search(redis_client, client: S3Client, query: str, **pagination) -> tuple[list, int | None, str | None]:
+    async with session_factory_test() as session:
+        return await posts_service(session, redis_client, client).search(query, PaginationParams(**pagination))
+
+
+class TestSearch:
+    @pytest.mark.asyncio
+    async def test_title_matches_rank_above_description_matches(self, fake_redis_client, s3_client: S3Client):
+        word = unique_word()
+        in_description, in_title = await add_posts(
+            ('Other post', f'Description with {word}'), 
+            (f'Title with {word}', 'Other description')
+        )
+        
+        posts, count, _ = await search(fake_redis_client, s3_client, word)
+        
+        assert [post.id for post in posts] == [in_title.id, in_description.id]
+        assert count == 2
+    
+    @pytest.mark.asyncio
+    async def test_rank_cursor_pages_cover_all_matches_once(self, fake_redis_client, s3_client: S3Client):
+        word = unique_word()
+        # Equal ranks are ordered by id
+        posts = await add_posts(
+            *[(word, 'Description')] * 4, 
+            *[('Title', word)] * 3, 
+            (f'{word} {word}', word)
+        )
+        
+        all_posts, _, cursor = await search(fake_redis_client, s3_client, word, limit=len(posts))
+        assert cursor is None
+        assert sorted(post.id for post in all_posts) == sorted(post.id for post in posts)
+        
+        ids, cursor = [], None
+        while True:
+            page, _, cursor = await search(fake_redis_client, s3_client, word, limit=3, cursor=cursor)
+            ids += [post.id for post in page]
+            if cursor is None:
+                break
+        assert ids == [post.id for post in all_posts]
+        
+        offset_ids = []
+        for offset in range(0, len(posts), 3):
+            page, _, _ = await search(fake_redis_client, s3_client, word, limit=3, offset=offset)
+            offset_ids += [post.id for post in page]
+        assert offset_ids == ids
+    
+    @pytest.mark.asyncio
+    async def test_websearch_syntax(self, fake_redis_client, s3_client: S3Client):
+        word, other, excluded = unique_word(), unique_word(), unique_word()
+        phrase, reversed_phrase, either, negated = await add_posts(
+            (f'Quick {word} fox', 'Description'), 
+            (f'{word} quick', 'Description'), 
+            (other, 'Description'), 
+            (f'{word} {excluded}', 'Description')
+        )
+        
+        async def found(query: str) -> set:
+            return {post.id for post in (await search(fake_redis_client, s3_client, query, limit=10))[0]}
+        
+        assert await found(f'"quick {word}"') == {phrase.id}
+        assert await found(f'{word} or {other}') == {phrase.id, reversed_phrase.id, either.id, negated.id}
+        assert await found(f'{word} -{excluded}') == {phrase.id, reversed_phrase.id}
+        assert await found('"') == set()  # Query without words matches nothing
+    
+    @pytest.mark.asyncio
+    async def test_cache_key_is_normalized(
+        self, 
+        test_async_client: AsyncClient, 
+        fake_redis_client, 
+        cache_backend: TieredBackend, 
+        s3_client: S3Client, 
+        monkeypatch
+    ):
+        monkeypatch.setattr(app.state, 's3_client', s3_client, raising=False)  # Set by lifespan
+        word = unique_word()
+        await add_posts((f'Cached {word}', 'Description'))
+        queries = []
+        search = PostsService.search
+        
+        async def counted_search(self, query, *args, **kwargs):
+            queries.append(query)
+            return await search(self, query, *args, **kwargs)
+        
+        monkeypatch.setattr(PostsService, 'search', counted_search)
+        responses = [
+            await test_async_client.get('/api/posts/search', params={'q': q}) 
+            for q in (f'cached {word}', f'  Cached   {word.upper()} ', f'cached -{word}')
+        ]
+        
+        assert [response.status_code for response in responses] == [200] * 3
+        assert responses[1].json() == responses[0].json()
+        assert len(responses[0].json()['data']) == 1
+        assert queries == [f'cached {word}', f'cached -{word}']  # Case and whitespace do not change key
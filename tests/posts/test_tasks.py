@@ -0,0 +1,72 @@
+import io
+from uuid import uuid4
+import pytest
+from PIL import Image
+from sqlalchemy import select
+from src.auth.users import UserModel
+from src.aws.client import S3Client
+from src.aws.models import StoredObjectModel
+from src.aws.storage import content_key
+from src.images import ImageVariants
+from src.posts import PostModel, PostImageTaskSchema
+from src.posts import tasks
+from src.config import settings
+from tests.conftest import session_factory_test, s3_endpoint, s3_client
+
+
+def png(width: int, height: int) -> bytes:
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), (0, 128, 255)).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+class TestCreatePostVariants:
+    @pytest.mark.asyncio
+    async def test_variants_are_saved_and_tags_invalidated(self, s3_client: S3Client, monkeypatch):
+        invalidated = []
+        
+        async def invalidate_tags(*tags):
+            invalidated.extend(tags)
+        
+        monkeypatch.setattr(tasks, 'SessionFactory', session_factory_test)
+        monkeypatch.setattr(tasks, 'invalidate_tags', invalidate_tags)
+        monkeypatch.setattr(settings, 'IMAGE_VARIANT_WIDTHS', [8, 64])
+        monkeypatch.setattr(settings, 'IMAGE_VARIANT_FORMATS', ['webp'])
+        
+        key = content_key(uuid4().hex, 'image/png')
+        image_url = await s3_client.upload_bytes(key, png(16, 8), 'image/png')
+        async with session_factory_test() as session:
+            name = f'tasks-{uuid4().hex[:12]}'
+            author = UserModel(email=f'{name}@email.net', username=name, hashed_password='hash')
+            await author.save(session)
+            post = PostModel(title='Post', description='Description', image_url=image_url, author_id=author.id)
+            session.add_all([post, StoredObjectModel(key=key, size=1, ref_count=1)])
+            await session.commit()
+        
+        await tasks.create_post_variants(PostImageTaskSchema(post_id=post.id, author_id=author.id, object_name=key), s3_client)
+        
+        async with session_factory_test() as session:
+            saved = await session.get(PostModel, post.id)
+            stored_variants = await session.scalar(select(StoredObjectModel.variants).where(StoredObjectModel.key == key))
+        variants = ImageVariants.model_validate(saved.variants)
+        assert (variants.width, variants.height) == (16, 8)
+        assert [(file.width, file.height) for file in variants.files] == [(8, 4), (16, 8)]  # Not upscaled
+        for file in variants.files:
+            assert await s3_client.head_object(s3_client.object_name(file.url)) is not None
+        assert saved.updated_at == post.updated_at  # Post itself is not edited
+        assert stored_variants == saved.variants  # Reused by next upload of the same content
+        assert invalidated == [f'post:{post.id}', f'author:{author.id}']
+    
+    @pytest.mark.asyncio
+    async def test_post_keeps_original_image_on_failure(self, s3_client: S3Client, monkeypatch):
+        invalidated = []
+        
+        async def invalidate_tags(*tags):
+            invalidated.extend(tags)
+        
+        monkeypatch.setattr(tasks, 'SessionFactory', session_factory_test)
+        monkeypatch.setattr(tasks, 'invalidate_tags', invalidate_tags)
+        
+        await tasks.create_post_variants(PostImageTaskSchema(post_id=uuid4(), author_id=uuid4(), object_name='missing.png'), s3_client)
+        
+        assert invalidated == []
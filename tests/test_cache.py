@@ -0,0 +1,65 @@
+import asyncio
+import time
+import pytest
+from pytest_asyncio import fixture
+from fastapi import FastAPI, HTTPException
+from httpx import AsyncClient, ASGITransport
+from src.cache import TieredBackend, cache, tagged_key_builder, invalidate_tags
+from src.redis_client.client import RedisClient
+from src.config import settings
+from tests.conftest import fake_redis_client, cache_backend
+
+app = FastAPI()
+calls = {'count': 0}
+
+
+@app.get('/items/{item_id}')
+@cache(expire=60, key_builder=tagged_key_builder('item:{item_id}'))
+async def get_item(item_id: int):
+    calls['count'] += 1
+    if item_id < 0:
+        raise HTTPException(status_code=404, detail='Item not found')
+    return {'id': item_id, 'calls': calls['count']}
+
+
+@fixture
+async def client():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url='http://testserver') as client:
+        yield client
+
+
+class TestTieredBackend:
+    @pytest.mark.asyncio
+    async def test_coalesces_concurrent_misses(self, cache_backend: TieredBackend):
+        assert await cache_backend.get_with_ttl('key') == (0, None)  # Leader computes value
+        waiter = asyncio.create_task(cache_backend.get_with_ttl('key'))
+        await asyncio.sleep(0)
+        await cache_backend.set('key', b'value', 60)
+        
+        _, value = await waiter
+        assert value == b'value'
+        assert cache_backend.stats['coalesced'] == 1
+        assert cache_backend.stats['l2_misses'] == 1
+        assert not cache_backend.flights
+    
+    @pytest.mark.asyncio
+    async def test_failed_endpoint_releases_flight(self, cache_backend: TieredBackend, client: AsyncClient, monkeypatch):
+        monkeypatch.setattr(settings, 'CACHE_FLIGHT_TIMEOUT', 5)
+        for _ in range(3):
+            started = time.perf_counter()
+            response = await client.get('/items/-1')
+            assert response.status_code == 404
+            assert time.perf_counter() - started < 1
+        assert not cache_backend.flights
+        assert cache_backend.stats['coalesced'] == 0
+
+
+class TestInvalidateTags:
+    @pytest.mark.asyncio
+    async def test_purges_tagged_responses(self, cache_backend: TieredBackend, client: AsyncClient):
+        first = (await client.get('/items/1')).json()
+        assert (await client.get('/items/1')).json() == first
+        
+        deleted = await invalidate_tags('item:1', 'item:2')
+        assert len(deleted) == 1
+        assert (await client.get('/items/1')).json()['calls'] == first['calls'] + 1
@@ -0,0 +1,41 @@
+import pytest
+from sqlalchemy import text as sa_text
+from src.auth.users import UserModel
+from src.counting import ExactCount, EstimateCount, CounterTableCount, CachedCount
+from src.redis_client.client import RedisClient
+from tests.conftest import session_factory_test, fake_redis_client
+
+
+async def add_users(session, count: int, prefix: str) -> None:
+    session.add_all(
+        UserModel(email=f'{prefix}-{number}@email.net', username=f'{prefix}-{number}', hashed_password='hash')
+        for number in range(count)
+    )
+    await session.commit()
+
+
+class TestCountStrategies:
+    @pytest.mark.asyncio
+    async def test_estimate_matches_exact_count_after_analyze(self):
+        async with session_factory_test() as session:
+            await add_users(session, 3, 'estimate')
+            await session.execute(sa_text('ANALYZE "user"'))
+            assert await EstimateCount().count(session, UserModel) == await ExactCount().count(session, UserModel)
+    
+    @pytest.mark.asyncio
+    async def test_counter_falls_back_without_counter_row(self):
+        # Test schema is created without migrations, so there are no counter triggers
+        async with session_factory_test() as session:
+            await add_users(session, 2, 'counter')
+            assert await CounterTableCount().count(session, UserModel) == await ExactCount().count(session, UserModel)
+    
+    @pytest.mark.asyncio
+    async def test_cached_count_is_reused_until_expired(self, fake_redis_client: RedisClient):
+        async with session_factory_test() as session:
+            strategy = CachedCount(fake_redis_client, ttl=60)
+            count = await strategy.count(session, UserModel)
+            await add_users(session, 1, 'cached')
+            assert await strategy.count(session, UserModel) == count
+            
+            await fake_redis_client.delete(f'count:{UserModel.__tablename__}')
+            assert await strategy.count(session, UserModel) == count + 1
@@ -0,0 +1,33 @@
+import io
+import json
+import logging
+from src.logging_config import (
+    JSONFormatter, DroppingQueueHandler, setup_logging, shutdown_logging, add_queue_handler
+)
+
+
+class TestQueueLogging:
+    def test_exception_is_rendered_by_listener_formatter(self):
+        stream = io.StringIO()
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(JSONFormatter())
+        logger = logging.getLogger('queue_test_logger')
+        logger.setLevel(logging.INFO)
+        
+        setup_logging()
+        add_queue_handler(logger, [handler])
+        try:
+            1 / 0
+        except ZeroDivisionError:
+            logger.exception('Failed with %s', 'args')
+        shutdown_logging()
+        
+        record = json.loads(stream.getvalue())
+        assert record['message'] == 'Failed with args'
+        assert 'ZeroDivisionError' in record['exception']
+    
+    def test_shutdown_removes_queue_handlers(self):
+        setup_logging()
+        shutdown_logging()
+        for name in ('app_logger', 'error_logger', 'uvicorn'):
+            assert not any(isinstance(handler, DroppingQueueHandler) for handler in logging.getLogger(name).handlers)
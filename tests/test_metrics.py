@@ -0,0 +1,76 @@
+import pytest
+from httpx import AsyncClient
+from src.metrics import Metric, Counter, Histogram, Registry, CONTENT_TYPE
+from tests.conftest import test_async_client
+
+
+class TestExposition:
+    def test_metric_is_abstract(self):
+        with pytest.raises(TypeError):
+            Metric('metric', 'Metric without samples')
+    
+    def test_counter(self):
+        counter = Counter('requests_total', 'Requests count', ('method',))
+        counter.inc(1, 'GET')
+        counter.inc(2, 'GET')
+        counter.inc(0.5, 'POST')
+        
+        assert counter.render() == [
+            '# HELP requests_total Requests count',
+            '# TYPE requests_total counter',
+            'requests_total{method="GET"} 3',
+            'requests_total{method="POST"} 0.5'
+        ]
+        assert Counter('empty_total', 'Not incremented').render()[2:] == []
+    
+    def test_histogram(self):
+        histogram = Histogram('latency_seconds', 'Latency', ('route',), buckets=(1, 0.1))
+        for value in (0.05, 0.1, 0.5, 2):
+            histogram.observe(value, '/posts')
+        
+        assert histogram.render() == [
+            '# HELP latency_seconds Latency',
+            '# TYPE latency_seconds histogram',
+            'latency_seconds_bucket{route="/posts",le="0.1"} 2',  # Bounds are inclusive
+            'latency_seconds_bucket{route="/posts",le="1.0"} 3',
+            'latency_seconds_bucket{route="/posts",le="+Inf"} 4',
+            'latency_seconds_sum{route="/posts"} 2.65',
+            'latency_seconds_count{route="/posts"} 4'
+        ]
+    
+    def test_labels_and_help_are_escaped(self):
+        counter = Counter('escaped_total', 'Help with \\ and\nnew line', ('value',))
+        counter.inc(1, 'quote " backslash \\ new\nline')
+        
+        assert counter.render() == [
+            '# HELP escaped_total Help with \\\\ and\\nnew line',
+            '# TYPE escaped_total counter',
+            'escaped_total{value="quote \\" backslash \\\\ new\\nline"} 1'
+        ]
+    
+    def test_broken_collector_does_not_hide_other_metrics(self):
+        registry = Registry()
+        
+        @registry.collector('broken', 'Broken collector')
+        def collect_broken():
+            raise RuntimeError('Pool is closed')
+        
+        @registry.collector('pool_connections', 'Pool connections', labels=('state',))
+        def collect_pool():
+            return [(('idle',), 2)]
+        
+        assert registry.render() == (
+            '# HELP pool_connections Pool connections\n'
+            '# TYPE pool_connections gauge\n'
+            'pool_connections{state="idle"} 2.0\n'
+        )
+    
+    @pytest.mark.asyncio
+    async def test_metrics_route(self, test_async_client: AsyncClient):
+        await test_async_client.get('/api')
+        response = await test_async_client.get('/metrics')
+        
+        assert response.status_code == 200
+        assert response.headers['content-type'] == CONTENT_TYPE
+        assert '# TYPE http_request_duration_seconds histogram' in response.text
+        assert 'http_request_duration_seconds_count{method="GET",route="/api",status="200"}' in response.text
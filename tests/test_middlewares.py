@@ -0,0 +1,72 @@
+import logging
+import re
+import pytest
+from pytest_asyncio import fixture
+from fastapi import FastAPI
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import text
+from src.database import query_stats
+from src.middlewares import QueryStatsMiddleware
+from src.config import settings
+from tests.conftest import session_factory_test
+
+app = FastAPI()
+app.add_middleware(QueryStatsMiddleware)
+
+
+@app.get('/queries/{count}')
+async def run_queries(count: int, sleep: float = 0):
+    async with session_factory_test() as session:
+        for _ in range(count):
+            await session.execute(text('SELECT pg_sleep(:sleep)'), {'sleep': sleep})
+    return {'ok': True}
+
+
+@fixture
+async def client():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url='http://testserver') as client:
+        yield client
+
+
+def db_timing(response) -> tuple[float, int]:
+    duration, count = re.fullmatch(r'db;dur=([\d.]+);desc="(\d+) queries"', response.headers['Server-Timing']).groups()
+    return float(duration), int(count)
+
+
+class TestQueryStatsMiddleware:
+    @pytest.mark.asyncio
+    async def test_server_timing_reports_request_queries(self, client: AsyncClient):
+        response = await client.get('/queries/3', params={'sleep': 0.02})
+        
+        duration, count = db_timing(response)
+        assert count == 3
+        assert 60 <= duration < 1000
+        assert db_timing(await client.get('/queries/0')) == (0, 0)
+    
+    @pytest.mark.asyncio
+    async def test_queries_out_of_request_are_not_counted(self):
+        async with session_factory_test() as session:
+            await session.execute(text('SELECT 1'))
+        assert query_stats.get() is None
+    
+    @pytest.mark.asyncio
+    async def test_slow_queries_are_logged(self, client: AsyncClient, caplog, monkeypatch):
+        monkeypatch.setattr(settings, 'DB_SLOW_QUERY_SECONDS', 0.05)
+        monkeypatch.setattr(settings, 'DB_QUERY_LOG_SAMPLE_RATE', 0)
+        with caplog.at_level(logging.DEBUG, logger='database_logger'):
+            await client.get('/queries/2')
+            assert not caplog.records
+            await client.get('/queries/1', params={'sleep': 0.06})
+        
+        warning, parameters = caplog.records
+        assert warning.levelno == logging.WARNING
+        assert warning.getMessage().startswith('Slow SQL query (') and 'pg_sleep' in warning.getMessage()
+        assert parameters.levelno == logging.DEBUG
+    
+    @pytest.mark.asyncio
+    async def test_sampled_queries_are_logged(self, client: AsyncClient, caplog, monkeypatch):
+        monkeypatch.setattr(settings, 'DB_QUERY_LOG_SAMPLE_RATE', 1)
+        with caplog.at_level(logging.INFO, logger='database_logger'):
+            await client.get('/queries/2')
+        
+        assert [record.levelno for record in caplog.records] == [logging.INFO] * 2
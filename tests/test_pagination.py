@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+from uuid import UUID, uuid4
+import pytest
+from sqlalchemy import select
+from src.auth.users import UserModel
+from src.posts.models import PostModel
+from src.pagination import encode_cursor, decode_cursor, _encode_values, paginate
+from src.schemas import PaginationParams
+from src.exceptions import BadRequest
+from tests.conftest import session_factory_test
+
+
+class TestCursor:
+    def test_round_trip(self):
+        created_at, id = datetime(2025, 1, 2, 3, 4, 5, 678901), uuid4()
+        assert decode_cursor(encode_cursor(created_at, id)) == (created_at, id)
+    
+    def test_cursor_is_url_safe(self):
+        cursor = encode_cursor(datetime(2025, 1, 1), UUID(int=2 ** 128 - 1))
+        assert cursor.isascii() and not set(cursor) & set('+/=')
+    
+    @pytest.mark.parametrize('cursor', ['not a cursor', _encode_values(['2025-01-01']), _encode_values([1, 2])])
+    def test_malformed_cursor(self, cursor: str):
+        with pytest.raises(BadRequest):
+            decode_cursor(cursor)
+
+
+class TestPaginate:
+    @pytest.mark.asyncio
+    async def test_cursor_pages_cover_all_rows_once(self):
+        async with session_factory_test() as session:
+            author = UserModel(email='pagination@email.net', username='PaginationUser', hashed_password='hash')
+            session.add(author)
+            await session.flush()
+            # Posts with equal `created_at` are ordered by id
+            started = datetime(2025, 1, 1)
+            created = [started, started, started, started + timedelta(seconds=1), started + timedelta(seconds=2)]
+            posts = [
+                PostModel(title='Post', description='Post', image_url='url', author_id=author.id, created_at=created_at)
+                for created_at in created * 2
+            ]
+            session.add_all(posts)
+            await session.commit()
+            
+            expected = [post.id for post in sorted(posts, key=lambda post: (post.created_at, post.id), reverse=True)]
+            query = select(PostModel).where(PostModel.author_id == author.id)
+            
+            ids, cursor = [], None
+            while True:
+                rows, cursor = await paginate(session, query, PostModel, PaginationParams(limit=3, cursor=cursor))
+                ids += [row.id for row in rows]
+                if cursor is None:
+                    break
+            assert ids == expected
+            
+            # Offset is used without cursor and last full page has no next cursor
+            rows, cursor = await paginate(session, query, PostModel, PaginationParams(limit=5, offset=5))
+            assert [row.id for row in rows] == expected[5:]
+            assert cursor is None
@@ -0,0 +1,147 @@
+import json
+import time
+import pytest
+from pytest_asyncio import fixture
+from fastapi import FastAPI
+from httpx import AsyncClient, ASGITransport
+from src.middlewares import ProfilingMiddleware
+from src.profiling import sign_trace_request, is_trace_request_signed, record_span, trace_span, trace_key, TRACE_HEADER
+from src.redis_client.client import RedisClient
+from src.config import settings
+from tests.conftest import fake_redis_client, test_async_client
+
+app = FastAPI()
+app.add_middleware(ProfilingMiddleware)
+
+
+@app.get('/traced')
+async def traced():
+    with trace_span('handler', 'traced'):
+        record_span('sql', 'SELECT 1', time.perf_counter(), 0.002)
+        record_span('sql', 'SELECT 2', time.perf_counter(), 0.003)
+    return {'ok': True}
+
+
+@fixture
+async def client():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url='http://testserver') as client:
+        yield client
+
+
+@pytest.fixture
+def secret(monkeypatch):
+    monkeypatch.setattr(settings, 'PROFILING_SECRET', 'profiling-secret')
+    monkeypatch.setattr(settings, 'PROFILING_SAMPLE_RATE', 0)
+
+
+def signed_header() -> dict:
+    return {TRACE_HEADER: sign_trace_request(int(time.time()) + 60)}
+
+
+async def stored_traces(redis_client: RedisClient) -> list[dict]:
+    return [json.loads(await redis_client.get(key)) for key in await redis_client.connection.keys(trace_key('*'))]
+
+
+class TestSignature:
+    def test_signed_value_is_valid_until_expiry(self, secret):
+        assert is_trace_request_signed(sign_trace_request(int(time.time()) + 60))
+        assert not is_trace_request_signed(sign_trace_request(int(time.time()) - 1))
+    
+    def test_tampered_value_is_rejected(self, secret):
+        expires_at = int(time.time()) + 60
+        value = sign_trace_request(expires_at)
+        signature = value.partition('.')[2]
+        
+        assert not is_trace_request_signed(f'{expires_at + 3600}.{signature}')  # Extended expiry
+        assert not is_trace_request_signed(f'{expires_at}.{signature[:-1]}{"0" if signature[-1] != "0" else "1"}')
+        for malformed in (None, '', 'value', f'.{signature}', f'-{expires_at}.{signature}'):
+            assert not is_trace_request_signed(malformed)
+    
+    def test_value_signed_by_other_secret_is_rejected(self, secret, monkeypatch):
+        value = sign_trace_request(int(time.time()) + 60)
+        monkeypatch.setattr(settings, 'PROFILING_SECRET', 'other-secret')
+        assert not is_trace_request_signed(value)
+    
+    def test_tracing_is_disabled_without_secret(self, secret, monkeypatch):
+        value = sign_trace_request(int(time.time()) + 60)
+        monkeypatch.setattr(settings, 'PROFILING_SECRET', None)
+        assert not is_trace_request_signed(value)
+
+
+class TestProfilingMiddleware:
+    @pytest.mark.asyncio
+    async def test_unsigned_request_is_not_traced(self, client: AsyncClient, fake_redis_client: RedisClient, secret):
+        response = await client.get('/traced', headers={TRACE_HEADER: 'forged.value'})
+        
+        assert 'X-Debug-Trace-Id' not in response.headers
+        assert 'Server-Timing' not in response.headers
+        assert await stored_traces(fake_redis_client) == []
+    
+    @pytest.mark.asyncio
+    async def test_signed_request_is_traced(self, client: AsyncClient, fake_redis_client: RedisClient, secret):
+        response = await client.get('/traced', headers=signed_header())
+        
+        timings = response.headers.get_list('Server-Timing')
+        assert [timing.split(';')[0] for timing in timings] == ['sql', 'handler']
+        assert timings[0].endswith(';dur=5.0;desc="2"')
+        trace, = await stored_traces(fake_redis_client)
+        assert trace['id'] == response.headers['X-Debug-Trace-Id']
+        assert (trace['method'], trace['path'], trace['status']) == ('GET', '/traced', 200)
+        assert [(span['category'], span['name']) for span in trace['spans']] == [
+            ('sql', 'SELECT 1'), ('sql', 'SELECT 2'), ('handler', 'traced')
+        ]
+    
+    @pytest.mark.asyncio
+    async def test_sampled_request_is_stored_without_headers(
+        self, 
+        client: AsyncClient, 
+        fake_redis_client: RedisClient, 
+        secret, 
+        monkeypatch
+    ):
+        monkeypatch.setattr(settings, 'PROFILING_SAMPLE_RATE', 1)
+        response = await client.get('/traced')
+        
+        assert 'X-Debug-Trace-Id' not in response.headers
+        assert 'Server-Timing' not in response.headers
+        trace, = await stored_traces(fake_redis_client)
+        assert len(trace['spans']) == 3
+    
+    @pytest.mark.asyncio
+    async def test_spans_are_not_recorded_out_of_trace(self, client: AsyncClient, fake_redis_client: RedisClient, secret):
+        await client.get('/traced', headers=signed_header())
+        record_span('sql', 'SELECT 3', time.perf_counter(), 0.001)  # No active trace
+        
+        trace, = await stored_traces(fake_redis_client)
+        assert len(trace['spans']) == 3
+
+
+class TestDebugRoutes:
+    @pytest.mark.asyncio
+    async def test_trace_is_readable_only_with_signature(
+        self, 
+        test_async_client: AsyncClient, 
+        fake_redis_client: RedisClient, 
+        secret
+    ):
+        await fake_redis_client.setex(trace_key('trace-id'), 60, json.dumps({'id': 'trace-id'}))
+        
+        for headers in ({}, {TRACE_HEADER: 'forged.value'}, {TRACE_HEADER: sign_trace_request(int(time.time()) - 1)}):
+            response = await test_async_client.get('/api/debug/traces/trace-id', headers=headers)
+            assert response.status_code == 404
+        
+        response = await test_async_client.get('/api/debug/traces/trace-id', headers=signed_header())
+        assert response.status_code == 200
+        assert response.json() == {'id': 'trace-id'}
+        response = await test_async_client.get('/api/debug/traces/missing', headers=signed_header())
+        assert response.status_code == 404
+    
+    @pytest.mark.asyncio
+    async def test_stats_are_readable_only_with_signature(self, test_async_client: AsyncClient, fake_redis_client: RedisClient, secret):
+        for headers in ({}, {TRACE_HEADER: 'forged.value'}):
+            response = await test_async_client.get('/api/stats', headers=headers)
+            assert response.status_code == 404
+        
+        response = await test_async_client.get('/api/stats', headers=signed_header())
+        assert response.status_code == 200
+        assert {'password_hash_pool', 'redis_pool', 'logging', 'response_cache'} <= response.json().keys()
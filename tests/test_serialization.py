@@ -0,0 +1,63 @@
+import pytest
+from pytest_asyncio import fixture
+from fastapi import FastAPI
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.inmemory import InMemoryBackend
+from httpx import AsyncClient, ASGITransport
+from pydantic import BaseModel
+from src.cache import cache
+from src.schemas import DataListResponse, PaginationInfo
+from src.serialization import json_response, RawJSONCoder
+
+
+class Item(BaseModel):
+    id: int
+    name: str
+
+
+class ItemRow:
+    '''ORM-like object, read by attributes'''
+    def __init__(self, id: int, name: str):
+        self.id = id
+        self.name = name
+
+
+app = FastAPI()
+calls = {'count': 0}
+
+
+@app.get('/items', response_model=DataListResponse[Item])
+@cache(expire=60, coder=RawJSONCoder)
+async def get_items():
+    calls['count'] += 1
+    return json_response(DataListResponse[Item], {
+        'data': [ItemRow(1, 'first'), ItemRow(2, 'second')],
+        'pagination': PaginationInfo(limit=2)
+    })
+
+
+@fixture
+async def client():
+    FastAPICache.init(InMemoryBackend(), prefix='test_serialization')
+    async with AsyncClient(transport=ASGITransport(app=app), base_url='http://testserver') as client:
+        yield client
+    FastAPICache.reset()
+
+
+class TestJsonResponse:
+    @pytest.mark.asyncio
+    async def test_cached_body_is_sent_as_is(self, client: AsyncClient):
+        expected = DataListResponse[Item](
+            data=[Item(id=1, name='first'), Item(id=2, name='second')], 
+            pagination=PaginationInfo(limit=2)
+        ).model_dump_json().encode()
+        
+        miss = await client.get('/items')
+        hit = await client.get('/items')
+        
+        assert calls['count'] == 1
+        assert miss.headers['x-fastapi-cache'] == 'MISS' and hit.headers['x-fastapi-cache'] == 'HIT'
+        for response in (miss, hit):
+            assert response.status_code == 200
+            assert response.headers['content-type'] == 'application/json'
+            assert response.content == expected
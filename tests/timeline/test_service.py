@@ -0,0 +1,215 @@
+from datetime import datetime, timedelta
+from uuid import uuid4
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select, delete, event
+from src.auth.dependencies import get_current_user
+from src.auth.users import UserModel, User
+from src.posts import PostModel
+from src.redis_client.client import RedisClient
+from src.schemas import PaginationParams
+from src.timeline.service import TimelineService, timeline_key, SENTINEL
+from src.main import app
+from src.config import settings
+from tests.conftest import session_factory_test, fake_redis_client, test_async_client
+
+BASE_TIME = datetime(2026, 1, 1)
+
+
+async def add_user(session, followers_count: int = 0) -> UserModel:
+    name = f'timeline-{uuid4().hex[:12]}'
+    user = UserModel(email=f'{name}@email.net', username=name, hashed_password='hash', followers_count=followers_count)
+    await user.save(session)
+    return user
+
+
+async def add_post(session, service: TimelineService, author: UserModel, minutes: int) -> PostModel:
+    post = PostModel(
+        title='Post',
+        description='Description',
+        image_url='bucket/image.png',
+        author_id=author.id,
+        created_at=BASE_TIME + timedelta(minutes=minutes)
+    )
+    await post.save(session)
+    await service.fan_out(post)
+    return post
+
+
+async def timeline_members(redis_client: RedisClient, user: UserModel) -> list[str]:
+    members = await redis_client.connection.zrevrange(timeline_key(user.id), 0, -1)
+    return [member.decode() for member in members if member.decode() != SENTINEL]
+
+
+async def walk_cursor(service: TimelineService, user: UserModel, limit: int) -> list:
+    posts, cursor = [], None
+    while True:
+        page, _, cursor = await service.get(user.id, PaginationParams(limit=limit, cursor=cursor))
+        posts += page
+        if cursor is None:
+            return posts
+
+
+class TestTimelineService:
+    @pytest.mark.asyncio
+    async def test_fan_out_pushes_only_into_built_timelines(self, fake_redis_client: RedisClient, monkeypatch):
+        monkeypatch.setattr(settings, 'TIMELINE_MAX_LENGTH', 2)
+        async with session_factory_test() as session:
+            service = TimelineService(session, fake_redis_client)
+            reader, cold_reader, author = await add_user(session), await add_user(session), await add_user(session)
+            await service.follow(reader.id, author.id)
+            await service.follow(cold_reader.id, author.id)
+            await service.get(reader.id, PaginationParams())  # Builds empty timeline
+            
+            posts = [await add_post(session, service, author, minutes) for minutes in range(3)]
+            
+            # Trimmed to max length, newest first
+            assert await timeline_members(fake_redis_client, reader) == [str(posts[2].id), str(posts[1].id)]
+            assert not await fake_redis_client.exists(timeline_key(cold_reader.id))
+            page, _, _ = await service.get(cold_reader.id, PaginationParams())
+            assert [post.id for post in page] == [posts[2].id, posts[1].id]  # Built from db, trimmed too
+    
+    @pytest.mark.asyncio
+    async def test_popular_author_posts_are_merged_on_read(self, fake_redis_client: RedisClient, monkeypatch):
+        monkeypatch.setattr(settings, 'TIMELINE_FANOUT_LIMIT', 1)
+        async with session_factory_test() as session:
+            service = TimelineService(session, fake_redis_client)
+            reader, other_reader = await add_user(session), await add_user(session)
+            author, popular = await add_user(session), await add_user(session)
+            await service.follow(reader.id, author.id)
+            await service.follow(reader.id, popular.id)
+            await service.follow(other_reader.id, popular.id)  # Passes fan-out limit
+            await service.get(reader.id, PaginationParams())
+            
+            posts = [await add_post(session, service, (author, popular)[minutes % 2], minutes) for minutes in range(4)]
+            
+            assert await timeline_members(fake_redis_client, reader) == [str(posts[2].id), str(posts[0].id)]
+            page, count, _ = await service.get(reader.id, PaginationParams())
+            assert [post.id for post in page] == [post.id for post in reversed(posts)]
+            assert count == 2  # Approximate, pulled posts are not counted
+    
+    @pytest.mark.asyncio
+    async def test_offset_and_cursor_pages(self, fake_redis_client: RedisClient, monkeypatch):
+        monkeypatch.setattr(settings, 'TIMELINE_FANOUT_LIMIT', 1)
+        async with session_factory_test() as session:
+            service = TimelineService(session, fake_redis_client)
+            reader, other_reader = await add_user(session), await add_user(session)
+            author, popular = await add_user(session), await add_user(session)
+            for followee in (author, popular):
+                await service.follow(reader.id, followee.id)
+            await service.follow(other_reader.id, popular.id)
+            await service.get(reader.id, PaginationParams())
+            
+            # Posts created at the same time in both sources
+            posts = [await add_post(session, service, (author, popular)[number % 2], number // 3) for number in range(7)]
+            expected = sorted(posts, key=lambda post: (post.created_at, post.id), reverse=True)
+            
+            offset_pages = [
+                (await service.get(reader.id, PaginationParams(limit=2, offset=offset)))[0]
+                for offset in range(0, len(posts), 2)
+            ]
+            assert [post.id for page in offset_pages for post in page] == [post.id for post in expected]
+            assert [post.id for post in await walk_cursor(service, reader, 2)] == [post.id for post in expected]
+            
+            _, _, cursor = await service.get(reader.id, PaginationParams(limit=len(posts)))
+            assert cursor is None
+    
+    @pytest.mark.asyncio
+    async def test_offset_page_loads_only_page_rows(self, fake_redis_client: RedisClient):
+        async with session_factory_test() as session:
+            service = TimelineService(session, fake_redis_client)
+            reader, author = await add_user(session), await add_user(session)
+            await service.follow(reader.id, author.id)
+            posts = [await add_post(session, service, author, minutes) for minutes in range(10)]
+        
+        async with session_factory_test() as session:
+            loaded = []
+            event.listen(session.sync_session, 'loaded_as_persistent', lambda _, instance: loaded.append(instance))
+            page, _, _ = await TimelineService(session, fake_redis_client).get(reader.id, PaginationParams(limit=2, offset=6))
+        
+        assert [post.id for post in page] == [posts[3].id, posts[2].id]
+        assert len(loaded) == 3  # Page and one extra post, not skipped ones
+    
+    @pytest.mark.asyncio
+    async def test_deleted_posts_do_not_end_pagination(self, fake_redis_client: RedisClient):
+        async with session_factory_test() as session:
+            service = TimelineService(session, fake_redis_client)
+            reader, author = await add_user(session), await add_user(session)
+            await service.follow(reader.id, author.id)
+            await service.get(reader.id, PaginationParams())
+            posts = [await add_post(session, service, author, minutes) for minutes in range(6)]
+            
+            # Deleted without `remove`, so timeline keeps stale ids
+            stale = [posts[5].id, posts[3].id, posts[2].id]
+            await session.execute(delete(PostModel).where(PostModel.id.in_(stale)))
+            await session.commit()
+            
+            page, _, cursor = await service.get(reader.id, PaginationParams(limit=2))
+            assert [post.id for post in page] == [posts[4].id, posts[1].id]
+            assert cursor is not None
+            page, _, cursor = await service.get(reader.id, PaginationParams(limit=2, cursor=cursor))
+            assert [post.id for post in page] == [posts[0].id]
+            assert cursor is None
+            assert await timeline_members(fake_redis_client, reader) == [str(post.id) for post in (posts[4], posts[1], posts[0])]
+    
+    @pytest.mark.asyncio
+    async def test_remove_and_unfollow(self, fake_redis_client: RedisClient):
+        async with session_factory_test() as session:
+            service = TimelineService(session, fake_redis_client)
+            reader, author, other_author = await add_user(session), await add_user(session), await add_user(session)
+            await service.follow(reader.id, author.id)
+            await service.follow(reader.id, other_author.id)
+            await service.get(reader.id, PaginationParams())
+            post, kept_post = await add_post(session, service, author, 0), await add_post(session, service, other_author, 1)
+            
+            await service.remove(post)
+            assert await timeline_members(fake_redis_client, reader) == [str(kept_post.id)]
+            assert await timeline_members(fake_redis_client, author) == []
+            
+            removed_post = await add_post(session, service, author, 2)
+            await service.unfollow(reader.id, author.id)
+            assert not await fake_redis_client.exists(timeline_key(reader.id))
+            page, _, _ = await service.get(reader.id, PaginationParams())
+            assert [post.id for post in page] == [kept_post.id]
+            assert removed_post.id not in [post.id for post in page]
+            
+            await session.refresh(author)
+            assert author.followers_count == 0
+
+
+@pytest.fixture
+def current_user():
+    user = {}
+    app.dependency_overrides[get_current_user] = lambda: user['schema']
+    yield user
+    del app.dependency_overrides[get_current_user]
+
+
+class TestFollowRoutes:
+    @pytest.mark.asyncio
+    async def test_follow_and_unfollow(
+        self,
+        test_async_client: AsyncClient,
+        fake_redis_client: RedisClient,
+        current_user: dict
+    ):
+        async with session_factory_test() as session:
+            reader, author = await add_user(session), await add_user(session)
+        current_user['schema'] = User.model_validate(reader)
+        
+        for _ in range(2):  # Following twice counts follower once
+            response = await test_async_client.post(f'/api/timeline/follow/{author.id}')
+            assert response.status_code == 200
+        assert await followers_count(author) == 1
+        
+        assert (await test_async_client.post(f'/api/timeline/follow/{reader.id}')).status_code == 400
+        assert (await test_async_client.post(f'/api/timeline/follow/{uuid4()}')).status_code == 404
+        
+        response = await test_async_client.delete(f'/api/timeline/follow/{author.id}')
+        assert response.status_code == 200
+        assert await followers_count(author) == 0
+
+
+async def followers_count(user: UserModel) -> int:
+    async with session_factory_test() as session:
+        return await session.scalar(select(UserModel.followers_count).where(UserModel.id == user.id))